@@ -0,0 +1,72 @@
+"""
+Balance Cache for Escrow Bot
+Short-lived balances keyed by (address, token, block) so probes and read-only
+commands are served from memory
+"""
+
+import threading
+import time
+
+NATIVE = "native"  # Token key for MATIC
+
+
+class BalanceCache:
+    """Balances per (address, token, block), expiring after ttl_seconds"""
+
+    def __init__(self, ttl_seconds=10):
+        self.ttl_seconds = ttl_seconds
+        self.entries = {}  # (address, token, block) -> (balance, stored_at)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(address, token, block_number):
+        return address.lower(), (token or NATIVE).lower(), block_number
+
+    def _expire(self, now):
+        stale = [key for key, (_, stored_at) in self.entries.items() if now - stored_at > self.ttl_seconds]
+        for key in stale:
+            del self.entries[key]
+
+    def put(self, address, token, block_number, balance):
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            self.entries[self.key(address, token, block_number)] = (balance, now)
+
+    def get(self, address, token, block_number):
+        """Balance at exactly this block, or None"""
+        with self.lock:
+            entry = self.entries.get(self.key(address, token, block_number))
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def recent(self, address, token):
+        """Balance at the newest cached block within the TTL, or None"""
+        address, token, _ = self.key(address, token, None)
+        now = time.time()
+        with self.lock:
+            newest = None
+            for (entry_address, entry_token, block_number), (balance, stored_at) in self.entries.items():
+                if entry_address != address or entry_token != token or now - stored_at > self.ttl_seconds:
+                    continue
+                if newest is None or block_number > newest[0]:
+                    newest = (block_number, balance)
+            if newest is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return newest[1]
+
+    def invalidate(self, address=None):
+        """Forget cached balances, e.g. right after sending a transfer from address"""
+        with self.lock:
+            if address is None:
+                self.entries = {}
+                return
+            address = address.lower()
+            self.entries = {key: entry for key, entry in self.entries.items() if key[0] != address}
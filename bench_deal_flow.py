@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Deal Flow Benchmark
+Runs deposit -> confirm -> release for many deals against the simulated chain, offline
+
+Usage: python bench_deal_flow.py [--deals 1000] [--latency-ms 0] [--batch]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Fixed throwaway credentials: the bot is never started and nothing leaves the process
+os.environ.setdefault("BOT_TOKEN", "123456:simulated")
+os.environ.setdefault("PRIVATE_KEY", "0x" + "11" * 32)
+
+from web3 import Web3
+from web3.middleware.geth_poa import geth_poa_middleware
+
+from sim_chain import SimulatedChain
+
+
+class FakeBot:
+    """Accepts every Bot API call and counts them instead of talking to Telegram"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls += 1
+        return call
+
+
+def wallet(kind, index):
+    return Web3.to_checksum_address(f"0x{kind:02x}{index:038x}")
+
+
+def run(deal_count, latency_ms=0, batch=False):
+    """Drive deal_count deals through the bot against a fresh chain; returns (results, timings)"""
+    os.chdir(tempfile.mkdtemp())  # Stores are written relative to the working directory
+    import main
+    from payout_queue import JOB_DONE
+
+    chain = SimulatedChain(latency=latency_ms / 1000)
+    client = Web3(chain)
+    client.middleware_onion.inject(geth_poa_middleware, layer=0)
+    main.configure(web3=client, bot=FakeBot())
+    main.BATCH_PAYOUTS_ENABLED = batch
+    main.PAYOUT_BATCH_WINDOW = 0
+    main.payout_batcher.window_seconds = 0
+
+    # PRIVATE_KEY's account plays the escrow wallet, so deposits fund the payouts signed with it
+    main.ESCROW_WALLET = main.payout_builder.account.address
+    main.watch_set.add(main.ESCROW_WALLET)
+    chain.set_native_balance(main.ESCROW_WALLET, 10 ** 18)
+
+    timings = {}
+    # Deal ids are creation timestamps, as in /buy and /sell
+    first_id = int(time.time())
+    deal_ids = [str(first_id + index) for index in range(deal_count)]
+    amount = 10.0
+    amount_wei = int(amount * 10 ** main.USDT_DECIMALS)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        state = main.start_payment_monitor()
+        main.monitor_tick(state)
+
+        started = time.perf_counter()
+        for index, deal_id in enumerate(deal_ids):
+            main.create_deal(f"buyer{index}", f"seller{index}", amount, wallet(0xb0, index), deal_id,
+                             seller_wallet=wallet(0x5e, index))
+        timings["create"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for index in range(deal_count):
+            chain.deposit(wallet(0x5e, index), main.ESCROW_WALLET, amount_wei)
+        chain.mine()
+        main.monitor_tick(state)
+        main.monitor_tick(state)  # Transfers are scanned up to the head the previous tick saw
+        timings["deposit"] = time.perf_counter() - started
+
+        # Both parties confirm (/paid, /received) while the deposit is still settling
+        db = main.load_db()
+        for deal_id in deal_ids:
+            db[deal_id].update(status="buyer_paid", buyer_confirmed=True, seller_confirmed=True)
+        main.save_db(db)
+
+        started = time.perf_counter()
+        chain.mine(main.DEPOSIT_FINALITY_BLOCKS)
+        main.monitor_tick(state)
+        timings["finality"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        while True:
+            job = main.payout_queue.next_job(timeout=0)
+            if job is None:
+                break
+            main.payout_queue.complete(job["deal_id"], main.execute_payout_job(job))
+        main.monitor_tick(state)
+        while main.payout_batcher.pending_count():  # Batches go out PAYOUT_BATCH_MAX at a time
+            main.monitor_tick(state)
+        timings["payout"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        chain.mine()
+        main.monitor_tick(state)
+        timings["settle"] = time.perf_counter() - started
+
+    db = main.load_db()
+    results = {
+        "completed": sum(1 for deal_id in deal_ids if db[deal_id]["status"] == "completed"),
+        "jobs_done": sum(1 for deal_id in deal_ids if (main.payout_queue.get(deal_id) or {}).get("state") == JOB_DONE),
+        "round_trips": chain.round_trips,
+        "transactions": len(chain.receipts),
+    }
+    return results, timings
+
+
+def run_chain(deal_count):
+    """The simulator alone: deposits, one block and the monitor's getLogs; returns seconds"""
+    chain = SimulatedChain()
+    client = Web3(chain)
+    escrow = wallet(0xe5, 0)
+    started = time.perf_counter()
+    for index in range(deal_count):
+        chain.deposit(wallet(0x5e, index), escrow, 10 ** 7)
+    chain.mine()
+    logs = client.eth.get_logs({"address": chain.token_address, "fromBlock": 1, "toBlock": "latest"})
+    assert len(logs) == deal_count
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deals", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--batch", action="store_true", help="pay out with one Disperse transaction")
+    args = parser.parse_args()
+
+    chain_seconds = run_chain(args.deals)
+    results, timings = run(args.deals, args.latency_ms, args.batch)
+    print(f"📊 DEAL FLOW: {args.deals} deals, {args.latency_ms} ms RPC latency, "
+          f"{'batched' if args.batch else 'individual'} payouts")
+    print("=" * 60)
+    for phase, seconds in timings.items():
+        print(f"{phase:>10}: {seconds:8.3f}s  {args.deals / seconds if seconds else 0:10.0f} deals/s")
+    total = sum(timings.values())
+    print(f"{'total':>10}: {total:8.3f}s  {args.deals / total:10.0f} deals/s")
+    print(f"{'chain only':>10}: {chain_seconds:8.3f}s  {args.deals / chain_seconds:10.0f} deals/s")
+    print(f"✅ completed {results['completed']}/{args.deals} deals, "
+          f"{results['transactions']} transactions, {results['round_trips']} RPC round trips")
+    return 0 if results["completed"] == args.deals else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
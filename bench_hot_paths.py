@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Hot Path Benchmarks
+Times the bot's per-command functions against synthetic stores of growing size
+
+Each benchmark runs at every size in --sizes (records in the store it reads),
+reports ops/s and peak traced memory, flags sizes where time per op grows
+faster than the data, and appends the run to a JSON-lines results file so the
+next run can be compared with it.
+
+Usage: python bench_hot_paths.py [--sizes 100,1000,10000,100000] [--only load_db,save_db]
+                                 [--results bench_results.jsonl] [--no-save]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Fixed throwaway credentials: nothing here talks to Telegram or the chain
+os.environ.setdefault("BOT_TOKEN", "123456:simulated")
+os.environ.setdefault("PRIVATE_KEY", "0x" + "11" * 32)
+
+from bench_deal_flow import FakeBot, wallet
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [100, 1000, 10000, 100000]  # Add 1000000 explicitly; the JSON stores take minutes there
+MIN_SECONDS = 0.2       # Keep repeating an op until this much time is measured...
+MAX_REPEATS = 1000      # ...or it ran this many times
+CLIFF_EXPONENT = 1.5    # Time per op growing faster than records^1.5 is flagged
+
+# === SYNTHETIC DATA ===
+
+def synthetic_escrows(count, now):
+    """Settled deals, ids one second apart going back from a day ago (none expire)"""
+    statuses = ["completed", "completed", "completed", "payout_pending", "emergency_refunded"]
+    first_id = int(now) - 86400
+    return {
+        str(first_id - index): {
+            "buyer": f"@buyer{index}",
+            "seller": f"@seller{index}",
+            "amount": float(1 + index % 49),
+            "buyer_wallet": wallet(0xb0, index),
+            "seller_wallet": wallet(0x5e, index),
+            "status": statuses[index % len(statuses)],
+            "buyer_confirmed": True,
+            "seller_confirmed": True,
+            "created": float(first_id - index),
+            "forwarding_address": None,
+            "forwarding_reference": None,
+            "deposit_address": None,
+            "deposit_index": None,
+        }
+        for index in range(count)
+    }
+
+
+def synthetic_orders(count, now):
+    """Open sell orders for whole amounts 1-49 USDT"""
+    return {
+        "buy_orders": {},
+        "sell_orders": {
+            str(int(now) - index): {
+                "seller": f"@seller{index}",
+                "amount": float(1 + index % 49),
+                "wallet": wallet(0x5e, index),
+                "status": "active",
+                "created": now - index,
+            }
+            for index in range(count)
+        },
+    }
+
+
+def synthetic_wallets(count):
+    return {f"@trader{index}": wallet(0x7a, index) for index in range(count)}
+
+
+def synthetic_security(count, now):
+    """Recent command history for count users, cleaned up just now"""
+    return {
+        "command_history": {f"@trader{index}": {f"general_{int(now) - 1}": now - 1} for index in range(count)},
+        "order_history": {},
+        "failed_attempts": {},
+        "last_cleanup": now,
+    }
+
+
+def write_store(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+# === BENCHMARKS ===
+# Each setup(main, records) prepares the stores and returns (op, operations done per op() call)
+
+def bench_load_db(main, records):
+    write_store(main.DB_FILE, synthetic_escrows(records, time.time()))
+    return main.load_db, 1
+
+
+def bench_save_db(main, records):
+    db = synthetic_escrows(records, time.time())
+    return lambda: main.save_db(db), 1
+
+
+def bench_check_deal_expiry(main, records):
+    write_store(main.DB_FILE, synthetic_escrows(records, time.time()))
+    return main.check_deal_expiry, 1
+
+
+def bench_check_rate_limit(main, records):
+    write_store("security_data.json", synthetic_security(records, time.time()))
+    users = iter(range(10 ** 9))
+    return lambda: main.check_rate_limit(f"trader{next(users) % records}"), 1
+
+
+def bench_buy_order_match(main, records):
+    """A /buy that scans every open sell order without finding its amount"""
+    now = time.time()
+    write_store(main.ORDERS_FILE, synthetic_orders(records, now))
+    write_store(main.WALLETS_FILE, synthetic_wallets(records))
+    write_store(main.DB_FILE, synthetic_escrows(min(records, 1000), now))
+    users = iter(range(10 ** 9))
+
+    def op():
+        message = SimpleNamespace(chat=SimpleNamespace(id=main.GROUP_ID), text="/buy 49.5",
+                                  from_user=SimpleNamespace(username=f"trader{next(users) % records}"))
+        main.buy_order(message)  # Its buy order is keyed by the second, so the book barely grows
+    return op, 1
+
+
+def bench_calculate_transaction_fee(main, records):
+    amounts = [0.05 + (index % 5000) / 100 for index in range(records)]
+
+    def op():
+        for amount in amounts:
+            main.calculate_transaction_fee(amount)
+    return op, records
+
+
+BENCHMARKS = {
+    "load_db": bench_load_db,
+    "save_db": bench_save_db,
+    "check_deal_expiry": bench_check_deal_expiry,
+    "check_rate_limit": bench_check_rate_limit,
+    "buy_order_match": bench_buy_order_match,
+    "calculate_transaction_fee": bench_calculate_transaction_fee,
+}
+
+# === RUNNER ===
+
+def measure(setup, main, records):
+    """Time op() until MIN_SECONDS or MAX_REPEATS, then trace one more call for peak memory"""
+    os.chdir(tempfile.mkdtemp())  # Stores are written relative to the working directory
+    with contextlib.redirect_stdout(io.StringIO()):
+        op, ops_per_call = setup(main, records)
+        ops = 0
+        elapsed = 0.0
+        repeats = 0
+        while elapsed < MIN_SECONDS and repeats < MAX_REPEATS:
+            started = time.perf_counter()
+            op()
+            ops += ops_per_call
+            elapsed += time.perf_counter() - started
+            repeats += 1
+
+        tracemalloc.start()
+        try:
+            op()
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "records": records,
+        "ops": ops,
+        "seconds_per_op": elapsed / ops,
+        "ops_per_second": ops / elapsed,
+        "peak_bytes": peak_bytes,
+    }
+
+
+def scaling_exponent(smaller, larger):
+    """How time per op grows with records: 1.0 is linear, 2.0 quadratic"""
+    if smaller["seconds_per_op"] <= 0:
+        return 0.0
+    return (math.log(larger["seconds_per_op"] / smaller["seconds_per_op"])
+            / math.log(larger["records"] / smaller["records"]))
+
+
+def run(sizes, names=None):
+    """Run the named benchmarks (all by default) at every size; returns {name: [result, ...]}"""
+    import main
+    main.configure(bot=FakeBot())
+    main.RATE_LIMIT_COMMANDS_PER_MINUTE = 10 ** 9
+    main.RATE_LIMIT_ORDERS_PER_HOUR = 10 ** 9
+
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = [measure(BENCHMARKS[name], main, records) for records in sizes]
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_previous(path):
+    """The last run stored in the results file, or None"""
+    try:
+        with open(path, "r") as f:
+            lines = [line for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return json.loads(lines[-1]) if lines else None
+
+
+def save_run(path, results):
+    record = {
+        "run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+def report(results, previous=None):
+    baseline = {}
+    if previous:
+        for name, rows in previous["results"].items():
+            for row in rows:
+                baseline[(name, row["records"])] = row
+
+    print("⏱️ HOT PATH BENCHMARKS")
+    print("=" * 60)
+    cliffs = []
+    for name, rows in results.items():
+        print(f"\n{name}")
+        print(f"{'records':>10} {'ops/s':>12} {'ms/op':>10} {'peak MB':>9} {'growth':>7} {'vs last':>8}")
+        for index, row in enumerate(rows):
+            growth = ""
+            if index:
+                exponent = scaling_exponent(rows[index - 1], row)
+                growth = f"n^{exponent:.1f}"
+                if exponent > CLIFF_EXPONENT:
+                    cliffs.append(f"{name} at {row['records']} records (n^{exponent:.1f})")
+            change = ""
+            before = baseline.get((name, row["records"]))
+            if before:
+                change = f"{(row['seconds_per_op'] / before['seconds_per_op'] - 1) * 100:+.0f}%"
+            print(f"{row['records']:>10} {row['ops_per_second']:>12.1f} {row['seconds_per_op'] * 1000:>10.3f} "
+                  f"{row['peak_bytes'] / 2 ** 20:>9.2f} {growth:>7} {change:>8}")
+
+    print()
+    if previous:
+        print(f"📎 Compared with {previous['run_at']} ({previous.get('commit') or 'unknown commit'})")
+    for cliff in cliffs:
+        print(f"⚠️ Superlinear: {cliff}")
+    if not cliffs:
+        print("✅ No superlinear scaling")
+    return cliffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated record counts")
+    parser.add_argument("--only", help="comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--results", default=os.path.join(REPO_DIR, "bench_results.jsonl"),
+                        help="JSON-lines file runs are appended to and compared with")
+    parser.add_argument("--no-save", action="store_true", help="compare only, don't append this run")
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    names = args.only.split(",") if args.only else None
+    unknown = [name for name in names or [] if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results_path = os.path.abspath(args.results)  # Benchmarks change directory
+    previous = load_previous(results_path)
+    results = run(sizes, names)
+    report(results, previous)
+    if not args.no_save:
+        save_run(results_path, results)
+        print(f"💾 Results appended to {results_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
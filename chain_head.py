@@ -0,0 +1,103 @@
+"""
+Chain Head Tracking for Escrow Bot
+One shared view of the latest block, and read snapshots pinned to a block
+"""
+
+import threading
+import time
+
+
+class ChainHeadTracker:
+    """Latest block number shared by every thread, refreshed at most once per poll interval"""
+
+    def __init__(self, web3, poll_interval=1.0):
+        self.web3 = web3
+        self.poll_interval = poll_interval  # Polygon produces a block roughly every 2 seconds
+        self.number = None
+        self.updated_at = 0
+        self.lock = threading.Lock()
+
+    def update(self, number):
+        """Record a head seen elsewhere (e.g. in the monitor's RPC batch) without another call"""
+        with self.lock:
+            if self.number is None or number >= self.number:
+                self.number = number
+            self.updated_at = time.time()
+
+    def head(self):
+        with self.lock:
+            if self.number is not None and time.time() - self.updated_at < self.poll_interval:
+                return self.number
+            # Hold the lock while fetching so concurrent callers share one eth_blockNumber
+            self.number = max(self.number or 0, self.web3.eth.block_number)
+            self.updated_at = time.time()
+            return self.number
+
+    def snapshot(self, block_number=None):
+        """Read snapshot pinned to block_number, or to the current head"""
+        return ReadSnapshot(self.web3, block_number if block_number is not None else self.head())
+
+
+class ReadSnapshot:
+    """
+    Chain reads pinned to one block and memoized.
+
+    Everything read through a snapshot reflects the same block, and asking
+    for the same value twice costs one RPC call.
+    """
+
+    def __init__(self, web3, block_number):
+        self.web3 = web3
+        self.block_number = block_number
+        self.memo = {}
+        self.lock = threading.Lock()
+        self.misses = 0
+
+    def memoized(self, key, fetch):
+        with self.lock:
+            if key in self.memo:
+                return self.memo[key]
+        value = fetch()
+        with self.lock:
+            self.misses += 1
+            self.memo.setdefault(key, value)
+            return self.memo[key]
+
+    def token_balance(self, token, address):
+        """token is a web3 contract exposing balanceOf"""
+        address = self.web3.to_checksum_address(address)
+        return self.memoized(
+            ("balanceOf", token.address, address),
+            lambda: token.functions.balanceOf(address).call(block_identifier=self.block_number)
+        )
+
+    def native_balance(self, address):
+        address = self.web3.to_checksum_address(address)
+        return self.memoized(
+            ("balance", address),
+            lambda: self.web3.eth.get_balance(address, self.block_number)
+        )
+
+    def transaction_count(self, address):
+        """Mined nonce as of this block (pending transactions are not included)"""
+        address = self.web3.to_checksum_address(address)
+        return self.memoized(
+            ("nonce", address),
+            lambda: self.web3.eth.get_transaction_count(address, self.block_number)
+        )
+
+    def block_hash(self, block_number):
+        return self.memoized(
+            ("block_hash", block_number),
+            lambda: self.web3.to_hex(self.web3.eth.get_block(block_number)["hash"])
+        )
+
+    def get_logs(self, address, topics, from_block):
+        """Logs from from_block up to this snapshot's block"""
+        key = ("logs", address, repr(topics), from_block)
+        return self.memoized(key, lambda: self.web3.eth.get_logs({
+            "address": address,
+            "topics": topics,
+            "fromBlock": from_block,
+            "toBlock": self.block_number,
+        }))
@@ -0,0 +1,119 @@
+"""
+Persistent Deposit Deduplication for Escrow Bot
+Remembers processed on-chain transfers across restarts with bounded size and age
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class DedupStore:
+    """
+    Set of processed deposit keys over a FIFO window, flushed to a JSON file.
+
+    Keys are evicted in the order they were added, once the store holds
+    max_entries or once they are older than ttl_seconds. A lookup does not
+    refresh a key: a transfer only needs remembering for as long as it can
+    still show up in a scan.
+    """
+
+    def __init__(self, path, max_entries=10000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # key -> time added, oldest first
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()  # One writer at a time, so an older snapshot never lands last
+        self.dirty = False
+        self.load()
+
+    @staticmethod
+    def key(tx_hash, log_index):
+        """Deposits are identified by the transfer log, not by balance changes"""
+        return f"{tx_hash.lower()}:{log_index}"
+
+    def _expire(self, now):
+        # Entries are kept in insertion order, so expired ones sit at the front
+        while self.entries:
+            oldest_key, added_at = next(iter(self.entries.items()))
+            if now - added_at <= self.ttl_seconds:
+                break
+            self.entries.popitem(last=False)
+            self.dirty = True
+
+    def contains(self, key):
+        with self.lock:
+            added_at = self.entries.get(key)
+            if added_at is None:
+                return False
+            if time.time() - added_at > self.ttl_seconds:
+                del self.entries[key]
+                self.dirty = True
+                return False
+            return True
+
+    __contains__ = contains
+
+    def add(self, key):
+        """Mark a key as processed; returns False if it already was"""
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            if key in self.entries:
+                return False
+            self.entries[key] = now
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+            return True
+
+    def discard(self, key):
+        """Forget a key, e.g. when its deposit was reorged away"""
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.dirty = True
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            stored = []
+        except json.JSONDecodeError as e:
+            # Keep the damaged file for inspection; starting empty risks crediting a deposit twice
+            corrupt_path = f"{self.path}.corrupt"
+            os.replace(self.path, corrupt_path)
+            print(f"❌ Processed deposits file is corrupt ({e}), moved to {corrupt_path}; starting empty")
+            stored = []
+
+        with self.lock:
+            # Stored as [key, added_at] pairs in insertion order
+            self.entries = OrderedDict((key, added_at) for key, added_at in stored)
+            self._expire(time.time())
+            self.dirty = False
+
+    def flush(self):
+        """Write the store to disk if it changed since the last flush"""
+        with self.flush_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+                data = list(self.entries.items())
+                self.dirty = False
+
+            temp_path = f"{self.path}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                with self.lock:
+                    self.dirty = True
+                print(f"❌ Failed to save processed deposits: {e}")
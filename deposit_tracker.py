@@ -0,0 +1,119 @@
+"""
+Deposit Confirmation Tracking for Escrow Bot
+Follows each USDT deposit from first sighting to finality and detects chain reorgs
+"""
+
+import threading
+
+# Deposit states, in the order a healthy deposit moves through them
+DEPOSIT_SEEN = "seen"
+DEPOSIT_CONFIRMED = "confirmed"
+DEPOSIT_FINAL = "final"
+DEPOSIT_REORGED = "reorged"
+
+
+class DepositTracker:
+    """Track deposits per deal as seen -> confirmed(N) -> final"""
+
+    def __init__(self, confirmations_required, finality_blocks):
+        if finality_blocks < confirmations_required:
+            raise ValueError("finality_blocks must be >= confirmations_required")
+        self.confirmations_required = confirmations_required
+        self.finality_blocks = finality_blocks
+        self.deposits = {}  # deal_id -> deposit record
+        self.lock = threading.Lock()
+
+    def track(self, deal_id, tx_hash, block_number, block_hash, log_index=None):
+        """Start tracking a deposit that was just seen on-chain"""
+        record = {
+            "tx_hash": tx_hash,
+            "log_index": log_index,
+            "block_number": block_number,
+            "block_hash": block_hash,
+            "state": DEPOSIT_SEEN,
+            "confirmations": 0,
+        }
+        with self.lock:
+            self.deposits[deal_id] = record
+        return dict(record)
+
+    def untrack(self, deal_id):
+        """Stop tracking a deal (cancelled, expired or already final)"""
+        with self.lock:
+            self.deposits.pop(deal_id, None)
+
+    def get(self, deal_id):
+        with self.lock:
+            record = self.deposits.get(deal_id)
+            return dict(record) if record else None
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.deposits)
+
+    def block_numbers(self):
+        """Distinct heights the next update() will look up, for prefetching their hashes"""
+        with self.lock:
+            return sorted({record["block_number"] for record in self.deposits.values()})
+
+    def state_for_depth(self, confirmations):
+        """Map a confirmation count to a deposit state"""
+        if confirmations >= self.finality_blocks:
+            return DEPOSIT_FINAL
+        if confirmations >= self.confirmations_required:
+            return DEPOSIT_CONFIRMED
+        return DEPOSIT_SEEN
+
+    def update(self, head_number, get_block_hash):
+        """
+        Advance every tracked deposit against the current chain head.
+
+        get_block_hash(block_number) must return the canonical block hash at
+        that height, or None if the chain no longer has a block there.
+        Returns a list of (deal_id, new_state, record) for deposits whose
+        state changed. Final and reorged deposits stop being tracked.
+        """
+        with self.lock:
+            snapshot = list(self.deposits.items())
+
+        events = []
+        for deal_id, record in snapshot:
+            block_number = record["block_number"]
+
+            if block_number > head_number:
+                canonical_hash = None
+            else:
+                canonical_hash = get_block_hash(block_number)
+
+            if canonical_hash is None or canonical_hash.lower() != record["block_hash"].lower():
+                record = dict(record, state=DEPOSIT_REORGED, confirmations=0)
+                events.append((deal_id, DEPOSIT_REORGED, record))
+                self.untrack(deal_id)
+                continue
+
+            confirmations = head_number - block_number + 1
+            new_state = self.state_for_depth(confirmations)
+            changed = new_state != record["state"]
+
+            with self.lock:
+                if deal_id not in self.deposits:
+                    continue
+                self.deposits[deal_id]["confirmations"] = confirmations
+                self.deposits[deal_id]["state"] = new_state
+                record = dict(self.deposits[deal_id])
+
+            if changed:
+                events.append((deal_id, new_state, record))
+            if new_state == DEPOSIT_FINAL:
+                self.untrack(deal_id)
+
+        return events
+
+    def to_dict(self):
+        with self.lock:
+            return {deal_id: dict(record) for deal_id, record in self.deposits.items()}
+
+    def load(self, deposits):
+        """Replace tracked deposits, e.g. when restoring after a restart"""
+        with self.lock:
+            self.deposits = {deal_id: dict(record) for deal_id, record in deposits.items()}
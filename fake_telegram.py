@@ -0,0 +1,210 @@
+"""
+Fake Telegram Bot API for Escrow Bot
+Local HTTP stand-in for api.telegram.org: scripted users send commands, every bot call is recorded
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlparse
+
+# Calls that post a message and get a Message back
+MESSAGE_METHODS = ("sendMessage", "editMessageText", "sendPhoto", "sendDocument")
+
+
+def _parse_value(value):
+    """Query values arrive as strings; telebot JSON-encodes nested objects"""
+    if isinstance(value, str) and value[:1] in ("{", "["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    if isinstance(value, str) and value.lstrip("-").isdigit():
+        return int(value)
+    return value
+
+
+def reply_to_id(params):
+    """The message a bot call replies to; telebot sends either form depending on version"""
+    if "reply_to_message_id" in params:
+        return params["reply_to_message_id"]
+    reply = params.get("reply_parameters")
+    return reply.get("message_id") if isinstance(reply, dict) else None
+
+
+class FakeBotAPI:
+    """
+    The Bot API methods telebot uses, served on a local port.
+
+    Virtual users queue messages with send_command() and the bot receives them
+    through getUpdates long polling, as it would from Telegram. Every other
+    call the bot makes is recorded with its arrival time; a reply is matched
+    to the command it answers by chat and reply_to_message_id, so
+    wait_for_reply() measures the full round trip through the bot's handler
+    threads. Methods that are not modelled answer ok with result true.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, bot_username="escrow_test_bot", max_poll_seconds=1.0):
+        self.bot_user = {"id": 100, "is_bot": True, "first_name": "Escrow Test Bot", "username": bot_username}
+        self.max_poll_seconds = max_poll_seconds  # Cap on long polls so stop() is quick
+        self.updates = []
+        self.next_update_id = 1
+        self.next_message_id = 1
+        self.calls = []  # [{"method", "params", "at"}], every call except getUpdates
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def api_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/bot{{0}}/{{1}}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def install(self):
+        """Point telebot at this server; returns the previous API_URL to restore later"""
+        from telebot import apihelper
+        previous = apihelper.API_URL
+        apihelper.API_URL = self.api_url
+        return previous
+
+    # === VIRTUAL USERS ===
+
+    def send_command(self, user_id, username, text, chat_id=None):
+        """Queue a message from a user (in their private chat by default); returns the message"""
+        with self.condition:
+            message = {
+                "message_id": self.next_message_id,
+                "from": {"id": user_id, "is_bot": False, "first_name": username, "username": username},
+                "chat": {"id": chat_id or user_id, "type": "private" if not chat_id or chat_id > 0 else "group"},
+                "date": int(time.time()),
+                "text": text,
+            }
+            if text.startswith("/"):
+                command_length = len(text.split()[0])
+                message["entities"] = [{"type": "bot_command", "offset": 0, "length": command_length}]
+            self.updates.append({"update_id": self.next_update_id, "message": message})
+            self.next_update_id += 1
+            self.next_message_id += 1
+            self.condition.notify_all()
+            return message
+
+    def wait_for_reply(self, message, timeout=10.0):
+        """The first bot message replying to message (or sent to its chat after it), or None on timeout
+
+        An explicit reply wins over an untagged message that happened to reach the chat first.
+        """
+        chat_id = message["chat"]["id"]
+        deadline = time.time() + timeout
+        with self.condition:
+            while True:
+                untagged = None
+                for call in self.calls:
+                    params = call["params"]
+                    if call["method"] not in MESSAGE_METHODS or params.get("chat_id") != chat_id:
+                        continue
+                    reply_to = reply_to_id(params)
+                    if reply_to == message["message_id"]:
+                        return call
+                    if reply_to is None and untagged is None and call["message_id"] > message["message_id"]:
+                        untagged = call
+                if untagged is not None:
+                    return untagged
+                remaining = deadline - time.time()
+                if remaining <= 0 or self.stopped:
+                    return None
+                self.condition.wait(remaining)
+
+    def sent_messages(self, chat_id=None):
+        with self.condition:
+            return [call for call in self.calls if call["method"] in MESSAGE_METHODS
+                    and (chat_id is None or call["params"].get("chat_id") == chat_id)]
+
+    # === BOT API ===
+
+    def handle(self, method, params):
+        if method == "getUpdates":
+            return self._get_updates(params)
+        if method == "getMe":
+            return self.bot_user
+
+        with self.condition:
+            call = {"method": method, "params": params, "at": time.time(), "message_id": self.next_message_id}
+            result = True
+            if method in MESSAGE_METHODS:
+                chat_id = params.get("chat_id")
+                result = {
+                    "message_id": params.get("message_id", self.next_message_id),
+                    "from": self.bot_user,
+                    "chat": {"id": chat_id, "type": "private" if isinstance(chat_id, int) and chat_id > 0 else "group"},
+                    "date": int(call["at"]),
+                    "text": params.get("text", ""),
+                }
+                if method != "editMessageText":
+                    self.next_message_id += 1
+            self.calls.append(call)
+            self.condition.notify_all()
+            return result
+
+    def _get_updates(self, params):
+        offset = params.get("offset", 0)
+        limit = params.get("limit", 100)
+        deadline = time.time() + min(float(params.get("timeout", 0)), self.max_poll_seconds)
+        with self.condition:
+            # Confirming an offset drops everything before it, as Telegram does
+            self.updates = [update for update in self.updates if update["update_id"] >= offset]
+            while not self.updates and not self.stopped:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.updates[:limit]
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Headers and body go out separately; don't wait on the ACK
+
+            def _serve(self):
+                url = urlparse(self.path)
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    body = self.rfile.read(length).decode()
+                    if self.headers.get("Content-Type", "").startswith("application/json"):
+                        params.update(json.loads(body))
+                    else:
+                        params.update(parse_qsl(body))
+                params = {key: _parse_value(value) for key, value in params.items()}
+
+                method = url.path.rsplit("/", 1)[-1]
+                payload = json.dumps({"ok": True, "result": api.handle(method, params)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,176 @@
+"""
+HD Deposit Addresses for Escrow Bot
+Derives a deterministic deposit address per deal from a local seed and sweeps
+funded deal addresses back into the main escrow wallet in batches
+"""
+
+import threading
+
+from eth_account import Account
+from eth_account.hdaccount import key_from_seed, seed_from_mnemonic
+
+from nonce_manager import NonceManager
+
+# Deal addresses live on their own BIP-44 account so they never collide with wallet account 0
+DEFAULT_BASE_PATH = "m/44'/60'/1'/0"
+MAX_CHILD_INDEX = 2 ** 31  # Non-hardened child indexes
+
+
+class DepositAddressDeriver:
+    """Deterministic per-deal deposit addresses from a BIP-39 mnemonic"""
+
+    def __init__(self, mnemonic, passphrase="", base_path=DEFAULT_BASE_PATH):
+        self.seed = seed_from_mnemonic(mnemonic, passphrase)
+        self.base_path = base_path
+        self.cache = {}  # index -> (address, private key)
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def index_for_deal(deal_id):
+        """Deal ids are unix timestamps, which fit a child index until 2038"""
+        return int(deal_id) % MAX_CHILD_INDEX
+
+    def derive(self, index):
+        """Return (checksum address, private key bytes) for a child index"""
+        with self.lock:
+            cached = self.cache.get(index)
+        if cached:
+            return cached
+
+        private_key = key_from_seed(self.seed, f"{self.base_path}/{index}")
+        derived = (Account.from_key(private_key).address, private_key)
+        with self.lock:
+            self.cache[index] = derived
+        return derived
+
+    def address_for_deal(self, deal_id):
+        index = self.index_for_deal(deal_id)
+        return self.derive(index)[0], index
+
+
+class DepositSweeper:
+    """Move USDT from funded deal addresses into the escrow wallet, topping up gas first"""
+
+    def __init__(self, web3, token, deriver, escrow_address, escrow_private_key,
+                 gas_limit=100000, gas_price_wei=None, receipt_timeout=180, multicall=None,
+                 nonce_manager=None, fee_oracle=None):
+        self.web3 = web3
+        self.token = token
+        self.deriver = deriver
+        self.escrow_address = escrow_address
+        self.escrow_private_key = escrow_private_key
+        self.gas_limit = gas_limit
+        self.gas_price_wei = gas_price_wei
+        self.receipt_timeout = receipt_timeout
+        self.multicall = multicall
+        self.fee_oracle = fee_oracle
+        # Share the escrow payout allocator so top-ups and releases never collide
+        self.nonce_manager = nonce_manager or NonceManager(web3, escrow_address)
+        self.lock = threading.Lock()  # One sweep at a time
+
+    def fee_fields(self):
+        """(fee fields for sweep transactions, highest possible price per gas)"""
+        if self.fee_oracle:
+            fees = self.fee_oracle.fees()
+            return fees, fees["maxFeePerGas"]
+        price = self.gas_price_wei or self.web3.eth.gas_price
+        return {"gasPrice": price}, price
+
+    def wait_for_receipts(self, tx_hashes):
+        """Wait for every tx in the batch; returns tx hash -> receipt status (1 success, 0 revert)"""
+        statuses = {}
+        for tx_hash in tx_hashes:
+            try:
+                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=self.receipt_timeout)
+                statuses[tx_hash] = receipt["status"]
+            except Exception as e:
+                print(f"⚠️ No receipt for sweep tx {tx_hash}: {e}")
+                statuses[tx_hash] = None
+        return statuses
+
+    def read_balances(self, addresses):
+        """address -> (token balance, native balance); one Multicall eth_call when available"""
+        if self.multicall:
+            _, balances = self.multicall.balances(self.token.address, addresses)
+            # A failed read counts as empty; the deal is retried on the next sweep
+            return {a: (b["token"] or 0, b["native"] or 0) for a, b in balances.items()}
+        return {
+            address: (self.token.functions.balanceOf(address).call(), self.web3.eth.get_balance(address))
+            for address in addresses
+        }
+
+    def fund_gas(self, shortfalls, fees):
+        """Send MATIC from escrow to every deal address that cannot pay for its own sweep"""
+        if not shortfalls:
+            return {}
+
+        chain_id = self.web3.eth.chain_id
+        funding = {}
+        for address, amount_wei in shortfalls.items():
+            with self.nonce_manager.reserve() as nonce:
+                txn = {
+                    "to": address,
+                    "value": amount_wei,
+                    "gas": 21000,
+                    **fees,
+                    "nonce": nonce,
+                    "chainId": chain_id,
+                }
+                signed = self.web3.eth.account.sign_transaction(txn, self.escrow_private_key)
+                funding[address] = self.web3.to_hex(self.web3.eth.send_raw_transaction(signed.rawTransaction))
+
+        statuses = self.wait_for_receipts(list(funding.values()))
+        return {address: tx for address, tx in funding.items() if statuses.get(tx) == 1}
+
+    def sweep(self, targets):
+        """
+        Sweep a batch of deals. targets is a list of (deal_id, child index).
+        Returns deal_id -> {"tx_hash", "amount", "status"} for every deal that held USDT.
+        """
+        with self.lock:
+            fees, max_gas_price = self.fee_fields()
+            sweep_cost = self.gas_limit * max_gas_price
+
+            derived = [(deal_id, *self.deriver.derive(index)) for deal_id, index in targets]
+            balances = self.read_balances([address for _, address, _ in derived])
+
+            funded = []
+            shortfalls = {}
+            for deal_id, address, private_key in derived:
+                balance, native = balances[address]
+                if balance == 0:
+                    continue
+                funded.append((deal_id, address, private_key, balance))
+
+                if native < sweep_cost:
+                    shortfalls[address] = sweep_cost - native
+
+            if not funded:
+                return {}
+
+            # All gas top-ups go out back to back from escrow, then wait once for the batch
+            fueled = self.fund_gas(shortfalls, fees)
+
+            chain_id = self.web3.eth.chain_id
+            escrow = self.web3.to_checksum_address(self.escrow_address)
+            sent = {}
+            for deal_id, address, private_key, balance in funded:
+                if address in shortfalls and address not in fueled:
+                    print(f"⚠️ Gas top-up failed for deal {deal_id}, sweep postponed")
+                    continue
+
+                txn = self.token.functions.transfer(escrow, balance).build_transaction({
+                    "from": address,
+                    "gas": self.gas_limit,
+                    **fees,
+                    "nonce": self.web3.eth.get_transaction_count(address, "pending"),
+                    "chainId": chain_id,
+                })
+                signed = Account.sign_transaction(txn, private_key)
+                tx_hash = self.web3.to_hex(self.web3.eth.send_raw_transaction(signed.rawTransaction))
+                sent[deal_id] = {"tx_hash": tx_hash, "amount": balance}
+
+            statuses = self.wait_for_receipts([result["tx_hash"] for result in sent.values()])
+            for result in sent.values():
+                result["status"] = statuses.get(result["tx_hash"])
+            return sent
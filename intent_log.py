@@ -0,0 +1,111 @@
+"""
+Payout Intent Log for Escrow Bot
+Write-ahead log of outgoing transfers so a restart only reconciles payouts still in flight
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class IntentLog:
+    """
+    Append-only JSON-lines log of payout intents.
+
+    Each signed payout (and each fee-bumped replacement) is appended and
+    fsynced before it is broadcast, so a crash can never leave a transfer on
+    chain that the bot does not know about. Closed intents are dropped by
+    compaction, which keeps the file - and startup replay - proportional to
+    the payouts still in flight rather than to history.
+    """
+
+    def __init__(self, path, compact_after=100):
+        self.path = path
+        self.compact_after = compact_after
+        self.intents = {}  # payout_id -> open intent
+        self.closed_since_compact = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def _append(self, entry):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def open(self, payout_id, kind, deal_ids, txn, tx_hash, raw_tx):
+        """Record a signed payout before it is broadcast"""
+        intent = {
+            "payout_id": payout_id,
+            "kind": kind,
+            "deal_ids": list(deal_ids),
+            "nonce": txn["nonce"],
+            "txn": dict(txn),
+            "attempts": [{"tx_hash": tx_hash, "raw_tx": raw_tx}],
+            "opened_at": time.time(),
+        }
+        with self.lock:
+            self._append({"op": "open", **intent})
+            self.intents[payout_id] = intent
+
+    def add_attempt(self, payout_id, txn, tx_hash, raw_tx):
+        """Record a replacement (same nonce, higher fee) before it is broadcast"""
+        with self.lock:
+            intent = self.intents.get(payout_id)
+            if not intent:
+                return
+            self._append({"op": "attempt", "payout_id": payout_id, "txn": dict(txn),
+                          "tx_hash": tx_hash, "raw_tx": raw_tx})
+            intent["txn"] = dict(txn)
+            intent["attempts"].append({"tx_hash": tx_hash, "raw_tx": raw_tx})
+
+    def close(self, payout_id, outcome):
+        """The payout is settled (mined, reverted, dropped or rejected by the node)"""
+        with self.lock:
+            if self.intents.pop(payout_id, None) is None:
+                return
+            self._append({"op": "close", "payout_id": payout_id, "outcome": outcome, "at": time.time()})
+            self.closed_since_compact += 1
+            if self.closed_since_compact >= self.compact_after:
+                self._compact()
+
+    def open_intents(self):
+        with self.lock:
+            return {payout_id: json.loads(json.dumps(intent)) for payout_id, intent in self.intents.items()}
+
+    def _apply(self, entry):
+        op = entry.pop("op")
+        payout_id = entry["payout_id"]
+        if op == "open":
+            self.intents[payout_id] = entry
+        elif op == "attempt" and payout_id in self.intents:
+            self.intents[payout_id]["txn"] = entry["txn"]
+            self.intents[payout_id]["attempts"].append({"tx_hash": entry["tx_hash"], "raw_tx": entry["raw_tx"]})
+        elif op == "close":
+            self.intents.pop(payout_id, None)
+
+    def load(self):
+        with self.lock:
+            self.intents = {}
+            try:
+                with open(self.path, "r") as f:
+                    for line in f:
+                        try:
+                            self._apply(json.loads(line))
+                        except (json.JSONDecodeError, KeyError):
+                            continue  # Torn last line from a crash mid-append
+            except FileNotFoundError:
+                pass
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the log with only the open intents"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            for intent in self.intents.values():
+                f.write(json.dumps({"op": "open", **intent}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.closed_since_compact = 0
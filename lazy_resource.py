@@ -0,0 +1,82 @@
+"""
+Lazy Resources for Escrow Bot
+Clients and stores built on first use, so importing main touches no network, files or threads
+"""
+
+import threading
+
+
+class LazyResource:
+    """
+    Stand-in for an object that is slow or side-effectful to build.
+
+    The first attribute access calls factory() and every access after that
+    is forwarded to the built object, so code written against a Web3 client,
+    the bot or a store works unchanged. override() puts a ready-made object
+    in place instead (a fake chain or bot in tests and tools) and reset()
+    drops it so the next use builds again.
+    """
+
+    def __init__(self, factory, name=None):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name or getattr(factory, "__name__", "resource"))
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_built", False)
+        # Reentrant: a factory may use other lazy resources, which take their own lock
+        object.__setattr__(self, "_lock", threading.RLock())
+
+    def __getattr__(self, name):
+        return getattr(resolve(self), name)
+
+    def __setattr__(self, name, value):
+        setattr(resolve(self), name, value)
+
+    def __delattr__(self, name):
+        delattr(resolve(self), name)
+
+    def __len__(self):
+        return len(resolve(self))
+
+    def __contains__(self, item):
+        return item in resolve(self)
+
+    def __iter__(self):
+        return iter(resolve(self))
+
+    def __bool__(self):
+        # Without this, truth tests would go through __len__ and fail on objects without one
+        return bool(resolve(self))
+
+    def __repr__(self):
+        state = repr(self._target) if self._built else "not built"
+        return f"<LazyResource {self._name}: {state}>"
+
+
+def resolve(resource):
+    """The built object behind resource, building it on first use"""
+    if not isinstance(resource, LazyResource):
+        return resource
+    if not resource._built:
+        with resource._lock:
+            if not resource._built:
+                object.__setattr__(resource, "_target", resource._factory())
+                object.__setattr__(resource, "_built", True)
+    return resource._target
+
+
+def override(resource, target):
+    """Use target instead of building the resource"""
+    with resource._lock:
+        object.__setattr__(resource, "_target", target)
+        object.__setattr__(resource, "_built", True)
+
+
+def reset(resource):
+    """Forget the built or injected object; the next use calls the factory again"""
+    with resource._lock:
+        object.__setattr__(resource, "_target", None)
+        object.__setattr__(resource, "_built", False)
+
+
+def is_built(resource):
+    return resource._built
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Telegram Load Test
+Drives concurrent virtual traders through the real bot handlers over a local fake Bot API
+
+The fake API, the bot and the traders share one process, so figures are a lower bound
+
+Usage: python load_telegram.py [--users 200] [--commands 10] [--workers 4] [--keep-rate-limits]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Fixed throwaway credentials: Telegram and the chain are both local stand-ins
+os.environ.setdefault("BOT_TOKEN", "123456:simulated")
+os.environ.setdefault("PRIVATE_KEY", "0x" + "11" * 32)
+
+from web3 import Web3
+from web3.middleware.geth_poa import geth_poa_middleware
+
+from fake_telegram import FakeBotAPI
+from sim_chain import SimulatedChain
+
+# What a trader sends while browsing; {wallet} is their own address
+COMMAND_MIX = ["/start", "/help", "/fees", "/orders", "/mystatus", "/info", "/mywallet {wallet}", "/cancel"]
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def trader(api, user_id, commands, reply_timeout, think_seconds, samples, lock):
+    """One virtual user: send a command, wait for the bot's answer, repeat"""
+    rng = random.Random(user_id)
+    wallet = Web3.to_checksum_address(f"0x{user_id:040x}")
+    for _ in range(commands):
+        text = rng.choice(COMMAND_MIX).format(wallet=wallet)
+        sent_at = time.time()
+        message = api.send_command(user_id, f"trader{user_id}", text)
+        reply = api.wait_for_reply(message, timeout=reply_timeout)
+        with lock:
+            samples.append((text.split()[0], reply["at"] - sent_at if reply else None))
+        if think_seconds:
+            time.sleep(rng.uniform(0, 2 * think_seconds))
+
+
+def run(users, commands, workers=4, reply_timeout=30.0, think_ms=0, keep_rate_limits=False):
+    """Run users x commands through main's handlers; returns (samples, seconds, outbound calls)"""
+    os.chdir(tempfile.mkdtemp())  # Stores are written relative to the working directory
+    import main
+    from lazy_resource import reset
+
+    chain = SimulatedChain()
+    client = Web3(chain)
+    client.middleware_onion.inject(geth_poa_middleware, layer=0)
+    main.configure(web3=client)
+    main.BOT_WORKER_THREADS = workers
+    reset(main.bot)  # Rebuilt with the worker count above
+    if not keep_rate_limits:
+        main.RATE_LIMIT_COMMANDS_PER_MINUTE = 10 ** 9
+
+    api = FakeBotAPI().start()
+    previous_url = api.install()
+    poller = threading.Thread(target=main.bot.polling,
+                              kwargs={"non_stop": True, "interval": 0, "long_polling_timeout": 1}, daemon=True)
+    samples = []
+    lock = threading.Lock()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            poller.start()
+            threads = [
+                threading.Thread(target=trader, args=(api, 1000 + index, commands, reply_timeout,
+                                                      think_ms / 1000, samples, lock))
+                for index in range(users)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - started
+            main.bot.stop_polling()
+            poller.join(timeout=5)
+    finally:
+        api.stop()
+        from telebot import apihelper
+        apihelper.API_URL = previous_url
+    return samples, seconds, len(api.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--commands", type=int, default=10, help="commands per user")
+    parser.add_argument("--workers", type=int, default=4, help="bot handler threads")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a user's commands")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for each reply")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="apply the per-user command limit")
+    args = parser.parse_args()
+
+    samples, seconds, outbound = run(args.users, args.commands, args.workers, args.timeout,
+                                     args.think_ms, args.keep_rate_limits)
+    latencies = [latency for _, latency in samples if latency is not None]
+    answered = len(latencies)
+    total = args.users * args.commands
+
+    print(f"📨 TELEGRAM LOAD: {args.users} users x {args.commands} commands, {args.workers} handler threads")
+    print("=" * 60)
+    print(f"{'command':>12} {'count':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for command in sorted({command for command, _ in samples}):
+        values = [latency for name, latency in samples if name == command and latency is not None]
+        print(f"{command:>12} {len(values):7d} {percentile(values, 0.5) * 1000:8.1f} "
+              f"{percentile(values, 0.99) * 1000:8.1f}")
+    print(f"{'all':>12} {answered:7d} {percentile(latencies, 0.5) * 1000:8.1f} "
+          f"{percentile(latencies, 0.99) * 1000:8.1f}")
+    print(f"⚡ {answered / seconds:.0f} commands/s over {seconds:.2f}s, {outbound} outbound Bot API calls")
+    print(f"✅ answered {answered}/{total} commands, {total - answered} timed out")
+    return 0 if answered == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
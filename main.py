@@ -1,8 +1,12 @@
 import os
+import sys
 import json
 import time
+import atexit
+import signal
 import threading
 from web3 import Web3
+from web3.exceptions import BlockNotFound
 
 from flask import Flask, request
 
@@ -10,18 +14,41 @@ import telebot
 import hmac
 import hashlib
 
+from deposit_tracker import DepositTracker, DEPOSIT_SEEN, DEPOSIT_CONFIRMED, DEPOSIT_FINAL, DEPOSIT_REORGED
+from mempool_watcher import MempoolWatcher
+from dedup_store import DedupStore
+from watch_set import WatchSet, TRANSFER_TOPIC, address_to_topic, decode_transfer_log
+from hd_deposits import DepositAddressDeriver, DepositSweeper
+from rpc_failover import FailoverProvider
+from rpc_batch import RPCBatch
+from multicall import Multicall
+from chain_head import ChainHeadTracker
+from balance_cache import BalanceCache
+from nonce_manager import NonceManager, send_was_rejected
+from fee_oracle import FeeOracle, GasEstimator, SPEED_PERCENTILES
+from payout_builder import PayoutBuilder
+from payout_queue import PayoutQueue, JOB_DONE, JOB_FAILED
+from intent_log import IntentLog
+from monitor_checkpoint import MonitorCheckpoint
+from batch_payouts import Disperse, PayoutBatcher
+from lazy_resource import LazyResource, override
+from trace_recorder import TraceRecorder, state_summary
+from payout_tracker import PayoutTracker, PAYOUT_CONFIRMED, PAYOUT_REVERTED, PAYOUT_DROPPED, PAYOUT_REPLACED, PAYOUT_STUCK
+
 # === BOT & WALLET CONFIG ===
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-if not BOT_TOKEN:
-    raise ValueError("BOT_TOKEN environment variable is required")
+BOT_TOKEN = os.getenv("BOT_TOKEN")  # Required; checked when the bot is built, not at import
 
 ADMIN_USERNAMES = [ "Threethirty330", "t1start1"]  # Fixed: Removed @ symbol for consistency
 GROUP_ID = -4986666475
 
 ESCROW_WALLET = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
-PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-if not PRIVATE_KEY:
-    raise ValueError("PRIVATE_KEY environment variable is required")
+PRIVATE_KEY = os.getenv("PRIVATE_KEY")  # Required; checked when the payout signer is built
+
+def require_config(name, value):
+    """Fail clearly when a required setting is missing; called when it is first needed"""
+    if not value:
+        raise ValueError(f"{name} environment variable is required")
+    return value
 
 # Transaction limits for security
 MIN_TRANSACTION_AMOUNT = 0.05  # Minimum 5 USDT
@@ -54,23 +81,99 @@ DUPLICATE_ORDER_PREVENTION = True    # Prevent duplicate orders from same user
 # Payment processing security
 PAYMENT_CLAIM_TIMEOUT = 30           # Seconds to claim a payment before others can
 PAYMENT_VERIFICATION_STRICT = True   # Strict payment sender verification
+DEDUP_MAX_ENTRIES = 10000            # Processed deposits remembered across restarts
+DEDUP_TTL_SECONDS = 7 * 24 * 3600    # Forget processed deposits after 7 days
+
+# Deposit confirmation tracking
+DEPOSIT_CONFIRMATIONS = 12           # Blocks before a deposit counts as confirmed
+DEPOSIT_FINALITY_BLOCKS = 64         # Blocks before escrowed USDT may be released
+PAYMENT_MONITOR_INTERVAL = 5         # Seconds between payment monitor ticks
+PAYMENT_MONITOR_MAX_BLOCKS = 500     # Max blocks of transfer logs fetched per tick
+MONITOR_CHECKPOINT_FILE = "monitor_state.json"  # Last processed block, survives restarts
+MONITOR_CHECKPOINT_INTERVAL = 30     # Seconds between monitor checkpoints
+MONITOR_MAX_CATCHUP_BLOCKS = 43200   # ~1 day of Polygon blocks rescanned after downtime
+MONITOR_CATCHUP_CHUNKS_PER_TICK = 10 # getLogs range queries per tick while catching up
 
 # === PAYMENT FORWARDING CONFIG ===
 PAYMENT_FORWARDING_ENABLED = True    # Enable automatic payment forwarding
 CRYPTO_APIS_KEY = os.getenv("CRYPTO_APIS_KEY")  # Optional: for payment forwarding
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "default_webhook_secret_change_me")
 
+# === HD DEPOSIT ADDRESS CONFIG ===
+DEPOSIT_SEED_MNEMONIC = os.getenv("DEPOSIT_SEED_MNEMONIC")  # Optional: local seed for per-deal deposit addresses
+HD_DEPOSIT_ADDRESSES_ENABLED = bool(DEPOSIT_SEED_MNEMONIC)    # Replaces third-party payment forwarding when set
+SWEEP_INTERVAL_SECONDS = 60          # How often funded deal addresses are swept into escrow
+SWEEP_BATCH_SIZE = 20                # Max deal addresses swept per batch
+SWEEP_GAS_LIMIT = 100000             # Gas limit for each sweep transfer
+HD_EXPIRED_SWEEP_DAYS = 7            # Expired deals keep their deposit address swept this long
+
+# === BATCHED PAYOUT CONFIG ===
+BATCH_PAYOUTS_ENABLED = False       # One Disperse tx for releases due together
+PAYOUT_BATCH_WINDOW = 30             # Seconds a release waits for others to share its transaction
+PAYOUT_BATCH_MAX = 50                # Max recipients per batched payout
+DISPERSE_APPROVAL_USDT = 1000        # Allowance granted to Disperse at a time, topped up when a batch needs more
+
+# === MEMPOOL WATCH CONFIG ===
+MEMPOOL_WATCH_ENABLED = False        # Pre-notify deposits from the mempool (RPC must support pending filters)
+MEMPOOL_POLL_INTERVAL = 1            # Seconds between pending transaction polls
+
+# === TRAFFIC TRACE CONFIG ===
+TRACE_FILE = os.getenv("TRACE_FILE")  # Optional: record scrubbed commands and deposits here for replay_trace.py
+TRACE_SALT = os.getenv("TRACE_SALT")  # Optional: keeps trace pseudonyms stable across restarts
+
 # === POLYGON CONFIG ===
 RPC_URL = "https://polygon-rpc.com"
+# Comma-separated endpoints; reads are hedged across them and writes stick to one
+RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", RPC_URL).split(",") if url.strip()]
 USDT_CONTRACT = "0xc2132d05d31c914a87c6611c10748aeb04b58e8f"
 USDT_DECIMALS = 6
+CHAIN_ID = 137  # Polygon PoS mainnet
+
+# === GAS & FEE CONFIG ===
+FEE_SPEED = "standard"               # Payout inclusion target: slow / standard / fast
+FEE_HISTORY_BLOCKS = 20              # Blocks of eth_feeHistory sampled per refresh
+MIN_PRIORITY_FEE_GWEI = 30           # Polygon validators ignore lower tips
+MAX_FEE_GWEI = 1000                  # Hard cap on maxFeePerGas
+DEFAULT_TRANSFER_GAS = 100000        # Gas limit used when estimation fails
+PAYOUT_BUMP_AFTER_BLOCKS = 10        # Rebroadcast an unmined payout with a higher fee after this many blocks
+PAYOUT_BUMP_PERCENT = 15             # Fee increase per rebroadcast (nodes require at least 10%)
+PAYOUT_MAX_BUMPS = 5                 # Alert admins once a payout is still stuck after this many bumps
+
+# === RPC TRANSPORT CONFIG ===
+BOT_WORKER_THREADS = 4               # Telegram handler threads
+RPC_POOL_SIZE = BOT_WORKER_THREADS + 4  # Workers + monitor, Flask, sweeper and mempool threads
+RPC_CONNECT_TIMEOUT = 5              # Seconds to open a connection to the RPC node
+RPC_READ_TIMEOUT = 20                # Seconds to wait for an RPC response
+RPC_POOL_TIMEOUT = 10                # Seconds to wait for a free pooled connection
+RPC_MAX_RETRIES = 3                  # Retries for read-only calls (never for sends)
+RPC_HEDGE_PERCENTILE = 0.9           # Hedge a read once it is slower than this latency percentile
+RPC_HEDGE_MIN_DELAY = 0.2            # Never hedge sooner than this (seconds)
+RPC_CIRCUIT_FAILURES = 5             # Consecutive failures before an endpoint is taken out
+RPC_CIRCUIT_RESET = 30               # Seconds before a failed endpoint gets a trial request
+BALANCE_CACHE_TTL = 10               # Seconds read-only commands and /health may reuse a balance
 
 # === WEB3 SETUP ===
+# Clients below are LazyResources: built on first use, replaceable with fakes via configure()
 from web3.middleware.geth_poa import geth_poa_middleware
-web3 = Web3(Web3.HTTPProvider(RPC_URL))
-web3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
-print("Connected to Web3:", web3.is_connected())
+def build_web3():
+    rpc_provider = FailoverProvider(
+        RPC_URLS,
+        pool_size=RPC_POOL_SIZE,
+        connect_timeout=RPC_CONNECT_TIMEOUT,
+        read_timeout=RPC_READ_TIMEOUT,
+        pool_timeout=RPC_POOL_TIMEOUT,
+        max_retries=RPC_MAX_RETRIES,
+        hedge_percentile=RPC_HEDGE_PERCENTILE,
+        hedge_min_delay=RPC_HEDGE_MIN_DELAY,
+        failure_threshold=RPC_CIRCUIT_FAILURES,
+        reset_timeout=RPC_CIRCUIT_RESET
+    )
+    client = Web3(rpc_provider)
+    client.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return client
+
+web3 = LazyResource(build_web3, "web3")
 
 # === USDT CONTRACT ABI ===
 abi = json.loads("""
@@ -138,11 +241,42 @@ abi = json.loads("""
 ]
 """)
 
-usdt = web3.eth.contract(
-    address=Web3.to_checksum_address(USDT_CONTRACT),
-    abi=abi
+def build_usdt():
+    contract = web3.eth.contract(
+        address=Web3.to_checksum_address(USDT_CONTRACT),
+        abi=abi
+    )
+    print(f"✅ USDT Contract initialized at: {contract.address}")
+    return contract
+
+usdt = LazyResource(build_usdt, "usdt")
+
+multicall = LazyResource(lambda: Multicall(web3), "multicall")  # Many balance reads in one eth_call
+chain_head = ChainHeadTracker(web3)  # Shared latest block; read snapshots pin to it
+balance_cache = BalanceCache(BALANCE_CACHE_TTL)  # Escrow balances by (address, token, block)
+escrow_nonces = LazyResource(lambda: NonceManager(web3, ESCROW_WALLET), "escrow_nonces")  # Local nonces for escrow payouts
+fee_oracle = FeeOracle(
+    web3,
+    get_head=chain_head.head,
+    block_count=FEE_HISTORY_BLOCKS,
+    min_priority_wei=Web3.to_wei(MIN_PRIORITY_FEE_GWEI, 'gwei'),
+    max_fee_wei=Web3.to_wei(MAX_FEE_GWEI, 'gwei')
+)
+gas_estimator = GasEstimator(web3)  # Gas limits cached per call shape
+payout_builder = LazyResource(  # Local encode + sign
+    lambda: PayoutBuilder(require_config("PRIVATE_KEY", PRIVATE_KEY), usdt.address, CHAIN_ID, DEFAULT_TRANSFER_GAS),
+    "payout_builder"
+)
+payout_tracker = PayoutTracker(  # Receipts of outgoing payouts, fee bumps for stuck ones
+    web3,
+    send_txn=lambda txn, payout_id: send_payout_replacement(txn, payout_id),
+    fee_oracle=fee_oracle,
+    bump_after_blocks=PAYOUT_BUMP_AFTER_BLOCKS,
+    bump_percent=PAYOUT_BUMP_PERCENT,
+    max_bumps=PAYOUT_MAX_BUMPS
 )
-print(f"✅ USDT Contract initialized at: {usdt.address}")
+disperse = LazyResource(lambda: Disperse(web3, usdt.address), "disperse")  # Multi-recipient USDT payouts
+payout_batcher = PayoutBatcher(PAYOUT_BATCH_WINDOW, PAYOUT_BATCH_MAX)  # Releases waiting to share a transaction
 
 # === SECURITY INFRASTRUCTURE ===
 # Global locks and tracking
@@ -152,6 +286,13 @@ order_rate_tracker = {}                      # Track order creation per user
 payment_claims = {}                          # Track payment claims to prevent race conditions
 active_command_users = set()                 # Track users with active commands
 
+def write_json_file(path, data):
+    """Replace path with data in one step, so concurrent handlers never read a half-written file"""
+    temp_path = f"{path}.{threading.get_ident()}.tmp"  # One per thread: handlers save concurrently
+    with open(temp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_path, path)
+
 def load_security_data():
     """Load or create security tracking data"""
     try:
@@ -168,8 +309,7 @@ def load_security_data():
 def save_security_data(data):
     """Save security tracking data"""
     try:
-        with open('security_data.json', 'w') as f:
-            json.dump(data, f, indent=2)
+        write_json_file('security_data.json', data)
     except Exception as e:
         print(f"❌ Failed to save security data: {e}")
 
@@ -285,38 +425,49 @@ def secure_payment_claim(deal_id, expected_amount):
         return True, "Payment claimed successfully"
 
 # === ESCROW DB ===
+# JSON stores are read on first use; missing files count as empty and are created on first save
 DB_FILE = "escrows.json"
-if not os.path.exists(DB_FILE):
-    with open(DB_FILE, "w") as f:
-        json.dump({}, f)
+
+# Processed on-chain deposits, keyed by (tx hash, log index) and flushed with the escrow DB
+PROCESSED_DEPOSITS_FILE = "processed_deposits.json"
+processed_deposits = LazyResource(
+    lambda: DedupStore(PROCESSED_DEPOSITS_FILE, DEDUP_MAX_ENTRIES, DEDUP_TTL_SECONDS), "processed_deposits"
+)
+
+# Payout jobs, written on every state change so restarts resume them without paying twice
+PAYOUT_QUEUE_FILE = "payout_jobs.json"
+payout_queue = LazyResource(lambda: PayoutQueue(PAYOUT_QUEUE_FILE), "payout_queue")
+
+# Signed payouts, fsynced before broadcast; only open intents are replayed on startup
+PAYOUT_INTENT_FILE = "payout_intents.jsonl"
+intent_log = LazyResource(lambda: IntentLog(PAYOUT_INTENT_FILE), "intent_log")
 
 def load_db():
-    with open(DB_FILE, "r") as f:
-        return json.load(f)
+    try:
+        with open(DB_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
 
 def save_db(data):
-    with open(DB_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json_file(DB_FILE, data)
+    processed_deposits.flush()
 
 # === BLACKLIST DB ===
 BLACKLIST_FILE = "blacklist.json"
-if not os.path.exists(BLACKLIST_FILE):
-    with open(BLACKLIST_FILE, "w") as f:
-        json.dump([], f)
 
 def load_blacklist():
-    with open(BLACKLIST_FILE, "r") as f:
-        return json.load(f)
+    try:
+        with open(BLACKLIST_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
 
 def save_blacklist(data):
-    with open(BLACKLIST_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json_file(BLACKLIST_FILE, data)
 
 # === ORDERS DB ===
 ORDERS_FILE = "orders.json"
-if not os.path.exists(ORDERS_FILE):
-    with open(ORDERS_FILE, "w") as f:
-        json.dump({"buy_orders": {}, "sell_orders": {}}, f)
 
 def load_orders():
     try:
@@ -335,34 +486,83 @@ def load_orders():
         return default_data
 
 def save_orders(data):
-    with open(ORDERS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json_file(ORDERS_FILE, data)
 
 # === WALLETS DB ===
 WALLETS_FILE = "wallets.json"
-if not os.path.exists(WALLETS_FILE):
-    with open(WALLETS_FILE, "w") as f:
-        json.dump({}, f)
 
 def load_wallets():
-    with open(WALLETS_FILE, "r") as f:
-        return json.load(f)
+    try:
+        with open(WALLETS_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
 
 def save_wallets(data):
-    with open(WALLETS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    write_json_file(WALLETS_FILE, data)
+
+# === TRAFFIC TRACE ===
+trace_recorder = LazyResource(lambda: TraceRecorder(TRACE_FILE, TRACE_SALT, ESCROW_WALLET, GROUP_ID, ADMIN_USERNAMES), "trace_recorder")
+
+def record_trace_messages(messages):
+    """Update listener: runs on the polling thread before handlers are dispatched"""
+    for message in messages:
+        trace_recorder.record_message(message)
+
+def close_trace():
+    """End the trace with a summary of the stores, so a replay can be checked against it"""
+    trace_recorder.close(state_summary(load_db(), load_orders(), load_wallets()))
 
 # === TELEGRAM BOT SETUP ===
-bot = telebot.TeleBot(BOT_TOKEN)
+# TeleBot starts its worker threads when constructed, so handlers are collected here
+# and registered when the bot is first used
+bot_handlers = []
+
+def bot_handler(**filters):
+    """Register a message handler on the bot once it is built"""
+    def decorator(handler):
+        bot_handlers.append((handler, filters))
+        return handler
+    return decorator
+
+def build_bot():
+    telegram_bot = telebot.TeleBot(require_config("BOT_TOKEN", BOT_TOKEN), num_threads=BOT_WORKER_THREADS)
+    for handler, filters in bot_handlers:
+        telegram_bot.register_message_handler(handler, **filters)
+    if TRACE_FILE:
+        telegram_bot.set_update_listener(record_trace_messages)
+    return telegram_bot
+
+bot = LazyResource(build_bot, "bot")
 
 def is_admin(username):
     return username in ADMIN_USERNAMES
 
-def get_usdt_balance(verbose=False):
+def read_escrow_balance(token, snapshot=None, fresh=False):
+    """Raw escrow balance of token (None for MATIC)
+    
+    Read-only callers get the newest cached value within BALANCE_CACHE_TTL.
+    fresh=True (release decisions) only accepts a value cached at the current head.
+    """
+    token_address = token.address if token else None
+    if not fresh and snapshot is None:
+        cached = balance_cache.recent(ESCROW_WALLET, token_address)
+        if cached is not None:
+            return cached
+    
+    snapshot = snapshot or chain_head.snapshot()
+    balance = balance_cache.get(ESCROW_WALLET, token_address, snapshot.block_number)
+    if balance is None:
+        if token:
+            balance = snapshot.token_balance(token, ESCROW_WALLET)
+        else:
+            balance = snapshot.native_balance(ESCROW_WALLET)
+        balance_cache.put(ESCROW_WALLET, token_address, snapshot.block_number, balance)
+    return balance
+
+def get_usdt_balance(verbose=False, snapshot=None, fresh=False):
     try:
-        checksum_address = Web3.to_checksum_address(ESCROW_WALLET)
-        web3.eth.get_block('latest')  # Sync
-        balance = usdt.functions.balanceOf(checksum_address).call()
+        balance = read_escrow_balance(usdt, snapshot, fresh)
         if verbose:
             print(f"✅ Fetched raw USDT balance: {balance} (scaled: {balance / (10 ** USDT_DECIMALS)} USDT)")
         return balance / (10 ** USDT_DECIMALS)
@@ -370,11 +570,10 @@ def get_usdt_balance(verbose=False):
         print(f"⚠️ Error fetching balance: {e}")
         return 0
 
-def get_matic_balance():
+def get_matic_balance(snapshot=None, fresh=False):
     """Get MATIC balance for gas fees"""
     try:
-        checksum_address = Web3.to_checksum_address(ESCROW_WALLET)
-        balance = web3.eth.get_balance(checksum_address)
+        balance = read_escrow_balance(None, snapshot, fresh)
         matic_balance = web3.from_wei(balance, 'ether')
         print(f"✅ MATIC balance: {matic_balance} MATIC")
         return float(matic_balance)
@@ -382,6 +581,101 @@ def get_matic_balance():
         print(f"⚠️ Error fetching MATIC balance: {e}")
         return 0
 
+def get_escrow_balances():
+    """Get (USDT, MATIC) balances of the escrow wallet in one RPC round trip"""
+    try:
+        raw_usdt = balance_cache.recent(ESCROW_WALLET, usdt.address)
+        raw_matic = balance_cache.recent(ESCROW_WALLET, None)
+        if raw_usdt is None or raw_matic is None:
+            checksum_address = Web3.to_checksum_address(ESCROW_WALLET)
+            block_number, balances = multicall.balances(usdt.address, [checksum_address])
+            raw_usdt = balances[checksum_address]["token"]
+            raw_matic = balances[checksum_address]["native"]
+            if block_number is not None:
+                chain_head.update(block_number)
+                balance_cache.put(ESCROW_WALLET, usdt.address, block_number, raw_usdt)
+                balance_cache.put(ESCROW_WALLET, None, block_number, raw_matic)
+        usdt_balance = raw_usdt / (10 ** USDT_DECIMALS)
+        matic_balance = float(web3.from_wei(raw_matic, 'ether'))
+        print(f"✅ Escrow balances: {usdt_balance} USDT, {matic_balance} MATIC")
+        return usdt_balance, matic_balance
+    except Exception as e:
+        print(f"⚠️ Error fetching escrow balances: {e}")
+        return 0, 0
+
+def send_escrow_transaction(signed_txn):
+    """Broadcast a signed transaction from the escrow wallet and drop its cached balances"""
+    tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+    balance_cache.invalidate(ESCROW_WALLET)
+    return tx_hash
+
+def sign_and_send_escrow(txn):
+    """Sign a transaction dict with the escrow key and broadcast it, returning the hash as hex"""
+    return web3.to_hex(send_escrow_transaction(payout_builder.sign(txn)))
+
+def broadcast_logged_payout(txn, payout_id, kind, deal_ids=None):
+    """
+    Sign a payout, write its intent ahead of the broadcast, then send it.
+    Only a clear rejection by the node raises. After a timeout or dropped connection
+    the payout may already be in the mempool, so it counts as sent: its nonce stays
+    used and the tracker (or reconcile_payout_intents) settles or rebroadcasts it.
+    """
+    signed_txn = payout_builder.sign(txn)
+    intent_log.open(payout_id, kind, deal_ids or [payout_id], txn,
+                    web3.to_hex(signed_txn.hash), web3.to_hex(signed_txn.rawTransaction))
+    try:
+        send_escrow_transaction(signed_txn)
+    except Exception as e:
+        if not send_was_rejected(e):
+            print(f"⚠️ Payout {payout_id} broadcast outcome unknown ({e}), tracking {web3.to_hex(signed_txn.hash)}")
+        elif "already known" not in str(e).lower():
+            # The node answered with an error, so the transaction is not in its pool
+            intent_log.close(payout_id, f"rejected: {e}")
+            raise
+    return signed_txn.hash
+
+def send_payout_replacement(txn, payout_id):
+    """Fee-bumped rebroadcast of a tracked payout, logged before it is sent"""
+    signed_txn = payout_builder.sign(txn)
+    intent_log.add_attempt(payout_id, txn, web3.to_hex(signed_txn.hash), web3.to_hex(signed_txn.rawTransaction))
+    return web3.to_hex(send_escrow_transaction(signed_txn))
+
+def send_escrow_transfer(recipient, amount_wei, deal_id=None, kind=None):
+    """
+    Sign and broadcast a USDT transfer from escrow with a locally allocated nonce.
+    Nonce, fees and gas come from local caches, so only the broadcast touches the node.
+    With a deal_id the payout is written to the intent log before broadcast and
+    followed by payout_tracker until it is mined.
+    """
+    with escrow_nonces.reserve() as nonce:
+        txn = payout_builder.build(recipient, amount_wei, nonce, fee_oracle.cached_fees(FEE_SPEED))
+        txn['gas'] = gas_estimator.estimate(txn, default=DEFAULT_TRANSFER_GAS)
+        if deal_id is None:
+            tx_hash = send_escrow_transaction(payout_builder.sign(txn))
+        else:
+            tx_hash = broadcast_logged_payout(txn, deal_id, kind)
+    
+    if deal_id is not None:
+        payout_tracker.track(deal_id, txn, web3.to_hex(tx_hash), chain_head.head(), kind)
+    return tx_hash
+
+def fill_escrow_nonce_gaps():
+    """Send 0 MATIC self-transfers into nonces left unused by failed payouts"""
+    def send_noop(nonce):
+        txn = {
+            'to': Web3.to_checksum_address(ESCROW_WALLET),
+            'value': 0,
+            'gas': 21000,
+            'nonce': nonce,
+            'chainId': CHAIN_ID,
+            **fee_oracle.fees(FEE_SPEED)
+        }
+        send_escrow_transaction(payout_builder.sign(txn))
+    
+    filled = escrow_nonces.fill_gaps(send_noop)
+    if filled:
+        print(f"🔢 Filled {filled} escrow nonce gap(s)")
+
 def calculate_transaction_fee(amount):
     """Calculate transaction fee based on amount and fee structure"""
     if not FEE_COLLECTION_ENABLED:
@@ -398,7 +692,7 @@ def calculate_transaction_fee(amount):
     # If amount is above maximum tier, use highest tier fee
     return FEE_STRUCTURE[-1]["fee"]
 
-def verify_payment_sender(expected_amount, expected_sender_wallet, time_window=300):
+def verify_payment_sender(expected_amount, expected_sender_wallet, time_window=300, snapshot=None):
     """CRITICAL SECURITY: Real blockchain verification to prevent fraud"""
     print(f"🔍 Verifying payment: {expected_amount} USDT from {expected_sender_wallet}")
     
@@ -407,29 +701,26 @@ def verify_payment_sender(expected_amount, expected_sender_wallet, time_window=3
         return False, None
     
     try:
-        # Get recent USDT Transfer events to our escrow wallet
-        current_block = web3.eth.get_block('latest')['number']
-        from_block = current_block - 100  # Check last 100 blocks (~5 minutes on Polygon)
+        # Get recent USDT Transfer events to our escrow wallet, pinned to one block
+        snapshot = snapshot or chain_head.snapshot()
+        from_block = snapshot.block_number - 100  # Check last 100 blocks (~5 minutes on Polygon)
         
-        # Query USDT Transfer events to escrow wallet
-        usdt_contract = web3.eth.contract(address=web3.to_checksum_address(USDT_CONTRACT), abi=abi)
-        transfer_filter = usdt_contract.events.Transfer.create_filter(
-            fromBlock=from_block,
-            toBlock='latest',
-            argument_filters={'to': ESCROW_WALLET}
+        logs = snapshot.get_logs(
+            usdt.address,
+            [TRANSFER_TOPIC, None, address_to_topic(ESCROW_WALLET)],
+            from_block
         )
-        
-        transfers = transfer_filter.get_all_entries()
+        transfers = [decode_transfer_log(log) for log in logs]
         print(f"🔍 Found {len(transfers)} recent transfer(s) to escrow wallet")
         
         # Look for matching transfer from expected sender with expected amount
         expected_amount_wei = int(expected_amount * (10 ** USDT_DECIMALS))
         
         for transfer in transfers:
-            sender = transfer['args']['from']
-            amount_wei = transfer['args']['value']
+            sender = transfer['from']
+            amount_wei = transfer['value']
             amount_usdt = amount_wei / (10 ** USDT_DECIMALS)
-            tx_hash = transfer['transactionHash'].hex()
+            tx_hash = transfer['tx_hash']
             
             print(f"📋 Transfer found: {amount_usdt} USDT from {sender}")
             
@@ -445,7 +736,9 @@ def verify_payment_sender(expected_amount, expected_sender_wallet, time_window=3
                     'to': ESCROW_WALLET,
                     'amount': amount_usdt,
                     'timestamp': time.time(),
-                    'block_number': transfer['blockNumber'],
+                    'block_number': transfer['block_number'],
+                    'block_hash': transfer['block_hash'],
+                    'log_index': transfer['log_index'],
                     'verified': True,
                     'verification_method': 'blockchain_verification'
                 }
@@ -486,14 +779,20 @@ def validate_transaction_amount(amount):
         return False, "Invalid amount format"
 
 def check_deal_expiry():
-    """Check and delete expired deals immediately"""
+    """
+    Check and delete expired deals immediately. Deals with their own HD deposit address
+    are kept as "expired" for HD_EXPIRED_SWEEP_DAYS instead, so a late deposit is still swept.
+    """
     db = load_db()
     current_time = time.time()
     expired_deals = []
     
     for deal_id, deal in db.items():
         deal_age = current_time - int(deal_id)
-        if deal_age > (DEAL_EXPIRY_MINUTES * 60) and deal["status"] not in ["completed", "cancelled_wrong_amount", "emergency_refunded"]:
+        if deal["status"] == "expired":
+            if current_time - deal.get("expired_at", current_time) > HD_EXPIRED_SWEEP_DAYS * 86400:
+                expired_deals.append(deal_id)
+        elif deal_age > (DEAL_EXPIRY_MINUTES * 60) and deal["status"] not in ["completed", "cancelled_wrong_amount", "emergency_refunded", "payout_pending", "payout_failed"]:
             # Check if deal is not already marked as expired to prevent spam
             if not deal.get("expiry_notified", False):
                 expired_deals.append(deal_id)
@@ -501,6 +800,12 @@ def check_deal_expiry():
     # Delete expired deals immediately (only notify once)
     for deal_id in expired_deals:
         deal_info = db[deal_id]  # Store deal info before deletion
+        if deal_info["status"] == "expired":
+            del db[deal_id]  # Already announced; its address was watched by the sweeper long enough
+            save_db(db)
+            continue
+        
+        keep_for_sweep = bool(deal_info.get("deposit_address")) and not deal_info.get("deposit_swept_tx")
         
         # Notify about expired and deleted deal (only once)
         bot.send_message(
@@ -510,17 +815,24 @@ def check_deal_expiry():
                  f"📅 Expired after {DEAL_EXPIRY_MINUTES} minutes\n"
                  f"👥 Participants: {deal_info['buyer']} ↔️ {deal_info['seller']}\n"
                  f"💰 Amount: {deal_info['amount']} USDT\n\n"
-                 f"🗑️ Deal has been automatically deleted from the system",
+                 + (f"🧹 Late deposits to its address are still swept into escrow for {HD_EXPIRED_SWEEP_DAYS} days"
+                    if keep_for_sweep else
+                    f"🗑️ Deal has been automatically deleted from the system"),
             parse_mode='HTML'
         )
         
-        del db[deal_id]  # Delete the deal immediately after notification
+        if keep_for_sweep:
+            deal_info["status"] = "expired"
+            deal_info["expired_at"] = current_time
+            deal_info["expiry_notified"] = True
+        else:
+            del db[deal_id]  # Delete the deal immediately after notification
         save_db(db)
+        unwatch_deal(deal_id)
 
 def check_wallet_balances():
     """Check both USDT and MATIC balances and notify if low"""
-    usdt_balance = get_usdt_balance()
-    matic_balance = get_matic_balance()
+    usdt_balance, matic_balance = get_escrow_balances()
     
     # Check if MATIC balance is too low for transactions (less than 0.01 MATIC)
     if matic_balance < 0.01:
@@ -545,7 +857,7 @@ def check_wallet_balances():
     return True
 
 # === BOT COMMAND HANDLERS ===
-@bot.message_handler(commands=['start'])
+@bot_handler(commands=['start'])
 def start(message):
     # Check if there's an active deal
     db = load_db()
@@ -597,7 +909,7 @@ def start(message):
     )
     bot.reply_to(message, welcome_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['mywallet'])
+@bot_handler(commands=['mywallet'])
 def set_wallet(message):
     args = message.text.split()[1:]
     if len(args) != 1:
@@ -639,7 +951,7 @@ def set_wallet(message):
         parse_mode='HTML'
     )
 
-@bot.message_handler(commands=['buy'])
+@bot_handler(commands=['buy'])
 def buy_order(message):
     print(f"🔍 Buy command received from chat_id: {message.chat.id}, expected: {GROUP_ID}")
     print(f"📱 User: {message.from_user.username}, Message: {message.text}")
@@ -765,7 +1077,7 @@ def buy_order(message):
             seller_wallet = wallets.get(sell_order["seller"], "Not set")
             
             # Create automatic deal
-            create_deal(f"@{username}", sell_order["seller"], amount, wallets[f"@{username}"], order_id, seller_wallet)
+            payment_address = create_deal(f"@{username}", sell_order["seller"], amount, wallets[f"@{username}"], order_id, seller_wallet)
             
             # Remove the matched sell order
             del orders["sell_orders"][sell_id]
@@ -797,8 +1109,8 @@ def buy_order(message):
                      f"💵 Amount: {amount} USDT\n"
                      f"🆔 Deal ID: <code>{order_id}</code>\n\n"
                      f"📋 <b>STEP 1 - Send USDT to Escrow:</b>\n"
-                     f"🏦 <b>Escrow Wallet Address:</b>\n"
-                     f"<code>{ESCROW_WALLET}</code>\n\n"
+                     f"🏦 <b>Deposit Address:</b>\n"
+                     f"<code>{payment_address}</code>\n\n"
                      f"⚠️ <b>Important:</b> Send exactly {amount} USDT\n"
                      f"🔗 Network: Polygon (MATIC)\n"
                      f"💎 Token: USDT\n\n"
@@ -845,7 +1157,7 @@ def buy_order(message):
         parse_mode='HTML'
     )
 
-@bot.message_handler(commands=['sell'])
+@bot_handler(commands=['sell'])
 def sell_order(message):
     print(f"🔍 Sell command received from chat_id: {message.chat.id}, expected: {GROUP_ID}")
     print(f"📱 User: {message.from_user.username}, Message: {message.text}")
@@ -962,7 +1274,7 @@ def sell_order(message):
             seller_wallet = wallets.get(f"@{username}", "Not set")
             
             # Create automatic deal
-            create_deal(buy_order["buyer"], f"@{username}", amount, buy_order["wallet"], order_id, seller_wallet)
+            payment_address = create_deal(buy_order["buyer"], f"@{username}", amount, buy_order["wallet"], order_id, seller_wallet)
             
             # Remove the matched buy order
             del orders["buy_orders"][buy_id]
@@ -977,8 +1289,8 @@ def sell_order(message):
                 f"💵 Amount: {amount} USDT\n"
                 f"🆔 Deal ID: <code>{order_id}</code>\n\n"
                 f"📋 <b>STEP 1 - Send USDT to Escrow:</b>\n"
-                f"🏦 <b>Escrow Wallet Address:</b>\n"
-                f"<code>{ESCROW_WALLET}</code>\n\n"
+                f"🏦 <b>Deposit Address:</b>\n"
+                f"<code>{payment_address}</code>\n\n"
                 f"⚠️ <b>Important:</b> Send exactly {amount} USDT\n"
                 f"🔗 Network: Polygon (MATIC)\n"
                 f"💎 Token: USDT\n\n"
@@ -1049,9 +1361,13 @@ def create_deal(buyer, seller, amount, buyer_wallet, deal_id, seller_wallet=None
         wallets = load_wallets()
         seller_wallet = wallets.get(seller, "Not set")
     
-    # Try to create forwarding address for easier payments
+    # Per-deal deposit address: derived locally, or via the forwarding service as a fallback
+    deposit_address = None
+    deposit_index = None
     forwarding_result = None
-    if PAYMENT_FORWARDING_ENABLED and CRYPTO_APIS_KEY:
+    if HD_DEPOSIT_ADDRESSES_ENABLED:
+        deposit_address, deposit_index = deposit_deriver.address_for_deal(deal_id)
+    elif PAYMENT_FORWARDING_ENABLED and CRYPTO_APIS_KEY:
         forwarding_result = create_forwarding_address(deal_id, seller, amount)
     
     db[deal_id] = {
@@ -1065,14 +1381,24 @@ def create_deal(buyer, seller, amount, buyer_wallet, deal_id, seller_wallet=None
         "seller_confirmed": False,
         "created": time.time(),
         "forwarding_address": forwarding_result.get("address") if forwarding_result and forwarding_result.get("success") else None,
-        "forwarding_reference": forwarding_result.get("reference_id") if forwarding_result and forwarding_result.get("success") else None
+        "forwarding_reference": forwarding_result.get("reference_id") if forwarding_result and forwarding_result.get("success") else None,
+        "deposit_address": deposit_address,
+        "deposit_index": deposit_index
     }
     save_db(db)
-    
-    # Choose payment address (forwarding or escrow)
-    payment_address = db[deal_id]["forwarding_address"] or ESCROW_WALLET
-    payment_type = "Direct Payment Address" if db[deal_id]["forwarding_address"] else "Escrow Wallet"
-    forwarding_note = "💫 Payments auto-forward to escrow!" if db[deal_id]["forwarding_address"] else "🔄 Bot will automatically detect your payment"
+    watch_deal_address(deal_id, deal_deposit_address(db[deal_id]))
+    
+    # Choose payment address (deal address, forwarding or escrow)
+    payment_address = deal_deposit_address(db[deal_id]) or ESCROW_WALLET
+    if deposit_address:
+        payment_type = "Deal Deposit Address"
+        forwarding_note = "🔒 This address belongs to your deal only - bot detects your payment instantly"
+    elif db[deal_id]["forwarding_address"]:
+        payment_type = "Direct Payment Address"
+        forwarding_note = "💫 Payments auto-forward to escrow!"
+    else:
+        payment_type = "Escrow Wallet"
+        forwarding_note = "🔄 Bot will automatically detect your payment"
     
     # Send notification to the group with payment address for seller
     bot.send_message(
@@ -1094,8 +1420,13 @@ def create_deal(buyer, seller, amount, buyer_wallet, deal_id, seller_wallet=None
              f"3. ✅ Use /paid and /received to confirm completion",
         parse_mode='HTML'
     )
+    return payment_address
 
-@bot.message_handler(commands=['orders'])
+def deal_deposit_address(deal):
+    """The address a deal's seller pays into, if the deal has its own"""
+    return deal.get("deposit_address") or deal.get("forwarding_address")
+
+@bot_handler(commands=['orders'])
 def view_orders(message):
     orders = load_orders()
     
@@ -1124,7 +1455,7 @@ def view_orders(message):
     orders_msg += "\n💡 Use /buy or /sell to place your order!"
     bot.reply_to(message, orders_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['paid'])
+@bot_handler(commands=['paid'])
 def confirm_paid(message):
     username = message.from_user.username
     if not username:
@@ -1215,7 +1546,7 @@ def confirm_paid(message):
         parse_mode='HTML'
     )
 
-@bot.message_handler(commands=['received'])
+@bot_handler(commands=['received'])
 def confirm_received(message):
     username = message.from_user.username
     if not username:
@@ -1296,47 +1627,37 @@ def confirm_received(message):
     db[deal_id]["seller_confirmed_at"] = time.time()
     save_db(db)
     
+    # Deposit still settling - the bot releases automatically once it is ready
+    blocker = deposit_release_blocker(db[deal_id])
+    if blocker and db[deal_id].get("buyer_confirmed", False):
+        bot.reply_to(message, 
+            f"✅ <b>Receipt Confirmed</b>\n\n"
+            f"🆔 Deal ID: <code>{deal_id}</code>\n"
+            f"💰 You confirmed receiving fiat payment\n"
+            f"⛓️ {blocker}\n\n"
+            f"⏳ USDT will be released to the buyer automatically once the deposit is settled", 
+            parse_mode='HTML'
+        )
+        return
+    
     # CRITICAL: Now check if both parties have confirmed (dual confirmation required)
     if db[deal_id].get("buyer_confirmed", False) and db[deal_id].get("seller_confirmed", False):
-        # Both confirmed - release USDT automatically
-        try:
-            release_usdt_to_buyer(deal_id, user_deal)
+        # Both confirmed - the payout worker releases USDT, this handler only queues it
+        if enqueue_payout(deal_id, "release", message=message):
             bot.reply_to(message, 
-                f"🎉 <b>Deal Completed Successfully!</b>\n\n"
+                f"✅ <b>Receipt Confirmed</b>\n\n"
                 f"🆔 Deal ID: <code>{deal_id}</code>\n"
                 f"💰 You confirmed receiving fiat payment\n"
-                f"✅ USDT automatically released to buyer\n\n"
-                f"🤝 Thank you for trading safely with escrow protection!", 
+                f"📤 USDT release to the buyer is queued\n\n"
+                f"🔔 You'll get a reply as soon as it is sent", 
                 parse_mode='HTML'
             )
-        except Exception as e:
+        else:
             bot.reply_to(message, 
-                f"❌ <b>Auto-release Failed</b>\n\n"
-                f"🆔 <b>Deal ID:</b> <code>{deal_id}</code>\n"
-                f"💵 <b>Amount:</b> {user_deal['amount']} USDT\n"
-                f"🚨 <b>Error:</b> {str(e)}\n\n"
-                f"🛠️ <b>Admin intervention required.</b>\n"
-                f"Contact admins to use /forcerelease {deal_id}", 
+                f"⏳ <b>Release Already In Progress</b>\n\n"
+                f"🆔 Deal ID: <code>{deal_id}</code>", 
                 parse_mode='HTML'
             )
-            
-            # Notify admins
-            admin_msg = (
-                f"🚨 <b>AUTO-RELEASE FAILED</b>\n\n"
-                f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                f"💵 Amount: {user_deal['amount']} USDT\n"
-                f"👥 Buyer: {user_deal['buyer']}\n"
-                f"👥 Seller: {user_deal['seller']}\n"
-                f"🚨 Error: {str(e)}\n\n"
-                f"🛠️ Use /forcerelease {deal_id} to complete manually"
-            )
-            
-            for admin in ADMIN_USERNAMES:
-                try:
-                    bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
-                    break
-                except:
-                    continue
     else:
         # This should not happen due to our checks above, but as a fallback
         bot.reply_to(message, 
@@ -1347,7 +1668,7 @@ def confirm_received(message):
             parse_mode='HTML'
         )
 
-@bot.message_handler(commands=['notreceived'])
+@bot_handler(commands=['notreceived'])
 def payment_not_received(message):
     username = message.from_user.username
     if not username:
@@ -1419,7 +1740,7 @@ def payment_not_received(message):
         except:
             continue
 
-@bot.message_handler(commands=['cancel'])
+@bot_handler(commands=['cancel'])
 def cancel_order(message):
     username = message.from_user.username
     if not username:
@@ -1470,6 +1791,7 @@ def cancel_order(message):
             db[deal_id]["status"] = "cancelled_by_user"
             db[deal_id]["cancelled_by"] = f"@{username}"
             db[deal_id]["cancelled_at"] = time.time()
+            unwatch_deal(deal_id)
             
             # Notify the other party about cancellation
             bot.send_message(
@@ -1503,7 +1825,7 @@ def cancel_order(message):
             parse_mode='HTML'
         )
 
-@bot.message_handler(commands=['directpay'])
+@bot_handler(commands=['directpay'])
 def direct_payment_address(message):
     """Generate a direct payment address for a specific deal"""
     username = message.from_user.username
@@ -1556,7 +1878,11 @@ def direct_payment_address(message):
         return
     
     # Try to create or get existing forwarding address
-    if deal.get("forwarding_address"):
+    if deal.get("deposit_address"):
+        # Locally derived address unique to this deal
+        payment_address = deal["deposit_address"]
+        payment_type = "Deal Deposit Address"
+    elif deal.get("forwarding_address"):
         # Use existing forwarding address
         payment_address = deal["forwarding_address"]
         payment_type = "Existing Direct Payment Address"
@@ -1581,6 +1907,7 @@ def direct_payment_address(message):
             db[deal_id]["forwarding_address"] = payment_address
             db[deal_id]["forwarding_reference"] = forwarding_result["reference_id"]
             save_db(db)
+            watch_deal_address(deal_id, payment_address)
         else:
             error_msg = forwarding_result.get("error", "Unknown error") if forwarding_result else "Failed to create address"
             bot.reply_to(message, 
@@ -1613,8 +1940,13 @@ def direct_payment_address(message):
 def release_usdt_to_buyer(deal_id, deal):
     """Automatically release USDT to buyer when both parties confirm (with fee deduction)"""
     try:
+        # Only release against deposits that are final and sitting in the escrow wallet
+        blocker = deposit_release_blocker(load_db().get(deal_id, deal))
+        if blocker:
+            raise Exception(blocker)
+        
         # Check MATIC balance first
-        matic_balance = get_matic_balance()
+        matic_balance = get_matic_balance(fresh=True)
         if matic_balance < 0.005:  # Need at least 0.005 MATIC for gas
             error_msg = (
                 f"❌ <b>Auto-release failed</b>\n\n"
@@ -1637,62 +1969,49 @@ def release_usdt_to_buyer(deal_id, deal):
         
         # Convert to wei for blockchain transaction
         amount_wei = int(amount_after_fee * (10 ** USDT_DECIMALS))
-        nonce = web3.eth.get_transaction_count(Web3.to_checksum_address(ESCROW_WALLET))
         
         print(f"💰 Transaction Details: Original: {original_amount} USDT, Fee: {transaction_fee} USDT, After Fee: {amount_after_fee} USDT")
         
-        txn = usdt.functions.transfer(
-            Web3.to_checksum_address(deal["buyer_wallet"]),
-            amount_wei
-        ).build_transaction({
-            'from': Web3.to_checksum_address(ESCROW_WALLET),
-            'gas': 100000,
-            'gasPrice': web3.to_wei('30', 'gwei'),
-            'nonce': nonce
-        })
-        
-        signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
+        if BATCH_PAYOUTS_ENABLED:
+            # Sent with other releases due within PAYOUT_BATCH_WINDOW (see flush_payout_batch)
+            db = load_db()
+            db[deal_id]["status"] = "payout_pending"
+            db[deal_id]["payout_queued_at"] = time.time()
+            db[deal_id]["original_amount"] = original_amount
+            db[deal_id]["transaction_fee"] = transaction_fee
+            db[deal_id]["amount_received"] = amount_after_fee
+            save_db(db)
+            payout_batcher.add(deal_id, deal["buyer_wallet"], amount_wei)
+            bot.send_message(
+                chat_id=GROUP_ID,
+                text=f"📤 <b>Payout Queued</b>\n\n"
+                     f"🆔 Deal ID: <code>{deal_id}</code>\n"
+                     f"💵 Amount: {amount_after_fee} USDT to {deal['buyer']}\n\n"
+                     f"⏳ Sending within {PAYOUT_BATCH_WINDOW} seconds...",
+                parse_mode='HTML'
+            )
+            return
         
-        # Update deal status with fee information
-        db = load_db()
-        db[deal_id]["status"] = "completed"
-        db[deal_id]["tx_hash"] = web3.to_hex(tx_hash)
-        db[deal_id]["original_amount"] = original_amount
-        db[deal_id]["transaction_fee"] = transaction_fee
-        db[deal_id]["amount_received"] = amount_after_fee
-        save_db(db)
+        tx_hash = send_escrow_transfer(deal["buyer_wallet"], amount_wei, deal_id=deal_id, kind="release")
         
-        # Create fee breakdown message
-        fee_msg = ""
-        if transaction_fee > 0:
-            fee_msg = (
-                f"💳 <b>Fee Breakdown:</b>\n"
-                f"💵 Original Amount: {original_amount} USDT\n"
-                f"🏦 Service Fee: {transaction_fee} USDT\n"
-                f"✅ Amount Received: {amount_after_fee} USDT\n\n"
-            )
+        # Completed only once the receipt is in (see update_payouts)
+        record_sent_payout(deal_id, web3.to_hex(tx_hash), original_amount=original_amount,
+                           transaction_fee=transaction_fee, amount_received=amount_after_fee)
         
-        # Send completion notification with fee details
         bot.send_message(
             chat_id=GROUP_ID,
-            text=f"🎉 <b>Deal Completed Successfully!</b>\n\n"
+            text=f"📤 <b>Payout Sent</b>\n\n"
                  f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                 f"💼 Buyer: {deal['buyer']}\n"
-                 f"🛒 Seller: {deal['seller']}\n\n"
-                 f"{fee_msg}"
-                 f"✅ USDT sent to buyer's wallet\n"
+                 f"💵 Amount: {amount_after_fee} USDT to {deal['buyer']}\n"
                  f"🔗 TX Hash: <code>{web3.to_hex(tx_hash)}</code>\n\n"
-                 f"🤝 Thank you for using our escrow service!\n\n"
-                 f"🚀 <b>Trading Queue is Now Open!</b>\n"
-                 f"📈 Others can now place /buy or /sell orders",
+                 f"⏳ Waiting for the transaction to be mined...",
             parse_mode='HTML'
         )
         
     except Exception as e:
         raise Exception(f"Failed to release USDT: {str(e)}")
 
-@bot.message_handler(commands=['release'])
+@bot_handler(commands=['release'])
 def admin_release(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 <b>Admin Only Command</b>\n\nThis command is restricted to authorized admins.", parse_mode='HTML')
@@ -1729,24 +2048,19 @@ def admin_release(message):
         )
         return
     
-    try:
-        release_usdt_to_buyer(deal_id, user_deal)
+    if enqueue_payout(deal_id, "release", message=message):
         bot.reply_to(message, 
-            f"✅ <b>Admin Release Successful</b>\n\n"
+            f"📥 <b>Admin Release Queued</b>\n\n"
             f"🆔 Deal ID: <code>{deal_id}</code>\n"
-            f"💼 Released to: {target_user}\n"
+            f"💼 Release to: {target_user}\n"
             f"💵 Amount: {user_deal['amount']} USDT\n"
-            f"🛠️ Executed by admin override", 
-            parse_mode='HTML'
-        )
-    except Exception as e:
-        bot.reply_to(message, 
-            f"❌ <b>Admin Release Failed</b>\n\n"
-            f"Error: {str(e)}", 
+            f"🛠️ Admin override, result follows", 
             parse_mode='HTML'
         )
+    else:
+        bot.reply_to(message, f"⏳ A payout for deal <code>{deal_id}</code> is already in progress.", parse_mode='HTML')
 
-@bot.message_handler(commands=['forcerelease'])
+@bot_handler(commands=['forcerelease'])
 def force_release(message):
     """Force release command for specific deal IDs when auto-release fails"""
     if not is_admin(message.from_user.username):
@@ -1777,48 +2091,30 @@ def force_release(message):
     deal = db[deal_id]
     
     # Check if deal is in a valid state for release
-    if deal["status"] not in ["buyer_paid", "disputed"]:
+    if deal["status"] not in ["buyer_paid", "disputed", "payout_failed"]:
         bot.reply_to(message, 
             f"⚠️ <b>Invalid Deal Status</b>\n\n"
             f"🆔 Deal ID: <code>{deal_id}</code>\n"
             f"📍 Current status: {deal['status']}\n"
-            f"✅ Required status: buyer_paid or disputed", 
-            parse_mode='HTML'
-        )
-        return
-    
-    # Check MATIC balance before attempting
-    matic_balance = get_matic_balance()
-    if matic_balance < 0.005:
-        bot.reply_to(message, 
-            f"❌ <b>Force Release Failed</b>\n\n"
-            f"🚨 <b>Error:</b> Insufficient MATIC for gas fees\n"
-            f"⚠️ <b>Current MATIC:</b> {matic_balance:.6f} MATIC\n"
-            f"🏦 <b>Escrow Wallet:</b>\n<code>{ESCROW_WALLET}</code>\n\n"
-            f"🔧 <b>Action Required:</b> Send MATIC to wallet first", 
+            f"✅ Required status: buyer_paid, disputed or payout_failed", 
             parse_mode='HTML'
         )
         return
     
-    try:
-        release_usdt_to_buyer(deal_id, deal)
+    # MATIC balance and deposit checks run in the payout worker (release_usdt_to_buyer)
+    if enqueue_payout(deal_id, "release", message=message):
         bot.reply_to(message, 
-            f"✅ <b>Force Release Successful</b>\n\n"
+            f"📥 <b>Force Release Queued</b>\n\n"
             f"🆔 Deal ID: <code>{deal_id}</code>\n"
-            f"💼 Released to: {deal['buyer']}\n"
+            f"💼 Release to: {deal['buyer']}\n"
             f"💵 Amount: {deal['amount']} USDT\n"
-            f"🛠️ Executed by admin override", 
-            parse_mode='HTML'
-        )
-    except Exception as e:
-        bot.reply_to(message, 
-            f"❌ <b>Force Release Failed</b>\n\n"
-            f"🆔 Deal ID: <code>{deal_id}</code>\n"
-            f"🚨 Error: {str(e)}", 
+            f"🛠️ Admin override, result follows", 
             parse_mode='HTML'
         )
+    else:
+        bot.reply_to(message, f"⏳ A payout for deal <code>{deal_id}</code> is already in progress.", parse_mode='HTML')
 
-@bot.message_handler(commands=['help'])
+@bot_handler(commands=['help'])
 def help_command(message):
     help_msg = (
         "📖 <b>USDT Trading Guide</b>\n\n"
@@ -1850,7 +2146,7 @@ def help_command(message):
     )
     bot.reply_to(message, help_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['fees'])
+@bot_handler(commands=['fees'])
 def show_fees(message):
     """Display transaction fee structure"""
     fee_msg = "💳 <b>Transaction Fee Structure</b>\n\n"
@@ -1875,7 +2171,7 @@ def show_fees(message):
     
     bot.reply_to(message, fee_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['feestats'])
+@bot_handler(commands=['feestats'])
 def admin_fee_stats(message):
     """Admin command to view fee collection statistics"""
     if not is_admin(message.from_user.username):
@@ -1915,7 +2211,7 @@ def admin_fee_stats(message):
     except Exception as e:
         bot.reply_to(message, f"❌ <b>Error generating fee stats:</b> {str(e)}", parse_mode='HTML')
 
-@bot.message_handler(commands=['mystatus'])
+@bot_handler(commands=['mystatus'])
 def my_status(message):
     username = message.from_user.username
     if not username:
@@ -1972,7 +2268,7 @@ def my_status(message):
     
     bot.reply_to(message, status_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['info'])
+@bot_handler(commands=['info'])
 def info_command(message):
     balance = get_usdt_balance()
     info_msg = (
@@ -1987,14 +2283,13 @@ def info_command(message):
     ).format(ESCROW_WALLET, balance)
     bot.reply_to(message, info_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['balance'])
+@bot_handler(commands=['balance'])
 def balance_command(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 Only admins can check balance.")
         return
     
-    usdt_balance = get_usdt_balance(verbose=True)  # Show detailed output for admin balance checks
-    matic_balance = get_matic_balance()
+    usdt_balance, matic_balance = get_escrow_balances()
     
     # Check transaction capability
     can_transact = matic_balance >= 0.005
@@ -2019,7 +2314,7 @@ def balance_command(message):
     
     bot.reply_to(message, balance_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['status'])
+@bot_handler(commands=['status'])
 def status_command(message):
     args = message.text.split()[1:]
     if len(args) != 1:
@@ -2058,7 +2353,7 @@ def status_command(message):
     )
     bot.reply_to(message, status_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['list'])
+@bot_handler(commands=['list'])
 def list_command(message):
     username = message.from_user.username
     if not username:
@@ -2096,7 +2391,7 @@ def list_command(message):
     list_msg += "📊 Use /status TX_ID for detailed information"
     bot.reply_to(message, list_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['deal'])
+@bot_handler(commands=['deal'])
 def deal(message):
     if message.chat.id != GROUP_ID:
         return
@@ -2183,7 +2478,7 @@ def deal(message):
         parse_mode='HTML'
     )
 
-@bot.message_handler(commands=['confirm'])
+@bot_handler(commands=['confirm'])
 def confirm(message):
     if message.chat.id != GROUP_ID:
         return
@@ -2204,30 +2499,13 @@ def confirm(message):
         bot.reply_to(message, "⏳ Escrow not funded or already completed.")
         return
 
-    try:
-        amount = int(tx["amount"] * (10 ** USDT_DECIMALS))
-        nonce = web3.eth.get_transaction_count(Web3.to_checksum_address(ESCROW_WALLET))
-        txn = usdt.functions.transfer(
-            Web3.to_checksum_address(tx["seller_wallet"]),
-            amount
-        ).build_transaction({
-            'from': Web3.to_checksum_address(ESCROW_WALLET),
-            'gas': 100000,
-            'gasPrice': web3.to_wei('30', 'gwei'),
-            'nonce': nonce
-        })
-        signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        db[tx_id]["status"] = "released"
-        save_db(db)
-        bot.reply_to(message,
-            f"✅ USDT released to {tx['seller']}!\n🔗 Tx Hash: <code>{web3.to_hex(tx_hash)}</code>",
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        bot.reply_to(message, f"❌ Error releasing payment: {e}")
+    amount = int(tx["amount"] * (10 ** USDT_DECIMALS))
+    if enqueue_payout(tx_id, "confirm", {"recipient": tx["seller_wallet"], "amount_wei": amount}, message):
+        bot.reply_to(message, f"📥 Release to {tx['seller']} queued.")
+    else:
+        bot.reply_to(message, "⏳ A payout for this escrow is already in progress.")
 
-@bot.message_handler(commands=['dispute'])
+@bot_handler(commands=['dispute'])
 def dispute(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 Only admins can handle disputes.")
@@ -2248,30 +2526,13 @@ def dispute(message):
         bot.reply_to(message, "❌ Escrow not in paid status.")
         return
 
-    try:
-        amount = int(tx["amount"] * (10 ** USDT_DECIMALS))
-        nonce = web3.eth.get_transaction_count(Web3.to_checksum_address(ESCROW_WALLET))
-        txn = usdt.functions.transfer(
-            Web3.to_checksum_address(refund_wallet),
-            amount
-        ).build_transaction({
-            'from': Web3.to_checksum_address(ESCROW_WALLET),
-            'gas': 100000,
-            'gasPrice': web3.to_wei('30', 'gwei'),
-            'nonce': nonce
-        })
-        signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        db[tx_id]["status"] = "refunded"
-        save_db(db)
-        bot.reply_to(message,
-            f"💸 Refunded successfully.\n🔗 Tx Hash: <code>{web3.to_hex(tx_hash)}</code>",
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        bot.reply_to(message, f"❌ Refund error: {e}")
+    amount = int(tx["amount"] * (10 ** USDT_DECIMALS))
+    if enqueue_payout(tx_id, "dispute", {"recipient": refund_wallet, "amount_wei": amount}, message):
+        bot.reply_to(message, "📥 Refund queued.")
+    else:
+        bot.reply_to(message, "⏳ A payout for this escrow is already in progress.")
 
-@bot.message_handler(commands=['scammer'])
+@bot_handler(commands=['scammer'])
 def scammer(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 <b>Access Denied!</b>\n\nOnly authorized admins can mark scammers.", parse_mode='HTML')
@@ -2306,7 +2567,7 @@ def scammer(message):
             parse_mode='HTML'
         )
 
-@bot.message_handler(commands=['deals'])
+@bot_handler(commands=['deals'])
 def deals_admin(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 <b>Admin Only Command</b>\n\nThis command is restricted to authorized admins.", parse_mode='HTML')
@@ -2364,7 +2625,7 @@ def deals_admin(message):
     deals_msg += summary
     bot.reply_to(message, deals_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['emergency'])
+@bot_handler(commands=['emergency'])
 def emergency_refund(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 <b>Emergency Protocol Access Denied</b>\n\nOnly authorized admins can execute emergency refunds.", parse_mode='HTML')
@@ -2402,53 +2663,21 @@ def emergency_refund(message):
         )
         return
 
-    try:
-        amount = int(tx["amount"] * (10 ** USDT_DECIMALS))
-        nonce = web3.eth.get_transaction_count(Web3.to_checksum_address(ESCROW_WALLET))
-        
-        bot.reply_to(message, 
-            f"🚨 <b>Emergency Refund Initiated</b>\n\n"
-            f"🆔 TX ID: <code>{tx_id}</code>\n"
-            f"💵 Amount: {tx['amount']} USDT\n"
-            f"🏦 Refund to: <code>{refund_wallet}</code>\n"
-            f"⏳ Processing blockchain transaction...", 
-            parse_mode='HTML'
-        )
-        
-        txn = usdt.functions.transfer(
-            Web3.to_checksum_address(refund_wallet),
-            amount
-        ).build_transaction({
-            'from': Web3.to_checksum_address(ESCROW_WALLET),
-            'gas': 100000,
-            'gasPrice': web3.to_wei('30', 'gwei'),
-            'nonce': nonce
-        })
-        
-        signed_txn = web3.eth.account.sign_transaction(txn, PRIVATE_KEY)
-        tx_hash = web3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        
-        db[tx_id]["status"] = "emergency_refunded"
-        db[tx_id]["refund_hash"] = web3.to_hex(tx_hash)
-        save_db(db)
-        
-        bot.reply_to(message,
-            f"✅ <b>Emergency Refund Completed</b>\n\n"
-            f"💸 {tx['amount']} USDT refunded successfully\n"
-            f"🔗 <b>Transaction Hash:</b>\n<code>{web3.to_hex(tx_hash)}</code>\n"
-            f"👤 <b>Refunded to:</b> {refund_wallet}\n\n"
-            f"🛡️ Transaction marked as emergency refunded",
-            parse_mode="HTML"
-        )
-    except Exception as e:
-        bot.reply_to(message, 
-            f"❌ <b>Emergency Refund Failed</b>\n\n"
-            f"Error: {str(e)}\n"
-            f"Please try again or contact technical support.", 
-            parse_mode='HTML'
-        )
+    amount = int(tx["amount"] * (10 ** USDT_DECIMALS))
+    if not enqueue_payout(tx_id, "emergency_refund", {"recipient": refund_wallet, "amount_wei": amount}, message):
+        bot.reply_to(message, f"⏳ A payout for <code>{tx_id}</code> is already in progress.", parse_mode='HTML')
+        return
+    
+    bot.reply_to(message, 
+        f"🚨 <b>Emergency Refund Initiated</b>\n\n"
+        f"🆔 TX ID: <code>{tx_id}</code>\n"
+        f"💵 Amount: {tx['amount']} USDT\n"
+        f"🏦 Refund to: <code>{refund_wallet}</code>\n"
+        f"⏳ Queued for the payout worker, transaction hash follows", 
+        parse_mode='HTML'
+    )
 
-@bot.message_handler(commands=['blacklist'])
+@bot_handler(commands=['blacklist'])
 def view_blacklist(message):
     if not is_admin(message.from_user.username):
         bot.reply_to(message, "🚫 <b>Admin Only Command</b>\n\nThis command is restricted to authorized admins.", parse_mode='HTML')
@@ -2466,7 +2695,7 @@ def view_blacklist(message):
     blacklist_msg += f"\n📊 Total: {len(blacklist)} blacklisted users"
     bot.reply_to(message, blacklist_msg, parse_mode='HTML')
 
-@bot.message_handler(commands=['stats'])
+@bot_handler(commands=['stats'])
 def stats_command(message):
     db = load_db()
     blacklist = load_blacklist()
@@ -2527,302 +2756,1249 @@ def stats_command(message):
 # Bot will only respond to specific commands defined above
 # No catch-all handler for unknown commands - bot ignores unrecognized messages
 
+# === DEPOSIT CONFIRMATION TRACKING ===
+deposit_tracker = DepositTracker(DEPOSIT_CONFIRMATIONS, DEPOSIT_FINALITY_BLOCKS)
+
+def release_payment_claim(deal_id, expected_amount):
+    """Drop a payment claim so the same deal can be matched again"""
+    with payment_processing_lock:
+        payment_claims.pop(f"{deal_id}_{expected_amount}", None)
+
+def record_deposit_seen(deal_id, tx_info):
+    """Start confirmation tracking for a verified deposit and return the deal fields to store"""
+    record = deposit_tracker.track(
+        deal_id,
+        tx_info['tx_hash'],
+        tx_info['block_number'],
+        tx_info['block_hash'],
+        tx_info.get('log_index')
+    )
+    return {
+        "deposit_state": record["state"],
+        "deposit_confirmations": record["confirmations"],
+        "deposit_block_number": record["block_number"],
+        "deposit_block_hash": record["block_hash"],
+        "deposit_log_index": record["log_index"]
+    }
+
+def restore_pending_deposits():
+    """Rebuild the deposit tracker from deals that are not final yet (used on startup)"""
+    db = load_db()
+    pending = {}
+    for deal_id, deal in db.items():
+        if deal.get("deposit_state") in [DEPOSIT_SEEN, DEPOSIT_CONFIRMED] and deal.get("deposit_block_hash"):
+            pending[deal_id] = {
+                "tx_hash": deal.get("deposit_tx_hash"),
+                "log_index": deal.get("deposit_log_index"),
+                "block_number": deal["deposit_block_number"],
+                "block_hash": deal["deposit_block_hash"],
+                "state": deal["deposit_state"],
+                "confirmations": deal.get("deposit_confirmations", 0)
+            }
+    deposit_tracker.load(pending)
+    if pending:
+        print(f"🔁 Restored {len(pending)} deposit(s) awaiting finality")
+
+def get_canonical_block_hash(block_number):
+    """Return the canonical block hash at a height, or None if there is no block there"""
+    try:
+        return Web3.to_hex(web3.eth.get_block(block_number)['hash'])
+    except BlockNotFound:
+        return None
+
+def update_deposit_confirmations(head_number, block_hashes=None):
+    """
+    Advance tracked deposits by one monitor tick and apply state changes to deals.
+    block_hashes holds canonical hashes already fetched in the tick's RPC batch.
+    Returns the lowest block number of a reorged deposit, or None.
+    """
+    if not deposit_tracker.pending_count():
+        return None
+
+    def block_hash(block_number):
+        if block_hashes and block_number in block_hashes:
+            return block_hashes[block_number]
+        return get_canonical_block_hash(block_number)
+
+    events = deposit_tracker.update(head_number, block_hash)
+    reorged_blocks = [record["block_number"] for _, state, record in events if state == DEPOSIT_REORGED]
+
+    db = load_db()
+    for deal_id, state, record in events:
+        deal = db.get(deal_id)
+        if not deal or deal.get("deposit_block_hash") != record["block_hash"]:
+            continue
+
+        if state == DEPOSIT_REORGED:
+            handle_deposit_reorg(db, deal_id, record)
+        else:
+            deal["deposit_state"] = state
+            deal["deposit_confirmations"] = record["confirmations"]
+            if state == DEPOSIT_FINAL:
+                deal["deposit_finalized_at"] = time.time()
+            print(f"⛓️ Deposit for deal {deal_id} is {state} ({record['confirmations']} confirmations)")
+
+    # Keep confirmation counts visible for deals that did not change state
+    for deal_id, record in deposit_tracker.to_dict().items():
+        if deal_id in db and db[deal_id].get("deposit_block_hash") == record["block_hash"]:
+            db[deal_id]["deposit_confirmations"] = record["confirmations"]
+    save_db(db)
+
+    for deal_id, state, record in events:
+        if state == DEPOSIT_FINAL and deal_id in db:
+            release_if_ready(deal_id, db[deal_id])
+
+    return min(reorged_blocks) if reorged_blocks else None
+
+def handle_deposit_reorg(db, deal_id, record):
+    """Roll a deal back to waiting for deposit after its deposit block left the canonical chain"""
+    deal = db[deal_id]
+    if deal["status"] not in ["usdt_deposited", "buyer_paid", "disputed"]:
+        return
+
+    print(f"🚨 REORG: Deposit {record['tx_hash']} for deal {deal_id} is no longer on the canonical chain")
+    buyer_had_paid = deal.get("buyer_confirmed", False)
+
+    deal["status"] = "waiting_usdt_deposit"
+    deal["buyer_confirmed"] = False
+    deal["seller_confirmed"] = False
+    deal["reorged_deposit_tx_hash"] = record["tx_hash"]
+    deal["deposit_reorged_at"] = time.time()
+    for key in ["deposit_state", "deposit_confirmations", "deposit_block_number",
+                "deposit_block_hash", "deposit_log_index", "deposit_tx_hash", "deposit_confirmed_at"]:
+        deal.pop(key, None)
+    release_payment_claim(deal_id, deal["amount"])
+    
+    # Let the same transfer be attributed again if it is re-included in a later block
+    processed_deposits.discard(DedupStore.key(record["tx_hash"], record["log_index"]))
+    watch_deal_address(deal_id, deal_deposit_address(deal))
+
+    warning = (
+        f"⚠️ {deal['buyer']} had already confirmed sending fiat - hold further payments\n"
+        if buyer_had_paid else ""
+    )
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"🚨 <b>DEPOSIT ROLLED BACK (CHAIN REORG)</b>\n\n"
+             f"🆔 Deal ID: <code>{deal_id}</code>\n"
+             f"💵 Amount: {deal['amount']} USDT\n"
+             f"🔗 TX: <code>{record['tx_hash']}</code>\n\n"
+             f"⛓️ The block containing this deposit is no longer on the Polygon chain\n"
+             f"⏳ Deal is back to waiting for the USDT deposit\n"
+             f"{warning}\n"
+             f"🔄 Bot will detect the deposit again once it is re-included",
+        parse_mode='HTML'
+    )
+
+def deposit_release_blocker(deal):
+    """Return why a deal's deposit cannot back a release yet, or None if it can"""
+    deposit_state = deal.get("deposit_state")
+    if deposit_state and deposit_state != DEPOSIT_FINAL:
+        return (
+            f"Deposit not final yet: {deal.get('deposit_confirmations', 0)}/"
+            f"{DEPOSIT_FINALITY_BLOCKS} confirmations"
+        )
+    if deposit_state and deal.get("deposit_address") and not deal.get("deposit_swept_tx"):
+        return "Deposit not yet swept into the escrow wallet"
+    return None
+
+def release_if_ready(deal_id, deal):
+    """Release USDT for confirmed deals that were only waiting on their deposit to settle"""
+    if deal["status"] != "buyer_paid" or not (deal.get("buyer_confirmed") and deal.get("seller_confirmed")):
+        return
+    if deposit_release_blocker(deal):
+        return
+    # A failed job is retried by an admin with /forcerelease, not on every tick
+    if payout_queue.get(deal_id) is None:
+        enqueue_payout(deal_id, "release")
+
+# === PAYOUT RECEIPT TRACKING ===
+# Deal status once a payout of each kind is mined
+PAYOUT_SUCCESS_STATUS = {
+    "release": "completed",
+    "confirm": "released",
+    "dispute": "refunded",
+    "emergency_refund": "emergency_refunded"
+}
+
+def restore_pending_payouts():
+    """Resume tracking payouts that were broadcast but not mined before a restart, and requeue unsent ones"""
+    db = load_db()
+    pending = {}
+    logged_deals = {deal_id for intent in intent_log.open_intents().values() for deal_id in intent["deal_ids"]}
+    for deal_id, deal in db.items():
+        if deal.get("status") != "payout_pending":
+            continue
+        if deal.get("payout"):
+            pending[deal.get("payout_id", deal_id)] = deal["payout"]
+        elif deal.get("payout_queued_at") and deal_id not in logged_deals:
+            amount_wei = int(deal["amount_received"] * (10 ** USDT_DECIMALS))
+            payout_batcher.add(deal_id, deal["buyer_wallet"], amount_wei, deal["payout_queued_at"])
+    payout_tracker.load(pending)
+    reconcile_payout_intents()
+    if payout_tracker.pending_count() or payout_batcher.pending_count():
+        print(f"🔁 Restored {payout_tracker.pending_count()} payout(s) awaiting receipts, {payout_batcher.pending_count()} queued")
+
+def reconcile_payout_intents():
+    """
+    Replay open payout intents after a restart. Deals whose payout was broadcast but
+    never saved are marked payout_pending again, and signed payouts the node has never
+    seen are rebroadcast. Only in-flight intents are read, so this does not grow with history.
+    """
+    intents = intent_log.open_intents()
+    if not intents:
+        return
+    
+    batch = RPCBatch(web3)
+    receipt_calls = {payout_id: [batch.receipt(attempt["tx_hash"]) for attempt in intent["attempts"]]
+                     for payout_id, intent in intents.items()}
+    known_calls = {payout_id: batch.add("eth_getTransactionByHash", [intent["attempts"][-1]["tx_hash"]])
+                   for payout_id, intent in intents.items()}
+    batch.execute()
+    head = chain_head.head()
+    
+    def result(call):
+        try:
+            return call.result()
+        except Exception:
+            return None
+    
+    db = load_db()
+    records = payout_tracker.to_dict()
+    for payout_id, intent in intents.items():
+        deals = [db[deal_id] for deal_id in intent["deal_ids"] if deal_id in db]
+        if deals and all(deal["status"] in PAID_OUT_STATUSES and deal["status"] != "payout_pending" for deal in deals):
+            intent_log.close(payout_id, "settled before restart")
+            continue
+        
+        tx_hashes = [attempt["tx_hash"] for attempt in intent["attempts"]]
+        mined = any(result(call) for call in receipt_calls[payout_id])
+        if not mined and result(known_calls[payout_id]) is None:
+            try:
+                web3.eth.send_raw_transaction(intent["attempts"][-1]["raw_tx"])
+                print(f"📡 Rebroadcast logged payout {payout_id}: {tx_hashes[-1]}")
+            except Exception as e:
+                # e.g. nonce too low: the tracker reports it mined or dropped on its next poll
+                print(f"⚠️ Could not rebroadcast payout {payout_id}: {e}")
+        
+        # The log has every broadcast hash, including bumps the deal record may have missed
+        record = dict(records.get(payout_id) or {}, kind=intent["kind"], deal_ids=intent["deal_ids"],
+                      nonce=intent["nonce"], txn=intent["txn"], tx_hashes=tx_hashes)
+        record.setdefault("sent_block", head)
+        record.setdefault("bumps", len(tx_hashes) - 1)
+        record.setdefault("nonce_gone_polls", 0)
+        record.setdefault("stuck_reported", False)
+        records[payout_id] = record
+        
+        for deal_id in intent["deal_ids"]:
+            deal = db.get(deal_id)
+            if not deal:
+                continue
+            if deal["status"] != "payout_pending":
+                print(f"🔁 Recovered payout for deal {deal_id} that was broadcast but not recorded")
+                deal["status"] = "payout_pending"
+                deal["tx_hash"] = tx_hashes[-1]
+                if payout_id != deal_id:
+                    deal["payout_id"] = payout_id
+            deal["payout"] = record
+    
+    payout_tracker.load(records)
+    save_db(db)
+
+def announce_completed_deal(deal_id, deal, tx_hash):
+    """Group notification for a release whose transfer is mined"""
+    fee_msg = ""
+    if deal.get("transaction_fee", 0) > 0:
+        fee_msg = (
+            f"💳 <b>Fee Breakdown:</b>\n"
+            f"💵 Original Amount: {deal['original_amount']} USDT\n"
+            f"🏦 Service Fee: {deal['transaction_fee']} USDT\n"
+            f"✅ Amount Received: {deal['amount_received']} USDT\n\n"
+        )
+    
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"🎉 <b>Deal Completed Successfully!</b>\n\n"
+             f"🆔 Deal ID: <code>{deal_id}</code>\n"
+             f"💼 Buyer: {deal['buyer']}\n"
+             f"🛒 Seller: {deal['seller']}\n\n"
+             f"{fee_msg}"
+             f"✅ USDT sent to buyer's wallet\n"
+             f"🔗 TX Hash: <code>{tx_hash}</code>\n\n"
+             f"🤝 Thank you for using our escrow service!\n\n"
+             f"🚀 <b>Trading Queue is Now Open!</b>\n"
+             f"📈 Others can now place /buy or /sell orders",
+        parse_mode='HTML'
+    )
+
+def fail_payout(deal_id, deal, error):
+    """Mark a deal whose payout never left escrow so an admin can retry it"""
+    deal["status"] = "payout_failed"
+    deal["payout_error"] = error
+    deal.pop("payout", None)
+    deal.pop("payout_id", None)
+    print(f"❌ Payout for deal {deal_id} failed: {error}")
+    try:
+        bot.send_message(
+            chat_id=GROUP_ID,
+            text=f"🚨 <b>PAYOUT FAILED</b>\n\n"
+                 f"🆔 Deal ID: <code>{deal_id}</code>\n"
+                 f"💵 Amount: {deal['amount']} USDT\n"
+                 f"🚨 Error: {error}\n\n"
+                 f"🛠️ Use /forcerelease {deal_id} to retry",
+            parse_mode='HTML'
+        )
+    except:
+        pass
+
+def record_sent_payout(deal_id, tx_hash=None, **fields):
+    """
+    Mark a deal payout_pending after its payout was broadcast. The monitor may have
+    seen the receipt in the meantime; a deal it already settled keeps that status.
+    """
+    with payment_processing_lock:
+        db = load_db()
+        deal = db.get(deal_id)
+        if deal is None:
+            return
+        deal.update(fields)
+        record = payout_tracker.get(deal_id)
+        if record is not None:
+            deal["status"] = "payout_pending"
+            deal["payout"] = record
+            if tx_hash:
+                deal["tx_hash"] = tx_hash
+        save_db(db)
+
+def update_payouts(head_number):
+    """Poll receipts of pending payouts and move their deals on once mined"""
+    if not payout_tracker.pending_count():
+        return
+    
+    events = payout_tracker.poll(head_number)
+    if not events:
+        return
+    
+    # Under the payment lock so a payout worker recording its send cannot overwrite the outcome
+    with payment_processing_lock:
+        db = load_db()
+        for payout_id, event, record, receipt in events:
+            if event == PAYOUT_STUCK:
+                try:
+                    bot.send_message(
+                        chat_id=GROUP_ID,
+                        text=f"⚠️ <b>Payout Stuck</b>\n\n"
+                             f"🆔 Deal ID(s): <code>{', '.join(record.get('deal_ids', [payout_id]))}</code>\n"
+                             f"⛽ Not mined after {record['bumps']} fee bumps\n"
+                             f"🔗 Latest TX: <code>{record['tx_hashes'][-1]}</code>\n\n"
+                             f"🔧 <b>Admin intervention required.</b>",
+                        parse_mode='HTML'
+                    )
+                except:
+                    pass
+                continue
+        
+            if event != PAYOUT_REPLACED:
+                intent_log.close(payout_id, event)
+        
+            # A batched payout settles every deal it pays
+            for deal_id in record.get("deal_ids", [payout_id]):
+                deal = db.get(deal_id)
+                if not deal:
+                    continue
+            
+                if event == PAYOUT_REPLACED:
+                    deal["payout"] = record
+                    deal["tx_hash"] = record["tx_hashes"][-1]
+                elif event == PAYOUT_CONFIRMED:
+                    tx_hash = receipt["transactionHash"]
+                    deal["status"] = PAYOUT_SUCCESS_STATUS.get(record["kind"], "completed")
+                    deal["tx_hash"] = tx_hash
+                    deal["payout_confirmed_at"] = time.time()
+                    deal.pop("payout", None)
+                    deal.pop("payout_id", None)
+                    print(f"✅ Payout for deal {deal_id} mined: {tx_hash}")
+                    if record["kind"] in ["release", "batch_release"]:
+                        announce_completed_deal(deal_id, deal, tx_hash)
+                    else:
+                        bot.send_message(
+                            chat_id=GROUP_ID,
+                            text=f"✅ <b>Payout Confirmed</b>\n\n"
+                                 f"🆔 Deal ID: <code>{deal_id}</code>\n"
+                                 f"📍 Status: {deal['status']}\n"
+                                 f"🔗 TX Hash: <code>{tx_hash}</code>",
+                            parse_mode='HTML'
+                        )
+                elif event in [PAYOUT_REVERTED, PAYOUT_DROPPED]:
+                    # Funds never left escrow; an admin can retry with /forcerelease
+                    fail_payout(deal_id, deal, "transaction reverted" if event == PAYOUT_REVERTED else "transaction dropped")
+        save_db(db)
+
+# === BATCHED PAYOUTS ===
+def send_disperse_payout(items):
+    """
+    Pay several releases with one Disperse.disperseToken transaction.
+    items: [(deal_id, recipient, amount_wei)]. Returns (payout_id, tx_hash).
+    """
+    total = sum(amount for _, _, amount in items)
+    if disperse.allowance(ESCROW_WALLET) < total:
+        # Bounded top-up, never unlimited; the disperse below takes the next nonce so it is mined after it
+        approval = max(total, int(DISPERSE_APPROVAL_USDT * (10 ** USDT_DECIMALS)))
+        with escrow_nonces.reserve() as nonce:
+            txn = {
+                'from': Web3.to_checksum_address(ESCROW_WALLET),
+                'to': usdt.address,
+                'value': 0,
+                'data': disperse.approve_data(approval),
+                'gas': DEFAULT_TRANSFER_GAS,
+                'nonce': nonce,
+                'chainId': CHAIN_ID,
+                **fee_oracle.fees(FEE_SPEED)
+            }
+            approve_hash = sign_and_send_escrow(txn)
+        print(f"✅ Approved Disperse contract for {approval / (10 ** USDT_DECIMALS)} escrow USDT: {approve_hash}")
+    
+    payout_id = disperse_payout_id(items)
+    deal_ids = [deal_id for deal_id, _, _ in items]
+    sent_block = chain_head.head()  # Read before the broadcast: nothing after it may fail
+    with escrow_nonces.reserve() as nonce:
+        txn = {
+            'from': Web3.to_checksum_address(ESCROW_WALLET),
+            'to': disperse.address,
+            'value': 0,
+            'data': disperse.disperse_data([recipient for _, recipient, _ in items], [amount for _, _, amount in items]),
+            'gas': disperse.gas_limit(len(items)),
+            'nonce': nonce,
+            'chainId': CHAIN_ID,
+            **fee_oracle.fees(FEE_SPEED)
+        }
+        tx_hash = web3.to_hex(broadcast_logged_payout(txn, payout_id, "batch_release", deal_ids))
+    
+    payout_tracker.track(payout_id, txn, tx_hash, sent_block, "batch_release", deal_ids=deal_ids)
+    return payout_id, tx_hash
+
+def disperse_payout_id(items):
+    return f"batch-{items[0][0]}"
+
+def flush_payout_batch():
+    """
+    Send queued releases once their batch is due. Falls back to one transfer per deal
+    only when the node rejected the Disperse; after any other error it may be on its
+    way, so its deals are never paid again here.
+    """
+    items = payout_batcher.take_due()
+    if not items:
+        return
+    
+    sent = {}  # deal_id -> (payout_id, tx_hash)
+    if len(items) > 1:
+        try:
+            payout_id, tx_hash = send_disperse_payout(items)
+            sent = {deal_id: (payout_id, tx_hash) for deal_id, _, _ in items}
+            print(f"📦 Batched payout for {len(items)} deals: {tx_hash}")
+        except Exception as e:
+            if not send_was_rejected(e):
+                if disperse_payout_id(items) in intent_log.open_intents():
+                    # Signed and maybe broadcast: the deals stay payout_pending for the tracker or replay
+                    print(f"⚠️ Batched payout outcome unknown ({e}), left to receipt tracking")
+                else:
+                    # Failed before the Disperse was signed, e.g. reading the allowance timed out
+                    for deal_id, recipient, amount_wei in items:
+                        payout_batcher.add(deal_id, recipient, amount_wei)
+                    print(f"⚠️ Batched payout not sent ({e}), retrying {len(items)} deals with the next batch")
+                return
+            print(f"⚠️ Batched payout rejected ({e}), sending {len(items)} transfers individually")
+    
+    failed = {}
+    for deal_id, recipient, amount_wei in items:
+        if deal_id in sent:
+            continue
+        try:
+            tx_hash = send_escrow_transfer(recipient, amount_wei, deal_id=deal_id, kind="release")
+            sent[deal_id] = (deal_id, web3.to_hex(tx_hash))
+        except Exception as e:
+            failed[deal_id] = str(e)
+    
+    db = load_db()
+    for deal_id, (payout_id, tx_hash) in sent.items():
+        if deal_id not in db:
+            continue
+        db[deal_id]["tx_hash"] = tx_hash
+        db[deal_id]["payout"] = payout_tracker.get(payout_id)
+        if payout_id != deal_id:
+            db[deal_id]["payout_id"] = payout_id
+    for deal_id, error in failed.items():
+        if deal_id in db:
+            fail_payout(deal_id, db[deal_id], error)
+    save_db(db)
+
+# === PAYOUT JOB QUEUE ===
+# Statuses after which a deal must not be paid out again
+PAID_OUT_STATUSES = ["payout_pending", "completed", "released", "refunded", "emergency_refunded"]
+
+def enqueue_payout(deal_id, action, args=None, message=None):
+    """Queue a payout for the worker; returns False if one is already queued or running for the deal"""
+    reply_to = (message.chat.id, message.message_id) if message else None
+    job, created = payout_queue.enqueue(deal_id, action, args, reply_to)
+    if created:
+        print(f"📥 Payout job queued for deal {deal_id} ({action})")
+    return created
+
+def reply_to_job(job, text):
+    """Post a job's result in reply to the command that queued it"""
+    if not job.get("reply_to"):
+        return
+    chat_id, message_id = job["reply_to"]
+    try:
+        bot.send_message(chat_id=chat_id, text=text, parse_mode='HTML', reply_to_message_id=message_id)
+    except:
+        pass
+
+def execute_payout_job(job):
+    """Run one payout job against the deal's current state and return the result message"""
+    deal_id = job["deal_id"]
+    deal = load_db().get(deal_id)
+    if not deal:
+        raise Exception("Deal not found")
+    if deal["status"] in PAID_OUT_STATUSES:
+        return f"ℹ️ Deal <code>{deal_id}</code> is already paid out ({deal['status']}), nothing sent"
+    
+    if job["action"] == "release":
+        release_usdt_to_buyer(deal_id, deal)
+        deal = load_db()[deal_id]
+        return (
+            f"📤 <b>Release Sent</b>\n\n"
+            f"🆔 Deal ID: <code>{deal_id}</code>\n"
+            f"💵 Amount: {deal.get('amount_received', deal['amount'])} USDT to {deal['buyer']}\n"
+            f"🔗 TX Hash: <code>{deal.get('tx_hash', 'batched, hash follows')}</code>\n\n"
+            f"⏳ The deal completes once the transaction is mined"
+        )
+    
+    args = job["args"]
+    tx_hash = web3.to_hex(send_escrow_transfer(args["recipient"], args["amount_wei"], deal_id=deal_id, kind=job["action"]))
+    if job["action"] == "emergency_refund":
+        record_sent_payout(deal_id, refund_hash=tx_hash)
+    else:
+        record_sent_payout(deal_id)
+    return (
+        f"📤 <b>Payout Sent</b>\n\n"
+        f"🆔 Deal ID: <code>{deal_id}</code>\n"
+        f"👤 To: <code>{args['recipient']}</code>\n"
+        f"🔗 TX Hash: <code>{tx_hash}</code>\n\n"
+        f"⏳ Status updates once the transaction is mined"
+    )
+
+def notify_payout_job_failure(job, error):
+    deal = load_db().get(job["deal_id"], {})
+    reply_to_job(job, f"❌ <b>Payout Failed</b>\n\n🆔 Deal ID: <code>{job['deal_id']}</code>\n🚨 Error: {error}")
+    if job["action"] != "release":
+        return
+    admin_msg = (
+        f"🚨 <b>AUTO-RELEASE FAILED</b>\n\n"
+        f"🆔 Deal ID: <code>{job['deal_id']}</code>\n"
+        f"💵 Amount: {deal.get('amount')} USDT\n"
+        f"👥 Buyer: {deal.get('buyer')}\n"
+        f"👥 Seller: {deal.get('seller')}\n"
+        f"🚨 Error: {error}\n\n"
+        f"🛠️ Use /forcerelease {job['deal_id']} to complete manually"
+    )
+    for admin in ADMIN_USERNAMES:
+        try:
+            bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
+            break
+        except:
+            continue
+
+def settle_interrupted_payout_jobs():
+    """Jobs cut off by a restart are never re-run blindly: their transfer may already be on chain"""
+    db = load_db()
+    for job in payout_queue.interrupted():
+        deal_id = job["deal_id"]
+        deal = db.get(deal_id)
+        if deal and deal["status"] in PAID_OUT_STATUSES:
+            payout_queue.resolve(deal_id, JOB_DONE, "payout recorded before restart")
+            continue
+        
+        payout_queue.resolve(deal_id, JOB_FAILED, "interrupted by restart")
+        try:
+            bot.send_message(
+                chat_id=GROUP_ID,
+                text=f"⚠️ <b>Payout Interrupted</b>\n\n"
+                     f"🆔 Deal ID: <code>{deal_id}</code>\n"
+                     f"🔄 The bot restarted while this payout was being sent\n\n"
+                     f"🔍 Check the escrow wallet on Polygonscan before retrying with /forcerelease {deal_id}",
+                parse_mode='HTML'
+            )
+        except:
+            pass
+
+def run_payout_worker():
+    """Execute queued payout jobs one at a time, off the Telegram handler threads"""
+    # Intents first: an interrupted job whose transfer was logged then counts as paid out
+    restore_pending_payouts()
+    settle_interrupted_payout_jobs()
+    print(f"💸 Payout worker started with {payout_queue.pending_count()} queued job(s)")
+    while True:
+        job = payout_queue.next_job()
+        try:
+            result = execute_payout_job(job)
+        except Exception as e:
+            payout_queue.fail(job["deal_id"], e)
+            print(f"❌ Payout job for deal {job['deal_id']} failed: {e}")
+            notify_payout_job_failure(job, str(e))
+            continue
+        payout_queue.complete(job["deal_id"])
+        reply_to_job(job, result)
+
+# === DEPOSIT ADDRESS WATCH SET ===
+watch_set = WatchSet(Web3.to_checksum_address(USDT_CONTRACT))
+watch_set.add(ESCROW_WALLET)  # Shared escrow wallet is always watched
+
+def restore_watch_set():
+    """Watch forwarding addresses of every deal still waiting for a deposit"""
+    for deal_id, deal in load_db().items():
+        if deal.get("status") == "waiting_usdt_deposit" and deal_deposit_address(deal):
+            watch_set.add(deal_deposit_address(deal), deal_id)
+
+def watch_deal_address(deal_id, address):
+    """Start watching a per-deal deposit address"""
+    if address:
+        watch_set.add(address, deal_id)
+
+def unwatch_deal(deal_id):
+    """Stop watching a deal's deposit addresses once it no longer needs a deposit"""
+    watch_set.remove_deal(deal_id)
+
+# === HD DEPOSIT ADDRESSES & SWEEPING ===
+SWEEPABLE_STATUSES = [
+    "usdt_deposited", "buyer_paid", "disputed", "pending_admin_verification",
+    "cancelled_wrong_amount", "cancelled_verification_failed", "expired"
+]
+
+deposit_deriver = LazyResource(
+    lambda: DepositAddressDeriver(DEPOSIT_SEED_MNEMONIC), "deposit_deriver"
+) if HD_DEPOSIT_ADDRESSES_ENABLED else None
+deposit_sweeper = LazyResource(lambda: DepositSweeper(
+    web3, usdt, deposit_deriver, ESCROW_WALLET, require_config("PRIVATE_KEY", PRIVATE_KEY),
+    gas_limit=SWEEP_GAS_LIMIT,
+    multicall=multicall,
+    nonce_manager=escrow_nonces,
+    fee_oracle=fee_oracle
+), "deposit_sweeper") if HD_DEPOSIT_ADDRESSES_ENABLED else None
+
+def sweep_deposit_addresses():
+    """Sweep one batch of funded deal addresses into the escrow wallet"""
+    db = load_db()
+    candidates = [
+        (deal_id, deal) for deal_id, deal in db.items()
+        if deal.get("deposit_address") and not deal.get("deposit_swept_tx")
+        and deal.get("status") in SWEEPABLE_STATUSES
+        and deal.get("deposit_state") in [None, DEPOSIT_FINAL]
+    ]
+    # Live deals first: expired ones are mostly empty and would otherwise crowd them out
+    candidates.sort(key=lambda item: item[1]["status"] == "expired")
+    targets = [(deal_id, deal["deposit_index"]) for deal_id, deal in candidates[:SWEEP_BATCH_SIZE]]
+    if not targets:
+        return 0
+    
+    results = deposit_sweeper.sweep(targets)
+    balance_cache.invalidate(ESCROW_WALLET)  # Gas top-ups left escrow, swept USDT arrived
+    
+    db = load_db()
+    swept = []
+    for deal_id, result in results.items():
+        if deal_id not in db:
+            continue
+        if result["status"] == 1:
+            db[deal_id]["deposit_swept_tx"] = result["tx_hash"]
+            db[deal_id]["deposit_swept_at"] = time.time()
+            swept.append(deal_id)
+        else:
+            print(f"⚠️ Sweep of deal {deal_id} did not succeed (tx {result['tx_hash']})")
+    save_db(db)
+    
+    if swept:
+        print(f"🧹 Swept {len(swept)} deal address(es) into escrow")
+    for deal_id in swept:
+        if db[deal_id]["status"] == "expired":
+            announce_late_deposit(deal_id, db[deal_id], results[deal_id])
+        release_if_ready(deal_id, db[deal_id])
+    return len(swept)
+
+def announce_late_deposit(deal_id, deal, result):
+    """A deposit reached an expired deal's address and is now in escrow, waiting for a refund"""
+    try:
+        bot.send_message(
+            chat_id=GROUP_ID,
+            text=f"⚠️ <b>LATE DEPOSIT SWEPT</b>\n\n"
+                 f"🆔 Expired Deal ID: <code>{deal_id}</code>\n"
+                 f"💵 Amount: {result['amount'] / (10 ** USDT_DECIMALS)} USDT\n"
+                 f"👥 Seller: {deal['seller']}\n"
+                 f"🔗 Sweep TX: <code>{result['tx_hash']}</code>\n\n"
+                 f"🛠️ Funds are in the escrow wallet; refund the seller manually",
+            parse_mode='HTML'
+        )
+    except:
+        pass
+
+def run_sweeper():
+    """Background loop consolidating deal deposit addresses"""
+    while True:
+        try:
+            sweep_deposit_addresses()
+        except Exception as e:
+            print(f"⚠️ Error sweeping deposit addresses: {e}")
+        time.sleep(SWEEP_INTERVAL_SECONDS)
+
+# === MEMPOOL PRE-NOTIFICATION ===
+def get_deposit_addresses():
+    """Escrow wallet plus forwarding addresses of deals still waiting for a deposit"""
+    return watch_set.addresses()
+
+def find_deal_for_pending_transfer(db, sender, recipient, amount):
+    """Match a pending USDT transfer to a deal waiting for its deposit"""
+    # Forwarding addresses belong to exactly one deal
+    deal_id = watch_set.owner(recipient)
+    if deal_id is not None:
+        return deal_id if db.get(deal_id, {}).get("status") == "waiting_usdt_deposit" else None
+    
+    # Escrow wallet deposits must come from the seller's wallet with the right amount
+    for deal_id, deal in db.items():
+        if (deal.get("status") == "waiting_usdt_deposit" and
+            deal.get("seller_wallet", "Not set").lower() == sender.lower() and
+            abs(amount - deal["amount"]) < 0.01):
+            return deal_id
+    return None
+
+def handle_pending_deposit(tx_hash, sender, recipient, raw_amount):
+    """Tell the deal participants a deposit was broadcast before it is mined"""
+    amount = raw_amount / (10 ** USDT_DECIMALS)
+    
+    with payment_processing_lock:
+        db = load_db()
+        deal_id = find_deal_for_pending_transfer(db, sender, recipient, amount)
+        if not deal_id or db[deal_id].get("pending_deposit_tx") == tx_hash:
+            return
+        
+        deal = db[deal_id]
+        deal["pending_deposit_tx"] = tx_hash
+        deal["pending_deposit_seen_at"] = time.time()
+        save_db(db)
+    
+    print(f"📡 Pending deposit {tx_hash} for deal {deal_id}: {amount} USDT from {sender}")
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"📡 <b>DEPOSIT BROADCAST - AWAITING CONFIRMATION</b>\n\n"
+             f"🆔 Deal ID: <code>{deal_id}</code>\n"
+             f"💵 Amount: {amount} USDT\n"
+             f"🔗 TX: <code>{tx_hash}</code>\n\n"
+             f"⏳ {deal['seller']}'s transfer is on its way to escrow\n"
+             f"⚠️ {deal['buyer']}: Do NOT send fiat yet - wait for the payment received message",
+        parse_mode='HTML'
+    )
+
+def start_mempool_watcher():
+    """Start the optional pending transaction watcher"""
+    watcher = MempoolWatcher(
+        web3,
+        USDT_CONTRACT,
+        get_deposit_addresses,
+        handle_pending_deposit,
+        poll_interval=MEMPOOL_POLL_INTERVAL
+    )
+    watcher.start()
+    return watcher
+
 # === ENHANCED PAYMENT MONITORING ===
+def is_deal_expired(deal_id):
+    """Payments for expired deals are ignored"""
+    try:
+        deal_age = time.time() - int(deal_id)
+        if deal_age > (DEAL_EXPIRY_MINUTES * 60):
+            print(f"❌ Deal {deal_id} expired {int(deal_age/60)} minutes ago, ignoring payment")
+            return True
+    except (ValueError, TypeError):
+        print(f"⚠️ Invalid deal_id format: {deal_id}, processing anyway")
+    return False
+
+def match_escrow_transfer(db, sender, amount):
+    """
+    Attribute a transfer into the shared escrow wallet to a waiting deal.
+    Returns (deal_id, sender_verified); deal_id is None if nothing matches.
+    """
+    waiting = [(deal_id, deal) for deal_id, deal in db.items() if deal["status"] == "waiting_usdt_deposit"]
+    from_seller = [(deal_id, deal) for deal_id, deal in waiting
+                   if deal.get("seller_wallet", "Not set").lower() == sender.lower()]
+    
+    # The seller's registered wallet and the amount identify the deal
+    for deal_id, deal in from_seller:
+        if abs(amount - deal["amount"]) < 0.01:
+            return deal_id, True
+    
+    # Wrong amount from a seller: only attributable if they have a single waiting deal
+    if len(from_seller) == 1:
+        return from_seller[0][0], True
+    if from_seller:
+        return None, False
+    
+    # Right amount from an unknown wallet - cannot be verified as the seller.
+    # Deals with their own deposit address are paid there, never matched by amount here.
+    for deal_id, deal in waiting:
+        if not deal.get("deposit_address") and abs(amount - deal["amount"]) < 0.01:
+            return deal_id, False
+    
+    return None, False
+
+def is_deal_address_transfer(db, transfer):
+    """A sweep or forward from a deal's own deposit address into escrow, not a new deposit"""
+    sender = transfer["from"].lower()
+    tx_hash = transfer["tx_hash"].lower()
+    for deal in db.values():
+        if (deal.get("deposit_address") or "").lower() == sender:
+            return True
+        if (deal.get("deposit_swept_tx") or "").lower() == tx_hash:
+            return True
+    return False
+
+def process_incoming_transfer(transfer):
+    """Attribute one USDT transfer into a watched address to its deal"""
+    payment_id = DedupStore.key(transfer["tx_hash"], transfer["log_index"])
+    if payment_id in processed_deposits:
+        return
+    if TRACE_FILE:
+        trace_recorder.record_deposit(transfer)
+    
+    amount = transfer["value"] / (10 ** USDT_DECIMALS)
+    sender = transfer["from"]
+    print(f"💰 Incoming transfer: {amount} USDT from {sender} (tx {transfer['tx_hash']})")
+    if transfer["to"].lower() == ESCROW_WALLET.lower():
+        balance_cache.invalidate(ESCROW_WALLET)
+    
+    db = load_db()
+    deal_id = watch_set.owner(transfer["to"])
+    
+    if deal_id is None and is_deal_address_transfer(db, transfer):
+        # Already credited when it reached the deal address
+        print(f"🧹 Transfer {payment_id} moves a deal deposit into escrow, skipped")
+        processed_deposits.add(payment_id)
+        processed_deposits.flush()
+        return
+    
+    if deal_id is not None:
+        # Per-deal address: the address itself attributes the deposit
+        sender_verified = True
+        if deal_id not in db or db[deal_id]["status"] != "waiting_usdt_deposit":
+            print(f"⚠️ Transfer to deposit address of inactive deal {deal_id}, needs admin review")
+            processed_deposits.add(payment_id)
+            processed_deposits.flush()
+            return
+    else:
+        deal_id, sender_verified = match_escrow_transfer(db, sender, amount)
+        if deal_id is None:
+            processed_deposits.add(payment_id)
+            if not handle_legacy_payment(db, amount):
+                print(f"ℹ️ Transfer {payment_id} does not match any waiting deal")
+                processed_deposits.flush()
+            return
+    
+    deal = db[deal_id]
+    expected_amount = deal["amount"]
+    
+    if is_deal_expired(deal_id):
+        processed_deposits.add(payment_id)
+        processed_deposits.flush()
+        return
+    
+    if abs(amount - expected_amount) >= 0.01:
+        processed_deposits.add(payment_id)
+        cancel_deal_wrong_amount(db, deal_id, amount)
+        return
+    
+    print(f"💰 Amount match found for deal {deal_id}: {expected_amount} USDT")
+    
+    # SECURITY CHECK: Secure payment claiming to prevent race conditions
+    claim_ok, claim_msg = secure_payment_claim(deal_id, expected_amount)
+    if not claim_ok:
+        # Another deposit for this deal is being processed; this one is extra USDT in escrow.
+        # The scan moves past its block, so it is recorded for an admin instead of dropped.
+        print(f"❌ Payment claim failed for deal {deal_id}: {claim_msg}")
+        processed_deposits.add(payment_id)
+        processed_deposits.flush()
+        flag_deposit_for_review(deal_id, transfer, amount, claim_msg)
+        return
+    
+    # Mark the transfer log as processed so it is never attributed twice
+    processed_deposits.add(payment_id)
+    
+    if not sender_verified:
+        if deal.get("seller_wallet", "Not set") == "Not set":
+            require_admin_verification(db, deal_id, amount)
+        else:
+            cancel_deal_verification_failed(db, deal_id, amount)
+        return
+    
+    mark_deposit_received(deal_id, transfer, payment_id)
+
+def flag_deposit_for_review(deal_id, transfer, amount, reason):
+    """Ask an admin to look at a deposit the monitor could not apply to its deal"""
+    db = load_db()
+    if deal_id in db:
+        db[deal_id].setdefault("deposits_for_review", []).append(
+            {"tx_hash": transfer["tx_hash"], "log_index": transfer["log_index"], "amount": amount, "reason": reason}
+        )
+        save_db(db)
+    try:
+        bot.send_message(
+            chat_id=GROUP_ID,
+            text=f"⚠️ <b>DEPOSIT NEEDS ADMIN REVIEW</b>\n\n"
+                 f"🆔 Deal ID: <code>{deal_id}</code>\n"
+                 f"💵 Amount: {amount} USDT\n"
+                 f"🔗 TX Hash: <code>{transfer['tx_hash']}</code>\n"
+                 f"🚨 Reason: {reason}\n\n"
+                 f"🔍 Check the escrow wallet on Polygonscan and refund if it was paid twice",
+            parse_mode='HTML'
+        )
+    except:
+        pass
+
+def mark_deposit_received(deal_id, transfer, payment_id):
+    """Move a deal to usdt_deposited and tell the participants what to do next"""
+    print(f"✅ Payment verified for deal {deal_id}")
+    
+    # Update deal status with enhanced security
+    db = load_db()  # Reload to ensure fresh data
+    if deal_id not in db or db[deal_id]["status"] != "waiting_usdt_deposit":
+        print(f"⚠️ Deal {deal_id} status changed or not found during processing")
+        processed_deposits.flush()
+        return
+    
+    deal = db[deal_id]
+    deal["status"] = "usdt_deposited"
+    deal["deposit_confirmed_at"] = time.time()
+    deal["payment_id"] = payment_id  # Track payment ID
+    deal["deposit_tx_hash"] = transfer["tx_hash"]
+    deal.update(record_deposit_seen(deal_id, transfer))
+    
+    # Tie the mined deposit to its mempool pre-notification
+    if deal.get("pending_deposit_tx") == transfer["tx_hash"]:
+        deal["broadcast_to_mined_seconds"] = round(time.time() - deal["pending_deposit_seen_at"], 1)
+    save_db(db)
+    unwatch_deal(deal_id)
+    
+    # Enhanced notification with detailed sender information and workflow
+    sender = transfer["from"]
+    verified_as = "Dedicated Deposit Address" if deal_deposit_address(deal) else "Authorized Seller"
+    sender_info = (
+        f"🔗 <b>Payment Details:</b>\n"
+        f"📨 From: <code>{sender[:10]}...{sender[-4:]}</code>\n"
+        f"🔒 Verified: ✅ {verified_as}\n"
+        f"🕐 Received: {time.strftime('%H:%M:%S UTC', time.gmtime())}\n\n"
+    )
+    
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"✅ <b>USDT PAYMENT RECEIVED IN ESCROW!</b>\n\n"
+             f"💰 <b>Amount:</b> {deal['amount']} USDT\n"
+             f"🆔 <b>Deal ID:</b> <code>{deal_id}</code>\n"
+             f"👥 <b>Participants:</b> {deal['buyer']} ↔️ {deal['seller']}\n\n"
+             f"{sender_info}"
+             f"⛓️ <b>Deposit seen</b> - USDT can be released after {DEPOSIT_FINALITY_BLOCKS} confirmations\n\n"
+             f"📋 <b>CRITICAL WORKFLOW:</b>\n\n"
+             f"1️⃣ <b>{deal['buyer']} - Send Fiat Payment:</b>\n"
+             f"   💸 Send fiat payment to {deal['seller']}\n"
+             f"   ✅ Use <code>/paid</code> ONLY after sending fiat\n\n"
+             f"2️⃣ <b>{deal['seller']} - Confirm Receipt:</b>\n"
+             f"   ⏳ Wait for fiat from {deal['buyer']}\n"
+             f"   ✅ Use <code>/received</code> ONLY after receiving fiat\n\n"
+             f"🔐 <b>Security:</b> USDT releases ONLY when BOTH confirm\n"
+             f"⚠️ <b>Important:</b> No premature confirmations allowed!",
+        parse_mode='HTML'
+    )
+
+def cancel_deal_verification_failed(db, deal_id, received_amount):
+    """Cancel a deal whose deposit did not come from the registered seller wallet"""
+    deal = db[deal_id]
+    seller_wallet = deal.get("seller_wallet", "Not set")
+    print(f"❌ CRITICAL: Payment verification failed for deal {deal_id}")
+    
+    # Cancel deal due to wrong sender or verification failure
+    deal["status"] = "cancelled_verification_failed"
+    deal["received_amount"] = received_amount
+    deal["failure_reason"] = "Payment sender verification failed"
+    save_db(db)
+    unwatch_deal(deal_id)
+    
+    # Notify about cancellation
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"❌ <b>DEAL CANCELLED - VERIFICATION FAILED</b>\n\n"
+             f"🆔 Deal ID: <code>{deal_id}</code>\n"
+             f"💵 Amount: {received_amount} USDT received\n"
+             f"⚠️ Payment could not be verified from authorized sender\n"
+             f"🔒 Expected from: {deal['seller']} ({seller_wallet[:10]}...)\n\n"
+             f"🛠️ <b>SECURITY ALERT:</b>\n"
+             f"📞 Only verified seller payments are accepted\n"
+             f"🔔 Admins will process the refund manually\n\n"
+             f"🚨 <b>This prevents payment fraud and unauthorized deposits</b>",
+        parse_mode='HTML'
+    )
+    
+    # Alert admins with detailed info
+    admin_msg = (
+        f"🚨 <b>CRITICAL SECURITY ALERT: PAYMENT VERIFICATION FAILED</b>\n\n"
+        f"🆔 Deal ID: <code>{deal_id}</code>\n"
+        f"💵 Amount: {received_amount} USDT\n"
+        f"👥 Expected from: {deal['seller']} ({seller_wallet})\n"
+        f"❌ Verification failed - payment rejected\n\n"
+        f"🔍 Possible causes:\n"
+        f"• Payment from unauthorized wallet\n"
+        f"• Network/blockchain query error\n"
+        f"• Amount mismatch\n\n"
+        f"🛠️ Manual refund required with /emergency {deal_id} WALLET_ADDRESS"
+    )
+    
+    for admin in ADMIN_USERNAMES:
+        try:
+            bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
+            break
+        except Exception as e:
+            print(f"Failed to notify admin: {e}")
+            continue
+
+def require_admin_verification(db, deal_id, received_amount):
+    """Hold a deposit for manual review when the seller has no wallet to verify against"""
+    deal = db[deal_id]
+    
+    # CRITICAL SECURITY ENHANCEMENT: If seller wallet not set, require admin verification
+    print(f"⚠️ SECURITY ALERT: Deal {deal_id} has no seller wallet set - requiring admin verification")
+    
+    deal["status"] = "pending_admin_verification"
+    deal["received_amount"] = received_amount
+    deal["verification_required_reason"] = "No seller wallet for verification"
+    save_db(db)
+    unwatch_deal(deal_id)
+    
+    # Notify that admin verification is required
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"⚠️ <b>PAYMENT REQUIRES ADMIN VERIFICATION</b>\n\n"
+             f"🆔 Deal ID: <code>{deal_id}</code>\n"
+             f"💵 Amount: {deal['amount']} USDT received\n"
+             f"❌ Seller {deal['seller']} has no wallet address set\n"
+             f"🔒 Cannot verify payment sender automatically\n\n"
+             f"🛠️ <b>ADMIN ACTION REQUIRED:</b>\n"
+             f"📞 Manual verification and approval needed\n"
+             f"🔔 Use /verify {deal_id} to approve after checking blockchain\n\n"
+             f"🚨 <b>Security:</b> Prevents unauthorized deposits without verification",
+        parse_mode='HTML'
+    )
+
+def cancel_deal_wrong_amount(db, deal_id, received_amount):
+    """Cancel a deal whose seller deposited more or less than the deal amount"""
+    deal = db[deal_id]
+    expected_amount = deal["amount"]
+    overpaid = received_amount > expected_amount
+    
+    if overpaid:
+        print(f"⚠️ Overpayment detected for deal {deal_id}: Received {received_amount}, Expected {expected_amount}")
+        title = "DEAL CANCELLED - WRONG AMOUNT"
+        detail = "⚠️ Amount mismatch detected"
+        admin_title = "ADMIN ALERT: WRONG PAYMENT AMOUNT"
+    else:
+        print(f"⚠️ Underpayment detected for deal {deal_id}: Received {received_amount}, Expected {expected_amount}")
+        title = "DEAL CANCELLED - INSUFFICIENT AMOUNT"
+        detail = "⚠️ Insufficient payment detected"
+        admin_title = "ADMIN ALERT: INSUFFICIENT PAYMENT"
+    
+    # Cancel deal due to wrong amount
+    deal["status"] = "cancelled_wrong_amount"
+    deal["received_amount"] = received_amount
+    save_db(db)
+    unwatch_deal(deal_id)
+    
+    # Notify about cancellation
+    bot.send_message(
+        chat_id=GROUP_ID,
+        text=f"❌ <b>{title}</b>\n\n"
+             f"🆔 Deal ID: <code>{deal_id}</code>\n"
+             f"💵 Expected: {expected_amount} USDT\n"
+             f"💰 Received: {received_amount} USDT\n"
+             f"{detail}\n\n"
+             f"🛠️ <b>ADMIN INTERVENTION REQUIRED</b>\n"
+             f"📞 Deal cancelled, waiting for admin to handle refund\n"
+             f"👥 Participants: {deal['buyer']} ↔️ {deal['seller']}\n\n"
+             f"🔔 Admins will process the refund manually",
+        parse_mode='HTML'
+    )
+    
+    # Notify admins specifically
+    admin_msg = (
+        f"🚨 <b>{admin_title}</b>\n\n"
+        f"🆔 Deal ID: <code>{deal_id}</code>\n"
+        f"💵 Expected: {expected_amount} USDT\n"
+        f"💰 Received: {received_amount} USDT\n"
+        f"👥 Buyer: {deal['buyer']}\n"
+        f"👥 Seller: {deal['seller']}\n\n"
+        f"🛠️ Action required: Process refund with /emergency {deal_id} WALLET_ADDRESS"
+    )
+    
+    for admin in ADMIN_USERNAMES:
+        try:
+            bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
+            break
+        except:
+            continue
+
+def handle_legacy_payment(db, amount):
+    """Also handle legacy /deal transactions for backward compatibility"""
+    for tx_id, tx in db.items():
+        if tx.get("status") == "waiting_payment" and tx.get("amount", 0) <= amount:
+            tx["status"] = "paid"
+            save_db(db)
+            bot.send_message(
+                chat_id=GROUP_ID,
+                text=f"💰 Payment of {tx['amount']} USDT received for TX_ID {tx_id}!\n"
+                     f"{tx.get('seller', 'Seller')} may now proceed with delivery.\n"
+                     f"{tx.get('buyer', 'Buyer')}, confirm with /confirm {tx_id}"
+            )
+            return True
+    return False
+
+# === MONITOR CHECKPOINT ===
+monitor_checkpoint = MonitorCheckpoint(MONITOR_CHECKPOINT_FILE, MONITOR_CHECKPOINT_INTERVAL)
+
+def save_monitor_checkpoint():
+    """Checkpoint monitor progress; called periodically by the monitor and at shutdown"""
+    processed_deposits.flush()
+    monitor_checkpoint.save({"deposits": deposit_tracker.to_dict(), "watched": watch_set.to_dict()})
+
+def restore_monitor_checkpoint():
+    """Resume the payment monitor where it stopped; returns the last processed block or None"""
+    state = monitor_checkpoint.load()
+    if not state:
+        return None
+    
+    # Deals in the escrow DB stay the source of truth, the snapshots only fill gaps
+    db = load_db()
+    missing = {
+        deal_id: record for deal_id, record in state.get("deposits", {}).items()
+        if deal_id in db and deposit_tracker.get(deal_id) is None
+        and db[deal_id].get("deposit_state") in [DEPOSIT_SEEN, DEPOSIT_CONFIRMED]
+    }
+    if missing:
+        deposit_tracker.load({**missing, **deposit_tracker.to_dict()})
+    for address, deal_id in state.get("watched", {}).items():
+        if deal_id is None or db.get(deal_id, {}).get("status") == "waiting_usdt_deposit":
+            watch_set.add(address, deal_id)
+    
+    print(f"🔁 Resuming payment monitor after block {state['last_block']}")
+    return state["last_block"]
+
+def start_payment_monitor():
+    """Restore deposits, watched addresses and progress; returns the state monitor_tick() advances"""
+    restore_pending_deposits()
+    restore_watch_set()
+    last_block = restore_monitor_checkpoint()  # Last block whose transfers were processed
+    # After a restart the gap is scanned in range queries first
+    return {"last_block": last_block, "caught_up": last_block is None, "head": None}
+
+def monitor_tick(state):
+    """One pass of the payment monitor: expiries, payouts, confirmations and new transfers"""
+    last_block = state["last_block"]
+    
+    # Check for expired deals first
+    check_deal_expiry()
+    fill_escrow_nonce_gaps()
+    
+    # One JSON-RPC batch: head, fee history, hashes of blocks holding tracked
+    # deposits, and new transfers to every watched deposit address.
+    # Transfers are scanned up to the head seen on the previous tick, by number:
+    # eth_blockNumber and eth_getLogs may be answered by different nodes, and
+    # "latest" on a lagging one would skip blocks for good.
+    scan_head = state["head"]
+    batch = RPCBatch(web3)
+    head_call = batch.block_number()
+    fee_call = batch.fee_history(FEE_HISTORY_BLOCKS, "latest", list(SPEED_PERCENTILES.values()))
+    hash_calls = {number: batch.block_hash(number) for number in deposit_tracker.block_numbers()}
+    logs_call = logs_to_block = None
+    if last_block is not None and state["caught_up"] and scan_head is not None and scan_head > last_block:
+        logs_to_block = min(scan_head, last_block + PAYMENT_MONITOR_MAX_BLOCKS)
+        logs_call = batch.get_logs(watch_set.build_filter(last_block + 1, logs_to_block))
+    batch.execute()
+    
+    head_number = head_call.result()
+    chain_head.update(head_number)
+    try:
+        fee_oracle.update(fee_call.result(), head_number)  # Keeps the fee sample current so payouts build offline
+    except Exception as e:
+        print(f"⚠️ Fee history refresh failed: {e}")
+    update_payouts(head_number)  # No round trip unless a payout is in flight
+    flush_payout_batch()
+    if last_block is None:
+        last_block = head_number
+    elif head_number - last_block > MONITOR_MAX_CATCHUP_BLOCKS:
+        print(f"⚠️ Monitor was {head_number - last_block} blocks behind, "
+              f"rescanning only the last {MONITOR_MAX_CATCHUP_BLOCKS}")
+        last_block = head_number - MONITOR_MAX_CATCHUP_BLOCKS
+        logs_call = None
+    state["last_block"] = last_block
+    
+    # Advance confirmations and catch reorged deposits
+    block_hashes = {number: call.result() for number, call in hash_calls.items()}
+    reorged_block = update_deposit_confirmations(head_number, block_hashes)
+    if reorged_block is not None:
+        # Rescan so a re-included deposit is picked up again, even if this tick fails
+        last_block = state["last_block"] = min(last_block, reorged_block - 1)
+        logs_call = None
+    
+    # Blocks past this tick's head are scanned next tick, once they are known to exist
+    scan_to = min(scan_head, head_number) if scan_head is not None else last_block
+    state["head"] = head_number
+    if logs_call is not None and scan_to == logs_to_block:
+        for transfer in watch_set.decode_logs(logs_call.result(), max_block=logs_to_block):
+            process_incoming_transfer(transfer)
+        advance_monitor(state, logs_to_block)
+    else:
+        # Catching up after a restart or reorg in bounded range queries. Each range is
+        # processed and checkpointed before the next, so a failed query costs only itself,
+        # and a long gap is spread over several ticks.
+        to_block = last_block
+        found = 0
+        for _ in range(MONITOR_CATCHUP_CHUNKS_PER_TICK):
+            if to_block >= scan_to:
+                break
+            chunk_end = min(scan_to, to_block + PAYMENT_MONITOR_MAX_BLOCKS)
+            transfers = watch_set.fetch_transfers(web3, to_block + 1, chunk_end)
+            for transfer in transfers:
+                process_incoming_transfer(transfer)
+            found += len(transfers)
+            to_block = chunk_end
+            advance_monitor(state, to_block)
+        if not state["caught_up"] and to_block > last_block:
+            print(f"⏩ Caught up on blocks {last_block + 1}-{to_block} of {scan_to}: {found} transfer(s)")
+    
+    advance_monitor(state, last_block)  # Checkpoints a clamp or rewind even when nothing was scanned
+    if scan_head is not None:
+        state["caught_up"] = state["last_block"] >= scan_to
+
+def advance_monitor(state, block):
+    """Record that transfers up to block are processed, checkpointing when due"""
+    state["last_block"] = max(state["last_block"], block)
+    monitor_checkpoint.advance(state["last_block"])
+    if monitor_checkpoint.due():
+        save_monitor_checkpoint()
+
 def monitor_payments():
-    last_balance = get_usdt_balance(verbose=True)  # Show initial balance on startup
-    print(f"🔍 Starting payment monitor with initial balance: {last_balance} USDT")
+    state = start_payment_monitor()
+    initial_balance = get_usdt_balance(verbose=True)  # Show initial balance on startup
+    print(f"🔍 Starting payment monitor with initial balance: {initial_balance} USDT")
+    print(f"👀 Watching {len(watch_set)} deposit address(es)")
     payment_lock = threading.RLock()  # Reentrant lock for complex operations
-    processed_payments = set()  # Track processed payments to prevent duplicates
     
     while True:
         try:
             with payment_lock:  # Ensure atomic operations
-                # Check for expired deals first
-                check_deal_expiry()
-                
-                db = load_db()
-                new_balance = get_usdt_balance()  # Silent monitoring - no verbose logging
-                
-                # Check if there's an increase in balance
-                if new_balance > last_balance:
-                    diff = new_balance - last_balance
-                    print(f"💰 Balance increase detected: +{diff} USDT (Total: {new_balance} USDT)")
-                    
-                    # Create unique payment identifier to prevent double processing
-                    payment_id = f"{int(time.time())}_{diff}_{new_balance}"
-                    
-                    if payment_id in processed_payments:
-                        print(f"⚠️ Payment {payment_id} already processed, skipping")
-                        last_balance = new_balance
-                        continue
-                    
-                    # Check for deals waiting for USDT deposit
-                    payment_matched = False
-                    for deal_id, deal in db.items():
-                        if deal["status"] == "waiting_usdt_deposit":
-                            expected_amount = deal["amount"]
-                            seller_wallet = deal.get("seller_wallet", "Not set")
-                            
-                            # Check if the deposit amount matches exactly (with tolerance for precision)
-                            if abs(diff - expected_amount) < 0.01:  # Increased tolerance slightly
-                                print(f"💰 Amount match found for deal {deal_id}: {expected_amount} USDT")
-                                
-                                # SECURITY CHECK: Secure payment claiming to prevent race conditions
-                                claim_ok, claim_msg = secure_payment_claim(deal_id, expected_amount)
-                                if not claim_ok:
-                                    print(f"❌ Payment claim failed for deal {deal_id}: {claim_msg}")
-                                    continue
-                                
-                                # Check if deal is still valid (not expired)
-                                try:
-                                    deal_timestamp = int(deal_id)
-                                    deal_age = time.time() - deal_timestamp
-                                    if deal_age > (DEAL_EXPIRY_MINUTES * 60):
-                                        print(f"❌ Deal {deal_id} expired {int(deal_age/60)} minutes ago, ignoring payment")
-                                        continue
-                                except (ValueError, TypeError):
-                                    print(f"⚠️ Invalid deal_id format: {deal_id}, processing anyway")
-                                
-                                # Mark payment as processed
-                                processed_payments.add(payment_id)
-                                payment_matched = True
-                                
-                                # Initialize tx_info
-                                tx_info = None
-                                
-                                # CRITICAL SECURITY: Always verify payment sender if seller has set wallet
-                                if seller_wallet != "Not set":
-                                    payment_verified, tx_info = verify_payment_sender(expected_amount, seller_wallet)
-                                    
-                                    if not payment_verified:
-                                        print(f"❌ CRITICAL: Payment verification failed for deal {deal_id}")
-                                        
-                                        # Cancel deal due to wrong sender or verification failure
-                                        db[deal_id]["status"] = "cancelled_verification_failed"
-                                        db[deal_id]["received_amount"] = diff
-                                        db[deal_id]["failure_reason"] = "Payment sender verification failed"
-                                        save_db(db)
-                                        
-                                        # Notify about cancellation
-                                        bot.send_message(
-                                            chat_id=GROUP_ID,
-                                            text=f"❌ <b>DEAL CANCELLED - VERIFICATION FAILED</b>\n\n"
-                                                 f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                                 f"💵 Amount: {expected_amount} USDT received\n"
-                                                 f"⚠️ Payment could not be verified from authorized sender\n"
-                                                 f"🔒 Expected from: {deal['seller']} ({seller_wallet[:10]}...)\n\n"
-                                                 f"🛠️ <b>SECURITY ALERT:</b>\n"
-                                                 f"📞 Only verified seller payments are accepted\n"
-                                                 f"🔔 Admins will process the refund manually\n\n"
-                                                 f"🚨 <b>This prevents payment fraud and unauthorized deposits</b>",
-                                            parse_mode='HTML'
-                                        )
-                                        
-                                        # Alert admins with detailed info
-                                        admin_msg = (
-                                            f"🚨 <b>CRITICAL SECURITY ALERT: PAYMENT VERIFICATION FAILED</b>\n\n"
-                                            f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                            f"💵 Amount: {expected_amount} USDT\n"
-                                            f"👥 Expected from: {deal['seller']} ({seller_wallet})\n"
-                                            f"❌ Verification failed - payment rejected\n\n"
-                                            f"🔍 Possible causes:\n"
-                                            f"• Payment from unauthorized wallet\n"
-                                            f"• Network/blockchain query error\n"
-                                            f"• Amount mismatch\n\n"
-                                            f"🛠️ Manual refund required with /emergency {deal_id} WALLET_ADDRESS"
-                                        )
-                                        
-                                        for admin in ADMIN_USERNAMES:
-                                            try:
-                                                bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
-                                                break
-                                            except Exception as e:
-                                                print(f"Failed to notify admin: {e}")
-                                                continue
-                                        continue
-                                else:
-                                    # CRITICAL SECURITY ENHANCEMENT: If seller wallet not set, require admin verification
-                                    print(f"⚠️ SECURITY ALERT: Deal {deal_id} has no seller wallet set - requiring admin verification")
-                                    
-                                    db[deal_id]["status"] = "pending_admin_verification"
-                                    db[deal_id]["received_amount"] = diff
-                                    db[deal_id]["verification_required_reason"] = "No seller wallet for verification"
-                                    save_db(db)
-                                    
-                                    # Notify that admin verification is required
-                                    bot.send_message(
-                                        chat_id=GROUP_ID,
-                                        text=f"⚠️ <b>PAYMENT REQUIRES ADMIN VERIFICATION</b>\n\n"
-                                             f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                             f"💵 Amount: {expected_amount} USDT received\n"
-                                             f"❌ Seller {deal['seller']} has no wallet address set\n"
-                                             f"🔒 Cannot verify payment sender automatically\n\n"
-                                             f"🛠️ <b>ADMIN ACTION REQUIRED:</b>\n"
-                                             f"📞 Manual verification and approval needed\n"
-                                             f"🔔 Use /verify {deal_id} to approve after checking blockchain\n\n"
-                                             f"🚨 <b>Security:</b> Prevents unauthorized deposits without verification",
-                                        parse_mode='HTML'
-                                    )
-                                    continue
-                                
-                                # Payment verified or seller wallet not set - proceed
-                                print(f"✅ Payment verified for deal {deal_id}")
-                                
-                                # Update deal status with enhanced security
-                                db = load_db()  # Reload to ensure fresh data
-                                if deal_id in db and db[deal_id]["status"] == "waiting_usdt_deposit":
-                                    db[deal_id]["status"] = "usdt_deposited"
-                                    db[deal_id]["deposit_confirmed_at"] = time.time()
-                                    db[deal_id]["payment_id"] = payment_id  # Track payment ID
-                                    if tx_info:
-                                        db[deal_id]["deposit_tx_hash"] = tx_info.get('tx_hash')
-                                    save_db(db)
-                                    
-                                    # Enhanced notification with detailed sender information and workflow
-                                    sender_info = ""
-                                    if seller_wallet != "Not set" and tx_info:
-                                        sender_info = (
-                                            f"🔗 <b>Payment Details:</b>\n"
-                                            f"📨 From: <code>{tx_info.get('from', seller_wallet)[:10]}...{tx_info.get('from', seller_wallet)[-4:]}</code>\n"
-                                            f"🔒 Verified: ✅ Authorized Seller\n"
-                                            f"🕐 Received: {time.strftime('%H:%M:%S UTC', time.gmtime())}\n\n"
-                                        )
-                                    elif seller_wallet != "Not set":
-                                        sender_info = f"🔒 Verified from seller's wallet: <code>{seller_wallet[:10]}...{seller_wallet[-4:]}</code>\n\n"
-                                    else:
-                                        sender_info = "⚠️ Payment received (sender verification skipped - no wallet set)\n\n"
-                                    
-                                    bot.send_message(
-                                        chat_id=GROUP_ID,
-                                        text=f"✅ <b>USDT PAYMENT RECEIVED IN ESCROW!</b>\n\n"
-                                             f"💰 <b>Amount:</b> {expected_amount} USDT\n"
-                                             f"🆔 <b>Deal ID:</b> <code>{deal_id}</code>\n"
-                                             f"👥 <b>Participants:</b> {deal['buyer']} ↔️ {deal['seller']}\n\n"
-                                             f"{sender_info}"
-                                             f"📋 <b>CRITICAL WORKFLOW:</b>\n\n"
-                                             f"1️⃣ <b>{deal['buyer']} - Send Fiat Payment:</b>\n"
-                                             f"   💸 Send fiat payment to {deal['seller']}\n"
-                                             f"   ✅ Use <code>/paid</code> ONLY after sending fiat\n\n"
-                                             f"2️⃣ <b>{deal['seller']} - Confirm Receipt:</b>\n"
-                                             f"   ⏳ Wait for fiat from {deal['buyer']}\n"
-                                             f"   ✅ Use <code>/received</code> ONLY after receiving fiat\n\n"
-                                             f"🔐 <b>Security:</b> USDT releases ONLY when BOTH confirm\n"
-                                             f"⚠️ <b>Important:</b> No premature confirmations allowed!",
-                                        parse_mode='HTML'
-                                    )
-                                else:
-                                    print(f"⚠️ Deal {deal_id} status changed or not found during processing")
-                                
-                                break
-                            
-                            elif diff > expected_amount:
-                                print(f"⚠️ Overpayment detected for deal {deal_id}: Received {diff}, Expected {expected_amount}")
-                                
-                                # Cancel deal due to wrong amount
-                                db[deal_id]["status"] = "cancelled_wrong_amount"
-                                db[deal_id]["received_amount"] = diff
-                                save_db(db)
-                                
-                                # Notify about cancellation
-                                bot.send_message(
-                                    chat_id=GROUP_ID,
-                                    text=f"❌ <b>DEAL CANCELLED - WRONG AMOUNT</b>\n\n"
-                                         f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                         f"💵 Expected: {expected_amount} USDT\n"
-                                         f"💰 Received: {diff} USDT\n"
-                                         f"⚠️ Amount mismatch detected\n\n"
-                                         f"🛠️ <b>ADMIN INTERVENTION REQUIRED</b>\n"
-                                         f"📞 Deal cancelled, waiting for admin to handle refund\n"
-                                         f"👥 Participants: {deal['buyer']} ↔️ {deal['seller']}\n\n"
-                                         f"🔔 Admins will process the refund manually",
-                                    parse_mode='HTML'
-                                )
-                                
-                                # Notify admins specifically
-                                admin_msg = (
-                                    f"🚨 <b>ADMIN ALERT: WRONG PAYMENT AMOUNT</b>\n\n"
-                                    f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                    f"💵 Expected: {expected_amount} USDT\n"
-                                    f"💰 Received: {diff} USDT\n"
-                                    f"👥 Buyer: {deal['buyer']}\n"
-                                    f"👥 Seller: {deal['seller']}\n\n"
-                                    f"🛠️ Action required: Process refund with /emergency {deal_id} WALLET_ADDRESS"
-                                )
-                                
-                                for admin in ADMIN_USERNAMES:
-                                    try:
-                                        bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
-                                        break
-                                    except:
-                                        continue
-                                break
-                            
-                            elif diff < expected_amount:
-                                print(f"⚠️ Underpayment detected for deal {deal_id}: Received {diff}, Expected {expected_amount}")
-                                
-                                # Cancel deal due to wrong amount
-                                db[deal_id]["status"] = "cancelled_wrong_amount"
-                                db[deal_id]["received_amount"] = diff
-                                save_db(db)
-                                
-                                # Notify about cancellation
-                                bot.send_message(
-                                    chat_id=GROUP_ID,
-                                    text=f"❌ <b>DEAL CANCELLED - INSUFFICIENT AMOUNT</b>\n\n"
-                                         f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                         f"💵 Expected: {expected_amount} USDT\n"
-                                         f"💰 Received: {diff} USDT\n"
-                                         f"⚠️ Insufficient payment detected\n\n"
-                                         f"🛠️ <b>ADMIN INTERVENTION REQUIRED</b>\n"
-                                         f"📞 Deal cancelled, waiting for admin to handle refund\n"
-                                         f"👥 Participants: {deal['buyer']} ↔️ {deal['seller']}\n\n"
-                                         f"🔔 Admins will process the refund manually",
-                                    parse_mode='HTML'
-                                )
-                                
-                                # Notify admins specifically
-                                admin_msg = (
-                                    f"🚨 <b>ADMIN ALERT: INSUFFICIENT PAYMENT</b>\n\n"
-                                    f"🆔 Deal ID: <code>{deal_id}</code>\n"
-                                    f"💵 Expected: {expected_amount} USDT\n"
-                                    f"💰 Received: {diff} USDT\n"
-                                    f"👥 Buyer: {deal['buyer']}\n"
-                                    f"👥 Seller: {deal['seller']}\n\n"
-                                    f"🛠️ Action required: Process refund with /emergency {deal_id} WALLET_ADDRESS"
-                                )
-                                
-                                for admin in ADMIN_USERNAMES:
-                                    try:
-                                        bot.send_message(chat_id=GROUP_ID, text=admin_msg, parse_mode='HTML')
-                                        break
-                                    except:
-                                        continue
-                                break
-                
-                # Clean up old processed payments (keep only last 100)
-                    if len(processed_payments) > 100:
-                        # Keep most recent 50 payments
-                        recent_payments = list(processed_payments)[-50:]
-                        processed_payments.clear()
-                        processed_payments.update(recent_payments)
-                
-                # Update balance tracker
-                last_balance = new_balance
-                
-            # Also handle legacy transactions for backward compatibility
-            if new_balance > last_balance:
-                diff = new_balance - last_balance
-                for tx_id, tx in db.items():
-                    if tx.get("status") == "waiting_payment" and tx.get("amount", 0) <= diff:
-                        tx["status"] = "paid"
-                        save_db(db)
-                        bot.send_message(
-                            chat_id=GROUP_ID,
-                            text=f"💰 Payment of {tx['amount']} USDT received for TX_ID {tx_id}!\n"
-                                 f"{tx.get('seller', 'Seller')} may now proceed with delivery.\n"
-                                 f"{tx.get('buyer', 'Buyer')}, confirm with /confirm {tx_id}"
-                        )
-                        break
+                monitor_tick(state)
                         
         except Exception as e:
             print(f"⚠️ Error in payment monitoring: {e}")
@@ -2830,7 +4006,7 @@ def monitor_payments():
             traceback.print_exc()
             # Continue monitoring despite errors
             
-        time.sleep(15)  # Reduced to 15 seconds for better responsiveness
+        time.sleep(PAYMENT_MONITOR_INTERVAL)  # Safe to poll fast: release waits for deposit finality
 
 # === FLASK SERVER FOR KEEPALIVE ===
 app = Flask(__name__)
@@ -2842,11 +4018,17 @@ def home():
 @app.route('/health')
 def health_check():
     try:
-        # Check Web3 connection
-        is_connected = web3.is_connected()
-        
-        # Check USDT balance (verifies blockchain connectivity)
-        balance = get_usdt_balance()
+        # Check Web3 connection and USDT balance in one RPC batch
+        batch = RPCBatch(web3)
+        batch.client_version()
+        balance_call = batch.token_balance(usdt.address, Web3.to_checksum_address(ESCROW_WALLET))
+        try:
+            batch.execute()
+            balance = balance_call.result() / (10 ** USDT_DECIMALS)
+            is_connected = True
+        except Exception:
+            balance = None
+            is_connected = False
         
         # Check if database files exist
         import os
@@ -2858,6 +4040,7 @@ def health_check():
                 "status": "healthy",
                 "web3_connected": is_connected,
                 "usdt_balance": balance,
+                "rpc": web3.provider.status() if hasattr(web3.provider, "status") else None,
                 "database_files": {
                     "escrows": db_exists,
                     "blacklist": blacklist_exists
@@ -2943,6 +4126,7 @@ def process_payment_webhook(webhook_data):
                     db[deal_id]["forwarded_amount"] = amount
                     db[deal_id]["forwarded_at"] = time.time()
                     save_db(db)
+                    unwatch_deal(deal_id)
                     
                     # Send Telegram notification
                     bot.send_message(
@@ -3020,14 +4204,46 @@ def create_forwarding_address(deal_id, user_id, amount):
 def run_flask():
     app.run(host='0.0.0.0', port=5000, debug=False)
 
+# === APP FACTORY ===
+def configure(**services):
+    """
+    Use ready-made services instead of building them, e.g. configure(web3=Web3(fake_chain), bot=fake_bot).
+    Call before first use: services built from web3 (usdt, multicall, ...) capture the client they were built with.
+    """
+    for name, service in services.items():
+        resource = globals().get(name)
+        if not isinstance(resource, LazyResource):
+            raise ValueError(f"Unknown service: {name}")
+        override(resource, service)
+
 # === MAIN EXECUTION ===
 if __name__ == "__main__":
+    require_config("BOT_TOKEN", BOT_TOKEN)
+    require_config("PRIVATE_KEY", PRIVATE_KEY)
+    print("Connected to Web3:", web3.is_connected())
+    
+    # Checkpoint the monitor on shutdown; SIGTERM exits through atexit too
+    atexit.register(save_monitor_checkpoint)
+    if TRACE_FILE:
+        atexit.register(close_trace)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     # Start background threads
     flask_thread = threading.Thread(target=run_flask, daemon=True)
     flask_thread.start()
     
     monitor_thread = threading.Thread(target=monitor_payments, daemon=True)
     monitor_thread.start()
+    
+    payout_thread = threading.Thread(target=run_payout_worker, daemon=True)
+    payout_thread.start()
+    
+    if MEMPOOL_WATCH_ENABLED:
+        start_mempool_watcher()
+    
+    if HD_DEPOSIT_ADDRESSES_ENABLED:
+        sweeper_thread = threading.Thread(target=run_sweeper, daemon=True)
+        sweeper_thread.start()
 
     # Start the bot
     print("🤖 Starting Escrow bot...")
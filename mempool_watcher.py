@@ -0,0 +1,122 @@
+"""
+Pending Transaction Watcher for Escrow Bot
+Spots USDT transfers to deposit addresses while they are still in the mempool
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# keccak("transfer(address,uint256)")[:4]
+TRANSFER_SELECTOR = bytes.fromhex("a9059cbb")
+
+
+def _to_bytes(data):
+    if isinstance(data, str):
+        return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return bytes(data)
+
+
+def decode_token_transfer(tx, token_address):
+    """Return (recipient, raw_amount) if tx calls token.transfer(), otherwise None"""
+    if not tx or not tx.get("to") or tx["to"].lower() != token_address.lower():
+        return None
+
+    data = _to_bytes(tx.get("input", b""))
+    if len(data) < 68 or data[:4] != TRANSFER_SELECTOR:
+        return None
+
+    recipient = "0x" + data[16:36].hex()
+    amount = int.from_bytes(data[36:68], "big")
+    return recipient, amount
+
+
+class MempoolWatcher:
+    """Poll a pending-transaction filter and report token transfers to watched addresses"""
+
+    def __init__(self, web3, token_address, get_watched_addresses, on_pending_transfer,
+                 poll_interval=1.0, max_remembered=5000):
+        self.web3 = web3
+        self.token_address = token_address
+        self.get_watched_addresses = get_watched_addresses
+        self.on_pending_transfer = on_pending_transfer
+        self.poll_interval = poll_interval
+        self.max_remembered = max_remembered
+        self.seen_hashes = OrderedDict()
+        self.pending_filter = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Install the pending filter and start polling in a daemon thread"""
+        try:
+            self.pending_filter = self.web3.eth.filter("pending")
+        except Exception as e:
+            print(f"⚠️ Mempool watcher disabled: RPC does not support pending filters ({e})")
+            return False
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        print("📡 Mempool watcher started")
+        return True
+
+    def stop(self, timeout=5.0):
+        """Stop polling and wait for a poll in progress to finish its callbacks"""
+        self.running = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def remember(self, tx_hash):
+        """Return True the first time a hash is seen; keep the memory bounded"""
+        if tx_hash in self.seen_hashes:
+            return False
+        self.seen_hashes[tx_hash] = True
+        if len(self.seen_hashes) > self.max_remembered:
+            self.seen_hashes.popitem(last=False)
+        return True
+
+    def poll_once(self):
+        """Process pending hashes that arrived since the last poll"""
+        watched = {address.lower() for address in self.get_watched_addresses()}
+        if not watched:
+            # Drain the filter so it does not grow, but skip the tx lookups
+            self.pending_filter.get_new_entries()
+            return 0
+
+        matched = 0
+        for entry in self.pending_filter.get_new_entries():
+            tx_hash = entry.hex() if hasattr(entry, "hex") else str(entry)
+            if not self.remember(tx_hash):
+                continue
+
+            try:
+                tx = self.web3.eth.get_transaction(tx_hash)
+            except Exception:
+                # Dropped or already replaced before we could look at it
+                continue
+
+            transfer = decode_token_transfer(tx, self.token_address)
+            if not transfer:
+                continue
+
+            recipient, amount = transfer
+            if recipient.lower() not in watched:
+                continue
+
+            matched += 1
+            self.on_pending_transfer(tx_hash, tx["from"], recipient, amount)
+        return matched
+
+    def run(self):
+        while self.running:
+            try:
+                self.poll_once()
+            except Exception as e:
+                print(f"⚠️ Error in mempool watcher: {e}")
+                # The node may have expired our filter - install a fresh one
+                try:
+                    self.pending_filter = self.web3.eth.filter("pending")
+                except Exception:
+                    pass
+            time.sleep(self.poll_interval)
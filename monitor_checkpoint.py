@@ -0,0 +1,65 @@
+"""
+Payment Monitor Checkpoint for Escrow Bot
+Persists how far the payment monitor got so a restart resumes instead of skipping blocks
+"""
+
+import json
+import os
+import threading
+import time
+
+
+class MonitorCheckpoint:
+    """
+    Last processed block plus snapshots of in-memory monitor state.
+
+    The monitor calls advance() after each tick has been fully processed and
+    saved; save() then writes at most once per interval_seconds (and always
+    when forced at shutdown). On startup the monitor rescans from the saved
+    block, so a deposit made while the bot was down is still attributed.
+    """
+
+    def __init__(self, path, interval_seconds=30):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.last_block = None
+        self.saved_at = 0
+        self.lock = threading.Lock()
+
+    def advance(self, block_number):
+        with self.lock:
+            if self.last_block is None or block_number > self.last_block:
+                self.last_block = block_number
+
+    def due(self):
+        return time.time() - self.saved_at >= self.interval_seconds
+
+    def save(self, state=None):
+        """Write last_block and state atomically; returns False if there is nothing to save yet"""
+        with self.lock:
+            if self.last_block is None:
+                return False
+            data = dict(state or {}, last_block=self.last_block, saved_at=time.time())
+
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"❌ Failed to save monitor checkpoint: {e}")
+            return False
+        self.saved_at = data["saved_at"]
+        return True
+
+    def load(self):
+        """Saved state ({} if there is none); also restores last_block"""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        with self.lock:
+            self.last_block = data.get("last_block")
+        return data
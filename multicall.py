@@ -0,0 +1,132 @@
+"""
+Multicall Aggregation for Escrow Bot
+Reads many token and native balances with a single Multicall3 eth_call at one block
+"""
+
+from rpc_batch import RPCBatch
+
+# Multicall3 is deployed at the same address on Polygon and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")     # balanceOf(address)
+GET_ETH_BALANCE_SELECTOR = bytes.fromhex("4d2301cc")  # getEthBalance(address)
+GET_BLOCK_NUMBER_SELECTOR = bytes.fromhex("42cbb15c")  # getBlockNumber()
+
+MULTICALL3_ABI = [
+    {
+        "name": "aggregate3",
+        "type": "function",
+        "stateMutability": "payable",
+        "inputs": [{
+            "name": "calls",
+            "type": "tuple[]",
+            "components": [
+                {"name": "target", "type": "address"},
+                {"name": "allowFailure", "type": "bool"},
+                {"name": "callData", "type": "bytes"},
+            ],
+        }],
+        "outputs": [{
+            "name": "returnData",
+            "type": "tuple[]",
+            "components": [
+                {"name": "success", "type": "bool"},
+                {"name": "returnData", "type": "bytes"},
+            ],
+        }],
+    },
+]
+
+
+def _address_arg(address):
+    return bytes(12) + bytes.fromhex(address.lower()[2:])
+
+
+def _decode_uint(success, data):
+    """uint256 return value, or None if the call reverted or returned garbage"""
+    if not success or len(data) < 32:
+        return None
+    return int.from_bytes(data[:32], "big")
+
+
+class Multicall:
+    """Balance reads packed into Multicall3.aggregate3 with allowFailure on every call"""
+
+    def __init__(self, web3, address=MULTICALL3_ADDRESS, max_calls=500):
+        self.web3 = web3
+        self.address = web3.to_checksum_address(address)
+        self.contract = web3.eth.contract(address=self.address, abi=MULTICALL3_ABI)
+        self.max_calls = max_calls  # Keep each eth_call well under the node's gas cap
+
+    def aggregate(self, calls, block="latest"):
+        """
+        calls: [(target, calldata bytes)]. Returns [(success, return bytes)] in order.
+        Every call may fail on its own without reverting the others.
+        """
+        results = []
+        for start in range(0, len(calls), self.max_calls):
+            chunk = [(self.web3.to_checksum_address(target), True, data)
+                     for target, data in calls[start:start + self.max_calls]]
+            results.extend(self.contract.functions.aggregate3(chunk).call(block_identifier=block))
+        return [(success, bytes(data)) for success, data in results]
+
+    def balances(self, token_address, holders, native=True, block="latest"):
+        """
+        Token (and native) balances for every holder, all read at the same block.
+        Returns (block number, {holder: {"token": int or None, "native": int or None}}).
+        A balance is None when its read failed; other holders are unaffected.
+        """
+        calls = [(self.address, GET_BLOCK_NUMBER_SELECTOR)]
+        for holder in holders:
+            calls.append((token_address, BALANCE_OF_SELECTOR + _address_arg(holder)))
+            if native:
+                calls.append((self.address, GET_ETH_BALANCE_SELECTOR + _address_arg(holder)))
+        if block == "latest" and len(calls) > self.max_calls:
+            # Several aggregate calls: pin them all to one height
+            block = self.web3.eth.block_number
+
+        try:
+            results = iter(self.aggregate(calls, block))
+        except Exception as e:
+            # Chain without Multicall3 (e.g. a local dev node): same reads as one JSON-RPC batch
+            print(f"⚠️ Multicall unavailable, falling back to batched reads: {e}")
+            return self.batched_balances(token_address, holders, native, block)
+
+        block_number = _decode_uint(*next(results))
+        balances = {}
+        for holder in holders:
+            entry = {"token": _decode_uint(*next(results)), "native": None}
+            if native:
+                entry["native"] = _decode_uint(*next(results))
+            balances[holder] = entry
+        return block_number, balances
+
+    def batched_balances(self, token_address, holders, native, block):
+        batch = RPCBatch(self.web3)
+        if block == "latest":
+            # Pin the batch to the current head so every read sees the same block
+            head_call = batch.block_number()
+            batch.execute()
+            block = head_call.result()
+
+        pending = {}
+        for holder in holders:
+            pending[holder] = (
+                batch.token_balance(token_address, holder, block),
+                batch.get_balance(holder, block) if native else None,
+            )
+        batch.execute()
+
+        balances = {}
+        for holder, (token_call, native_call) in pending.items():
+            balances[holder] = {"token": self.safe_result(token_call), "native": self.safe_result(native_call)}
+        return block, balances
+
+    @staticmethod
+    def safe_result(call):
+        if call is None:
+            return None
+        try:
+            return call.result()
+        except Exception:
+            return None
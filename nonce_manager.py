@@ -0,0 +1,126 @@
+"""
+Nonce Management for Escrow Bot
+Hands out escrow account nonces locally so payouts can be broadcast back to back
+"""
+
+import heapq
+import threading
+import time
+from contextlib import contextmanager
+
+# Node errors meaning the nonce is already taken on chain
+NONCE_TAKEN_ERRORS = ("nonce too low", "already known", "replacement transaction underpriced")
+
+
+def send_was_rejected(error):
+    """
+    True if the node answered a send with an error, so nothing was broadcast.
+    web3 raises ValueError for RPC errors; timeouts and connection errors are
+    OSErrors (requests' JSON decode error is both, and stays unclear).
+    """
+    return isinstance(error, ValueError) and not isinstance(error, OSError)
+
+
+class NonceManager:
+    """
+    Local nonce allocator for one account.
+
+    Syncs from the node's pending nonce once, then allocates under a lock.
+    Nonces the node rejected are reused first so later transactions are not
+    stuck behind a gap. A send that timed out or lost its connection may still
+    have been broadcast, so its nonce is never reused blindly: the allocator
+    resyncs from the pending nonce instead. While nothing is reserved, it also
+    re-syncs every resync_interval seconds, which repairs gaps left by dropped
+    transactions or sends made outside the bot.
+    """
+
+    def __init__(self, web3, address, resync_interval=300):
+        self.web3 = web3
+        self.address = web3.to_checksum_address(address)
+        self.resync_interval = resync_interval
+        self.next_nonce = None
+        self.gaps = []          # Min-heap of released nonces below next_nonce
+        self.reserved = set()   # Allocated, send not finished yet
+        self.synced_at = 0
+        self.lock = threading.Lock()
+
+    def _sync(self):
+        chain_nonce = self.web3.eth.get_transaction_count(self.address, "pending")
+        if self.next_nonce is not None and chain_nonce != self.next_nonce:
+            print(f"🔢 Escrow nonce resynced: local {self.next_nonce}, chain {chain_nonce}")
+        self.next_nonce = chain_nonce
+        self.gaps = [nonce for nonce in self.gaps if nonce >= chain_nonce]
+        heapq.heapify(self.gaps)
+        self.synced_at = time.time()
+
+    def allocate(self):
+        with self.lock:
+            stale = time.time() - self.synced_at > self.resync_interval
+            if self.next_nonce is None or (stale and not self.reserved and not self.gaps):
+                self._sync()
+
+            if self.gaps:
+                nonce = heapq.heappop(self.gaps)
+            else:
+                nonce = self.next_nonce
+                self.next_nonce += 1
+            self.reserved.add(nonce)
+            return nonce
+
+    def mark_sent(self, nonce):
+        with self.lock:
+            self.reserved.discard(nonce)
+
+    def release(self, nonce, error=None):
+        """
+        The send for nonce failed. Reuse it only if it never reached the node
+        (error is None) or the node refused it; resync if the chain already has
+        it or the outcome is unknown.
+        """
+        with self.lock:
+            self.reserved.discard(nonce)
+            message = str(error).lower() if error else ""
+            if any(reason in message for reason in NONCE_TAKEN_ERRORS):
+                self.next_nonce = None  # Resync on the next allocation
+                self.gaps = []
+            elif error is not None and not send_was_rejected(error):
+                # Timeout or dropped connection: the transaction may be in the mempool.
+                # Resync from the pending nonce as soon as nothing else is in flight.
+                self.synced_at = 0
+            elif self.next_nonce is not None and nonce < self.next_nonce:
+                heapq.heappush(self.gaps, nonce)
+
+    def fill_gaps(self, send):
+        """
+        Unblock later transactions when a released nonce is not reused soon.
+        send(nonce) must broadcast a harmless transaction (e.g. a 0-value self-transfer).
+        """
+        with self.lock:
+            if self.reserved or not self.gaps:
+                return 0
+            nonces = sorted(self.gaps)
+            self.gaps = []
+            self.reserved.update(nonces)
+
+        filled = 0
+        for nonce in nonces:
+            try:
+                send(nonce)
+            except Exception as e:
+                self.release(nonce, e)
+                print(f"⚠️ Could not fill nonce gap {nonce}: {e}")
+                continue
+            self.mark_sent(nonce)
+            filled += 1
+        return filled
+
+    @contextmanager
+    def reserve(self):
+        """with manager.reserve() as nonce: build, sign and send one transaction"""
+        nonce = self.allocate()
+        try:
+            yield nonce
+        except Exception as e:
+            self.release(nonce, e)
+            raise
+        self.mark_sent(nonce)
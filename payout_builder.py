@@ -0,0 +1,50 @@
+"""
+Payout Transaction Builder for Escrow Bot
+Encodes ERC-20 transfers and signs escrow payouts locally, without RPC round trips
+"""
+
+from eth_account import Account
+from eth_utils import to_checksum_address
+
+TRANSFER_SELECTOR = bytes.fromhex("a9059cbb")  # transfer(address,uint256)
+MAX_UINT256 = 2 ** 256 - 1
+
+
+def encode_transfer(recipient, amount_wei):
+    """Calldata for transfer(recipient, amount_wei): selector + two 32-byte words"""
+    address = bytes.fromhex(recipient[2:] if recipient.startswith(("0x", "0X")) else recipient)
+    if len(address) != 20:
+        raise ValueError(f"Invalid recipient address: {recipient}")
+    if not 0 <= amount_wei <= MAX_UINT256:
+        raise ValueError(f"Invalid transfer amount: {amount_wei}")
+    return "0x" + (TRANSFER_SELECTOR + bytes(12) + address + amount_wei.to_bytes(32, "big")).hex()
+
+
+class PayoutBuilder:
+    """
+    Transfer transactions stamped from a fixed template.
+
+    Sender, token, chain id and value never change between payouts, so they
+    are resolved once; each payout only adds calldata, nonce, gas and fees
+    supplied by the caller from its local caches. The signing account is
+    derived from the key once instead of on every sign.
+    """
+
+    def __init__(self, private_key, token_address, chain_id, gas_limit):
+        self.account = Account.from_key(private_key)
+        self.template = {
+            "from": self.account.address,
+            "to": to_checksum_address(token_address),
+            "value": 0,
+            "chainId": chain_id,
+            "gas": gas_limit,
+        }
+
+    def build(self, recipient, amount_wei, nonce, fees, gas=None):
+        txn = dict(self.template, data=encode_transfer(recipient, amount_wei), nonce=nonce, **fees)
+        if gas:
+            txn["gas"] = gas
+        return txn
+
+    def sign(self, txn):
+        return self.account.sign_transaction(txn)
@@ -0,0 +1,139 @@
+"""
+Durable Payout Job Queue for Escrow Bot
+Payout jobs keyed by deal id, persisted to a JSON file and run by a dedicated worker
+"""
+
+import json
+import os
+import threading
+import time
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_INTERRUPTED = "interrupted"  # Was running when the bot stopped; the transfer may or may not be out
+
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+
+
+class PayoutQueue:
+    """
+    FIFO of payout jobs, at most one active job per deal.
+
+    Every state change is written to disk before it takes effect, so a
+    restart resumes queued jobs. A job that was running at the time of a
+    crash is never re-run automatically: it is marked interrupted for an
+    admin (or the intent log) to settle, because its transfer may already
+    have been broadcast. Finished jobs are kept for keep_seconds so repeated
+    requests for the same deal are recognised as duplicates.
+    """
+
+    def __init__(self, path, keep_seconds=7 * 24 * 3600):
+        self.path = path
+        self.keep_seconds = keep_seconds
+        self.jobs = {}  # deal_id -> job, in enqueue order
+        self.condition = threading.Condition()
+        self.load()
+
+    def enqueue(self, deal_id, action, args=None, reply_to=None):
+        """
+        Add a job unless one is already queued, running or interrupted for the deal.
+        Returns (job, created). reply_to is (chat_id, message_id) for the result message.
+        """
+        with self.condition:
+            existing = self.jobs.get(deal_id)
+            if existing and existing["state"] in ACTIVE_STATES + (JOB_INTERRUPTED,):
+                return dict(existing), False
+
+            job = {
+                "deal_id": deal_id,
+                "action": action,
+                "args": args or {},
+                "reply_to": list(reply_to) if reply_to else None,
+                "state": JOB_QUEUED,
+                "enqueued_at": time.time(),
+                "attempts": 0,
+            }
+            # Re-inserting moves a retried deal to the back of the queue
+            self.jobs.pop(deal_id, None)
+            self.jobs[deal_id] = job
+            self._save()
+            self.condition.notify()
+            return dict(job), True
+
+    def get(self, deal_id):
+        with self.condition:
+            job = self.jobs.get(deal_id)
+            return dict(job) if job else None
+
+    def pending_count(self):
+        with self.condition:
+            return sum(1 for job in self.jobs.values() if job["state"] == JOB_QUEUED)
+
+    def interrupted(self):
+        with self.condition:
+            return [dict(job) for job in self.jobs.values() if job["state"] == JOB_INTERRUPTED]
+
+    def next_job(self, timeout=None):
+        """Block until a job is queued, mark it running and return it (None on timeout)"""
+        with self.condition:
+            deadline = time.time() + timeout if timeout is not None else None
+            while True:
+                job = next((job for job in self.jobs.values() if job["state"] == JOB_QUEUED), None)
+                if job:
+                    job["state"] = JOB_RUNNING
+                    job["started_at"] = time.time()
+                    job["attempts"] += 1
+                    self._save()
+                    return dict(job)
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+    def _finish(self, deal_id, state, **fields):
+        with self.condition:
+            job = self.jobs.get(deal_id)
+            if not job:
+                return
+            job.update(fields, state=state, finished_at=time.time())
+            self._prune()
+            self._save()
+
+    def complete(self, deal_id, result=None):
+        self._finish(deal_id, JOB_DONE, result=result)
+
+    def fail(self, deal_id, error):
+        self._finish(deal_id, JOB_FAILED, error=str(error))
+
+    def resolve(self, deal_id, state, note=None):
+        """Settle an interrupted job once it is known whether its transfer went out"""
+        self._finish(deal_id, state, result=note)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for deal_id in [deal_id for deal_id, job in self.jobs.items()
+                        if job["state"] in (JOB_DONE, JOB_FAILED) and job.get("finished_at", 0) < cutoff]:
+            del self.jobs[deal_id]
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stored = []
+
+        with self.condition:
+            self.jobs = {job["deal_id"]: job for job in stored}
+            for job in self.jobs.values():
+                if job["state"] == JOB_RUNNING:
+                    job["state"] = JOB_INTERRUPTED
+            self._prune()
+
+    def _save(self):
+        # Stored as a list to keep the queue order
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(list(self.jobs.values()), f, indent=2)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,169 @@
+"""
+Payout Receipt Tracking for Escrow Bot
+Follows every outgoing payout until it is mined, bumping the fee on stuck transactions
+"""
+
+import math
+import threading
+
+from rpc_batch import RPCBatch
+
+PAYOUT_CONFIRMED = "confirmed"
+PAYOUT_REVERTED = "reverted"
+PAYOUT_DROPPED = "dropped"      # Nonce used by a transaction that is not ours
+PAYOUT_REPLACED = "replaced"    # Rebroadcast with a higher fee (still pending)
+PAYOUT_STUCK = "stuck"          # Out of fee bumps, needs an admin
+
+# geth rejects replacements that raise the fee by less than 10%
+MIN_BUMP_PERCENT = 10
+
+
+class PayoutTracker:
+    """
+    Pending payouts by deal id.
+
+    Each record keeps the unsigned transaction and every hash broadcast for
+    its nonce. poll() fetches all receipts in one JSON-RPC batch; a payout
+    with no receipt after bump_after_blocks is re-signed with a higher fee
+    and the same nonce, so whichever version is mined settles the deal.
+    """
+
+    def __init__(self, web3, send_txn, fee_oracle=None, bump_after_blocks=10, bump_percent=15, max_bumps=5):
+        self.web3 = web3
+        self.send_txn = send_txn  # send_txn(txn, deal_id) signs and broadcasts, returns the hash as hex
+        self.fee_oracle = fee_oracle
+        self.bump_after_blocks = bump_after_blocks
+        self.bump_percent = max(bump_percent, MIN_BUMP_PERCENT)
+        self.max_bumps = max_bumps
+        self.payouts = {}
+        self.lock = threading.Lock()
+
+    def track(self, deal_id, txn, tx_hash, sent_block, kind, deal_ids=None):
+        """deal_ids lists the deals settled by a batched payout tracked under one id"""
+        with self.lock:
+            self.payouts[deal_id] = {
+                "kind": kind,
+                "deal_ids": list(deal_ids) if deal_ids else [deal_id],
+                "nonce": txn["nonce"],
+                "txn": dict(txn),
+                "tx_hashes": [tx_hash],
+                "sent_block": sent_block,
+                "bumps": 0,
+                "nonce_gone_polls": 0,
+                "stuck_reported": False,
+            }
+
+    def untrack(self, deal_id):
+        with self.lock:
+            self.payouts.pop(deal_id, None)
+
+    def get(self, deal_id):
+        with self.lock:
+            record = self.payouts.get(deal_id)
+            return dict(record) if record else None
+
+    def pending_count(self):
+        with self.lock:
+            return len(self.payouts)
+
+    def bumped_fees(self, txn):
+        """Old fees raised by bump_percent, or the oracle's current fees if those are higher"""
+        factor = 1 + self.bump_percent / 100
+        current = self.fee_oracle.fees("fast") if self.fee_oracle else {}
+        if "gasPrice" in txn:
+            return {"gasPrice": max(math.ceil(txn["gasPrice"] * factor), current.get("maxFeePerGas", 0))}
+        priority = max(math.ceil(txn["maxPriorityFeePerGas"] * factor), current.get("maxPriorityFeePerGas", 0))
+        max_fee = max(math.ceil(txn["maxFeePerGas"] * factor), current.get("maxFeePerGas", 0), priority)
+        return {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": priority}
+
+    def replace(self, deal_id, record, head):
+        txn = dict(record["txn"], **self.bumped_fees(record["txn"]))
+        try:
+            tx_hash = self.send_txn(txn, deal_id)
+        except Exception as e:
+            # Typically "nonce too low": a version was mined meanwhile, the next poll sees it
+            print(f"⚠️ Fee bump for deal {deal_id} not broadcast: {e}")
+            return False
+
+        with self.lock:
+            if deal_id not in self.payouts:
+                return False
+            stored = self.payouts[deal_id]
+            stored["txn"] = txn
+            stored["tx_hashes"].append(tx_hash)
+            stored["sent_block"] = head
+            stored["bumps"] += 1
+        print(f"⛽ Payout for deal {deal_id} rebroadcast with higher fee (bump {stored['bumps']}): {tx_hash}")
+        return True
+
+    def poll(self, head):
+        """
+        Check every pending payout once. Returns [(deal_id, event, record, receipt)];
+        confirmed, reverted and dropped payouts stop being tracked.
+        """
+        with self.lock:
+            snapshot = {deal_id: dict(record, tx_hashes=list(record["tx_hashes"]))
+                        for deal_id, record in self.payouts.items()}
+        if not snapshot:
+            return []
+
+        batch = RPCBatch(self.web3)
+        receipt_calls = {
+            deal_id: [batch.receipt(tx_hash) for tx_hash in record["tx_hashes"]]
+            for deal_id, record in snapshot.items()
+        }
+        senders = {record["txn"]["from"] for record in snapshot.values()}
+        nonce_calls = {sender: batch.transaction_count(sender, "latest") for sender in senders}
+        batch.execute()
+
+        events = []
+        for deal_id, record in snapshot.items():
+            receipt = None
+            for call in receipt_calls[deal_id]:
+                try:
+                    receipt = call.result()
+                except Exception:
+                    receipt = None
+                if receipt:
+                    break
+
+            if receipt:
+                status = receipt["status"]
+                status = int(status, 16) if isinstance(status, str) else status
+                events.append((deal_id, PAYOUT_CONFIRMED if status == 1 else PAYOUT_REVERTED, record, receipt))
+                self.untrack(deal_id)
+                continue
+
+            mined_nonce = nonce_calls[record["txn"]["from"]].result()
+            if mined_nonce > record["nonce"]:
+                # Our nonce is used but none of our hashes has a receipt; confirm on a second poll
+                gone = 0
+                with self.lock:
+                    if deal_id in self.payouts:
+                        self.payouts[deal_id]["nonce_gone_polls"] += 1
+                        gone = self.payouts[deal_id]["nonce_gone_polls"]
+                if gone >= 2:
+                    events.append((deal_id, PAYOUT_DROPPED, record, None))
+                    self.untrack(deal_id)
+                continue
+
+            if head - record["sent_block"] < self.bump_after_blocks:
+                continue
+            if record["bumps"] < self.max_bumps:
+                if self.replace(deal_id, record, head):
+                    events.append((deal_id, PAYOUT_REPLACED, self.get(deal_id), None))
+            elif not record["stuck_reported"]:
+                with self.lock:
+                    if deal_id in self.payouts:
+                        self.payouts[deal_id]["stuck_reported"] = True
+                events.append((deal_id, PAYOUT_STUCK, record, None))
+        return events
+
+    def to_dict(self):
+        with self.lock:
+            return {deal_id: dict(record) for deal_id, record in self.payouts.items()}
+
+    def load(self, payouts):
+        """Replace tracked payouts, e.g. when restoring after a restart"""
+        with self.lock:
+            self.payouts = {deal_id: dict(record) for deal_id, record in payouts.items()}
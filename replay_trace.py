@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Trace Replay
+Feeds a recorded traffic trace into the real bot handlers against the local Telegram and chain stand-ins
+
+Messages are sent and deposits made at their recorded offsets divided by
+--speed (0 replays as fast as the bot keeps up); one block is mined per
+BLOCK_TIME seconds of trace time. At the end the stores are summarized and
+compared with the summary recorded when the trace was closed.
+
+Usage: python replay_trace.py TRACE [--speed 1] [--workers 4] [--settle 300] [--strict]
+"""
+
+import argparse
+import bisect
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+# Fixed throwaway credentials: Telegram and the chain are both local stand-ins
+os.environ.setdefault("BOT_TOKEN", "123456:simulated")
+os.environ.setdefault("PRIVATE_KEY", "0x" + "11" * 32)
+os.environ.pop("TRACE_FILE", None)  # Never record the replay into a trace
+
+from web3 import Web3
+from web3.middleware.geth_poa import geth_poa_middleware
+
+from fake_telegram import FakeBotAPI, MESSAGE_METHODS, reply_to_id
+from load_telegram import percentile
+from sim_chain import SimulatedChain
+from trace_recorder import (read_trace, pseudonym_user_id, state_summary, DEAL_PLACEHOLDER,
+                            EVENT_HEADER, EVENT_MESSAGE, EVENT_DEPOSIT, EVENT_STATE)
+
+BLOCK_TIME = 2.0        # Polygon block interval, in trace seconds
+OTHER_CHAT_ID = -1      # Stand-in for groups other than the bot's own
+QUIET_SECONDS = 1.0     # After settling, the bot is done once it has been silent this long
+
+
+def load_trace(path):
+    """(events with offsets from the first session's start, last recorded state summary)
+
+    Restarts append a new session with its own clock; sessions are laid end to end.
+    """
+    events = []
+    recorded_state = None
+    offset = 0.0
+    end = 0.0
+    for event in read_trace(path):
+        if event["k"] == EVENT_HEADER:
+            offset = end
+            continue
+        at = offset + event["t"]
+        end = max(end, at)
+        if event["k"] == EVENT_STATE:
+            recorded_state = event["state"]
+        elif event["k"] in (EVENT_MESSAGE, EVENT_DEPOSIT):
+            events.append(dict(event, t=at))
+    return events, recorded_state
+
+
+def state_divergence(recorded, replayed):
+    """[(key, recorded value, replayed value)] for every summary entry that differs"""
+    def flatten(summary, prefix=""):
+        flat = {}
+        for key, value in summary.items():
+            if isinstance(value, dict):
+                flat.update(flatten(value, f"{prefix}{key}."))
+            else:
+                flat[f"{prefix}{key}"] = value
+        return flat
+
+    recorded, replayed = flatten(recorded), flatten(replayed)
+    return [(key, recorded.get(key, 0), replayed.get(key, 0))
+            for key in sorted(set(recorded) | set(replayed)) if recorded.get(key, 0) != replayed.get(key, 0)]
+
+
+class ReplayClock:
+    """Trace time: wall time scaled by speed, or driven by the dispatcher when speed is 0"""
+
+    def __init__(self, speed):
+        self.speed = speed
+        self.started = time.perf_counter()
+        self.virtual = 0.0
+
+    def now(self):
+        if self.speed:
+            return (time.perf_counter() - self.started) * self.speed
+        return self.virtual
+
+    def wait_until(self, at):
+        """Block until trace time at; returns how late the call was, in wall seconds"""
+        if not self.speed:
+            self.virtual = max(self.virtual, at)
+            return 0.0
+        delay = self.started + at / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+            return 0.0
+        return -delay
+
+
+class Replay:
+    """One replay of a trace through main, with its stand-ins and measurements"""
+
+    def __init__(self, events, speed=1.0, workers=4, settle=300.0, rate_limits=True):
+        self.events = events
+        self.settle = settle
+        self.clock = ReplayClock(speed)
+        self.stopping = threading.Event()
+        self.sent = []        # [(event, message, wall time sent)]
+        self.lag = 0.0        # Worst dispatch delay behind the trace's schedule
+        self.ticked = threading.Condition()
+        self.ticked_to = -1.0  # Trace time the payment monitor has last caught up to
+
+        os.chdir(tempfile.mkdtemp())  # Stores are written relative to the working directory
+        import main
+        from lazy_resource import reset
+        self.main = main
+
+        self.chain = SimulatedChain(block_time=BLOCK_TIME)
+        client = Web3(self.chain)
+        client.middleware_onion.inject(geth_poa_middleware, layer=0)
+        main.configure(web3=client)
+        main.TRACE_FILE = None
+        main.BOT_WORKER_THREADS = workers
+        reset(main.bot)  # Rebuilt with the worker count above
+        if not rate_limits:
+            main.RATE_LIMIT_COMMANDS_PER_MINUTE = 10 ** 9
+            main.RATE_LIMIT_ORDERS_PER_HOUR = 10 ** 9
+
+        # PRIVATE_KEY's account plays the escrow wallet, so replayed deposits fund replayed payouts
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.ESCROW_WALLET = main.payout_builder.account.address
+        main.watch_set.add(main.ESCROW_WALLET)
+        self.chain.set_native_balance(main.ESCROW_WALLET, 10 ** 20)
+
+        self.api = FakeBotAPI().start()
+
+    # === STAND-INS ===
+
+    def run_chain(self):
+        """Mine to the trace clock and run the payment monitor, as monitor_payments does"""
+        state = self.main.start_payment_monitor()
+        mined_to = -1.0
+        while not self.stopping.is_set():
+            now = self.clock.now()
+            due = int(now // BLOCK_TIME) - self.chain.head
+            if self.clock.speed:
+                self.chain.mine(max(due, 0))
+            else:
+                self.chain.mine(max(due, 1))  # As fast as possible: pending payouts still get mined
+            try:
+                self.main.monitor_tick(state)
+            except Exception as e:
+                print(f"⚠️ Error in payment monitoring: {e}")
+            with self.ticked:
+                # A tick scans transfers up to the head the previous tick saw
+                self.ticked_to, mined_to = mined_to, now
+                self.ticked.notify_all()
+            self.stopping.wait(BLOCK_TIME / self.clock.speed if self.clock.speed else 0.01)
+
+    def deal_for(self, username):
+        """The newest deal the user is part of, else the newest deal, for {deal} arguments"""
+        db = self.main.load_db()
+        own = [deal_id for deal_id, deal in db.items() if f"@{username}" in (deal["buyer"], deal["seller"])]
+        candidates = own or list(db)
+        return max(candidates, key=int) if candidates else "0"
+
+    def wait_for_monitor(self, at):
+        """At full speed, keep deposits and commands in order by letting the monitor catch up first"""
+        with self.ticked:
+            while self.ticked_to < at and not self.stopping.is_set():
+                self.ticked.wait(1.0)
+
+    def dispatch(self, event):
+        if event["k"] == EVENT_DEPOSIT:
+            self.chain.deposit(Web3.to_checksum_address(event["f"]), self.main.ESCROW_WALLET, event["v"])
+            return
+
+        username = event["u"]
+        if username.startswith("a"):
+            admins = self.main.ADMIN_USERNAMES
+            username = admins[int(username[1:]) % len(admins)]
+        chat_id = {"g": self.main.GROUP_ID, "o": OTHER_CHAT_ID}.get(event["c"])
+        if "x" in event:
+            text = event["x"]
+            if DEAL_PLACEHOLDER in text:
+                text = text.replace(DEAL_PLACEHOLDER, self.deal_for(username))
+        else:
+            text = "x" * max(1, min(event["n"], 4096))
+        message = self.api.send_command(pseudonym_user_id(event["u"]), username, text, chat_id)
+        self.sent.append((event, message, time.time()))
+
+    # === RUN ===
+
+    def run(self):
+        main = self.main
+        previous_url = self.api.install()
+        threads = [
+            threading.Thread(target=main.bot.polling,
+                             kwargs={"non_stop": True, "interval": 0, "long_polling_timeout": 1}, daemon=True),
+            threading.Thread(target=main.run_payout_worker, daemon=True),
+            threading.Thread(target=self.run_chain, daemon=True),
+        ]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.clock.started = time.perf_counter()  # Trace time starts with the stand-ins
+                for thread in threads:
+                    thread.start()
+                started = time.perf_counter()
+                for event in self.events:
+                    self.lag = max(self.lag, self.clock.wait_until(event["t"]))
+                    if not self.clock.speed:
+                        self.wait_for_monitor(event["t"])
+                    self.dispatch(event)
+                dispatched = time.perf_counter() - started
+
+                # Let confirmations, finality and payouts play out, then wait for the bot to go quiet
+                self.clock.wait_until((self.events[-1]["t"] if self.events else 0) + self.settle)
+                calls = -1
+                while calls != len(self.api.calls):
+                    calls = len(self.api.calls)
+                    time.sleep(QUIET_SECONDS)
+
+                self.stopping.set()
+                main.bot.stop_polling()
+                threads[2].join(timeout=10)
+                replayed_state = state_summary(main.load_db(), main.load_orders(), main.load_wallets())
+        finally:
+            self.api.stop()
+            from telebot import apihelper
+            apihelper.API_URL = previous_url
+        return dispatched, replayed_state
+
+    def latencies(self):
+        """[(command, seconds or None)] for every replayed command, from the first reply to it"""
+        replies = {}
+        untagged = defaultdict(list)  # chat -> bot messages that reply to nothing, in order
+        for call in self.api.calls:
+            if call["method"] not in MESSAGE_METHODS:
+                continue
+            reply_to = reply_to_id(call["params"])
+            if reply_to is not None:
+                replies.setdefault(reply_to, call)
+            else:
+                untagged[call["params"].get("chat_id")].append(call)
+
+        samples = []
+        for event, message, sent_at in self.sent:
+            if "x" not in event:
+                continue  # Plain text gets no answer
+            reply = replies.get(message["message_id"])
+            if reply is None and event["c"] == "p":
+                chat_calls = untagged[message["chat"]["id"]]
+                index = bisect.bisect_right([call["message_id"] for call in chat_calls], message["message_id"])
+                reply = chat_calls[index] if index < len(chat_calls) else None
+            samples.append((event["x"].split()[0], reply["at"] - sent_at if reply else None))
+        return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("trace", help="trace file written with TRACE_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="trace seconds per wall second; 0 = as fast as possible")
+    parser.add_argument("--workers", type=int, default=4, help="bot handler threads")
+    parser.add_argument("--settle", type=float, default=300.0,
+                        help="trace seconds to keep the chain running after the last event")
+    parser.add_argument("--no-rate-limits", action="store_true", help="lift per-user command limits")
+    parser.add_argument("--strict", action="store_true", help="exit 1 on divergence or unanswered commands")
+    args = parser.parse_args()
+
+    events, recorded_state = load_trace(args.trace)
+    replay = Replay(events, args.speed, args.workers, args.settle, not args.no_rate_limits)
+    dispatched, replayed_state = replay.run()
+    samples = replay.latencies()
+    latencies = [latency for _, latency in samples if latency is not None]
+    span = events[-1]["t"] - events[0]["t"] if events else 0.0
+    deposits = sum(1 for event in events if event["k"] == EVENT_DEPOSIT)
+
+    print(f"🔁 TRACE REPLAY: {len(events) - deposits} messages, {deposits} deposits, "
+          f"{span:.1f}s of traffic at {f'{args.speed:g}x' if args.speed else 'full speed'}")
+    print("=" * 60)
+    print(f"{'command':>14} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for command in sorted({command for command, _ in samples}):
+        values = [latency for name, latency in samples if name == command and latency is not None]
+        print(f"{command:>14} {len(values):7d} {percentile(values, 0.5) * 1000:8.1f} {percentile(values, 0.9) * 1000:8.1f} "
+              f"{percentile(values, 0.99) * 1000:8.1f} {max(values, default=0) * 1000:8.1f}")
+    print(f"{'all':>14} {len(latencies):7d} {percentile(latencies, 0.5) * 1000:8.1f} "
+          f"{percentile(latencies, 0.9) * 1000:8.1f} {percentile(latencies, 0.99) * 1000:8.1f} "
+          f"{max(latencies, default=0) * 1000:8.1f}")
+    print(f"⚡ {len(replay.sent) / dispatched if dispatched else 0:.0f} messages/s dispatched over {dispatched:.2f}s, "
+          f"worst schedule lag {replay.lag * 1000:.0f} ms")
+    unanswered = len(samples) - len(latencies)
+    print(f"📨 answered {len(latencies)}/{len(samples)} commands, {unanswered} unanswered")
+
+    divergence = []
+    if recorded_state is None:
+        print("ℹ️ Trace has no recorded final state to compare with")
+    else:
+        divergence = state_divergence(recorded_state, replayed_state)
+        for key, recorded, replayed in divergence:
+            print(f"⚠️ Diverged: {key} recorded {recorded}, replayed {replayed}")
+        if not divergence:
+            print("✅ Final state matches the recording")
+    return 1 if args.strict and (divergence or unanswered) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
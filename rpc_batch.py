@@ -0,0 +1,107 @@
+"""
+JSON-RPC Batching for Escrow Bot
+Collects independent chain reads and sends them in one round trip
+"""
+
+# keccak("balanceOf(address)")[:4]
+BALANCE_OF_SELECTOR = "0x70a08231"
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16) if value not in ("0x", "") else 0
+    return value
+
+
+class BatchCall:
+    """Placeholder for one call's result, filled in when the batch executes"""
+
+    def __init__(self, method, params, formatter=None):
+        self.method = method
+        self.params = params
+        self.formatter = formatter
+        self.response = None
+
+    def result(self):
+        if self.response is None:
+            raise RuntimeError(f"Batch not executed yet ({self.method})")
+        if "error" in self.response:
+            error = self.response["error"]
+            raise ValueError(f"{self.method} failed: {error.get('message', error)}")
+        value = self.response.get("result")
+        return self.formatter(value) if self.formatter else value
+
+
+class RPCBatch:
+    """
+    Queue reads, then execute() them as a single JSON-RPC batch.
+
+    Providers without make_batch_request fall back to one request per call,
+    so callers do not need to care which transport is in use.
+    """
+
+    def __init__(self, web3):
+        self.web3 = web3
+        self.calls = []
+
+    def __len__(self):
+        return len(self.calls)
+
+    def add(self, method, params, formatter=None):
+        call = BatchCall(method, params, formatter)
+        self.calls.append(call)
+        return call
+
+    def execute(self):
+        """Send every queued call; results are read from the returned BatchCall objects"""
+        if not self.calls:
+            return
+        provider = self.web3.provider
+        if hasattr(provider, "make_batch_request"):
+            responses = provider.make_batch_request([(call.method, call.params) for call in self.calls])
+        else:
+            responses = [provider.make_request(call.method, call.params) for call in self.calls]
+
+        for call, response in zip(self.calls, responses):
+            call.response = response if response is not None else {"error": {"message": "missing from batch response"}}
+        self.calls = []
+
+    # Typed helpers for the reads the bot batches
+
+    def block_number(self):
+        return self.add("eth_blockNumber", [], _to_int)
+
+    def block_hash(self, block_number):
+        """Hash of the canonical block at a height, None if there is no block there"""
+        return self.add(
+            "eth_getBlockByNumber", [hex(block_number), False],
+            lambda block: block["hash"] if block else None
+        )
+
+    def get_balance(self, address, block="latest"):
+        return self.add("eth_getBalance", [address, block if isinstance(block, str) else hex(block)], _to_int)
+
+    def token_balance(self, token_address, holder, block="latest"):
+        data = BALANCE_OF_SELECTOR + "0" * 24 + holder.lower()[2:]
+        return self.add(
+            "eth_call", [{"to": token_address, "data": data}, block if isinstance(block, str) else hex(block)],
+            _to_int
+        )
+
+    def transaction_count(self, address, block="pending"):
+        return self.add("eth_getTransactionCount", [address, block], _to_int)
+
+    def receipt(self, tx_hash):
+        """Transaction receipt, None while the transaction is not mined"""
+        return self.add("eth_getTransactionReceipt", [tx_hash])
+
+    def get_logs(self, log_filter):
+        return self.add("eth_getLogs", [log_filter])
+
+    def fee_history(self, block_count, newest_block, percentiles):
+        """Raw eth_feeHistory result; FeeOracle.update() accepts it as is"""
+        newest = newest_block if isinstance(newest_block, str) else hex(newest_block)
+        return self.add("eth_feeHistory", [hex(block_count), newest, percentiles])
+
+    def client_version(self):
+        return self.add("web3_clientVersion", [])
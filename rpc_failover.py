@@ -0,0 +1,247 @@
+"""
+RPC Failover for Escrow Bot
+Spreads calls over several RPC endpoints: hedged reads, circuit breakers and
+sticky writes so one slow or rate-limited node cannot stall the bot
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from web3.providers.base import BaseProvider
+
+from rpc_transport import IDEMPOTENT_METHODS, PooledHTTPProvider
+from single_flight import SingleFlight
+
+# Nonce reads must see every transaction sent before them, so a caller never joins
+# a read that was already in flight
+UNCOALESCED_METHODS = {"eth_getTransactionCount"}
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class EndpointHealth:
+    """Rolling latency samples and a circuit breaker for one endpoint"""
+
+    def __init__(self, uri, failure_threshold=5, reset_timeout=30, window=100):
+        self.uri = uri
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latencies = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.total_requests = 0
+        self.total_failures = 0
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def percentile(self, fraction):
+        with self.lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+    def available(self, now=None):
+        """Closed circuits take traffic; an open one allows a single trial after reset_timeout"""
+        now = now or time.time()
+        with self.lock:
+            if self.state == CIRCUIT_CLOSED:
+                return True
+            if self.state == CIRCUIT_OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = CIRCUIT_HALF_OPEN
+            return self.state == CIRCUIT_HALF_OPEN and not self.trial_in_flight
+
+    def record_start(self):
+        with self.lock:
+            if self.state == CIRCUIT_HALF_OPEN:
+                self.trial_in_flight = True
+
+    def record_success(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+            self.total_requests += 1
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+            if self.state != CIRCUIT_CLOSED:
+                print(f"✅ RPC endpoint recovered: {self.uri}")
+            self.state = CIRCUIT_CLOSED
+
+    def record_failure(self):
+        with self.lock:
+            self.total_requests += 1
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == CIRCUIT_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != CIRCUIT_OPEN:
+                    print(f"🔌 RPC circuit opened for {self.uri} after {self.consecutive_failures} failure(s)")
+                self.state = CIRCUIT_OPEN
+                self.opened_at = time.time()
+
+    def summary(self):
+        p50, p90 = self.percentile(0.5), self.percentile(0.9)
+        return {
+            "uri": self.uri,
+            "circuit": self.state,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p90_ms": round(p90 * 1000) if p90 is not None else None,
+            "requests": self.total_requests,
+            "failures": self.total_failures,
+        }
+
+
+class FailoverProvider(BaseProvider):
+    """
+    web3 provider over several endpoints.
+
+    Reads go to the fastest healthy endpoint; if it has not answered within its
+    own p90 latency, a hedged duplicate goes to the next-best one and the first
+    answer wins. Identical reads already in flight are coalesced into one,
+    except nonce reads. Writes, reads of the "pending" block and node-local
+    calls (filters) stick to one endpoint until it fails, so nonces, pending
+    state and filter ids stay consistent.
+    """
+
+    def __init__(self, endpoint_uris, pool_size=10, connect_timeout=5, read_timeout=20, max_retries=3,
+                 hedge_percentile=0.9, hedge_min_delay=0.2, failure_threshold=5, reset_timeout=30,
+                 pool_timeout=10):
+        self.endpoints = []
+        # With several endpoints the next endpoint is the retry; a lone endpoint retries itself
+        endpoint_retries = max_retries if len(endpoint_uris) == 1 else 0
+        for uri in endpoint_uris:
+            provider = PooledHTTPProvider(uri, pool_size=pool_size, connect_timeout=connect_timeout,
+                                          read_timeout=read_timeout, max_retries=endpoint_retries,
+                                          pool_timeout=pool_timeout)
+            self.endpoints.append((provider, EndpointHealth(uri, failure_threshold, reset_timeout)))
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.executor = ThreadPoolExecutor(max_workers=pool_size * 2, thread_name_prefix="rpc")
+        self.sticky = None
+        self.sticky_lock = threading.Lock()
+        self.hedged_requests = 0
+        self.single_flight = SingleFlight()
+
+    def ranked(self):
+        """Available endpoints, fastest median first; everything if all circuits are open"""
+        now = time.time()
+        available = [endpoint for endpoint in self.endpoints if endpoint[1].available(now)]
+        if not available:
+            available = list(self.endpoints)
+        # Recently failing endpoints go last; unmeasured ones go first so they get measured
+        return sorted(available, key=lambda endpoint: (
+            endpoint[1].consecutive_failures, endpoint[1].percentile(0.5) or 0
+        ))
+
+    def hedge_delay(self, health):
+        threshold = health.percentile(self.hedge_percentile)
+        return max(self.hedge_min_delay, threshold or self.hedge_min_delay)
+
+    def call(self, endpoint, send):
+        provider, health = endpoint
+        health.record_start()
+        started = time.time()
+        try:
+            result = send(provider)
+        except Exception:
+            health.record_failure()
+            raise
+        health.record_success(time.time() - started)
+        return result
+
+    def hedged(self, send):
+        """Race endpoints best-first, launching the next one on a slow answer or an error"""
+        candidates = iter(self.ranked())
+        pending = {}
+        last_error = None
+
+        def launch():
+            endpoint = next(candidates, None)
+            if endpoint is None:
+                return False
+            pending[self.executor.submit(self.call, endpoint, send)] = endpoint
+            return True
+
+        launch()
+        while pending:
+            newest = list(pending.values())[-1]
+            done, _ = wait(list(pending), timeout=self.hedge_delay(newest[1]), return_when=FIRST_COMPLETED)
+            if not done:
+                if launch():
+                    self.hedged_requests += 1
+                else:
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    launch()
+        raise last_error or Exception("No RPC endpoint configured")
+
+    def sticky_endpoint(self):
+        with self.sticky_lock:
+            if self.sticky is None or self.sticky[1].state == CIRCUIT_OPEN:
+                self.sticky = self.ranked()[0]
+                print(f"📌 RPC writes pinned to {self.sticky[1].uri}")
+            return self.sticky
+
+    def pinned(self, send):
+        """Send once to the sticky endpoint; a failure unpins it but is never resent"""
+        endpoint = self.sticky_endpoint()
+        try:
+            return self.call(endpoint, send)
+        except Exception:
+            with self.sticky_lock:
+                if self.sticky is endpoint:
+                    self.sticky = None
+            raise
+
+    @staticmethod
+    def flight_key(calls):
+        return json.dumps(calls, sort_keys=True, default=str)
+
+    @staticmethod
+    def shared_read(calls):
+        """Reads any endpoint may answer; "pending" state only exists on the node we send to"""
+        return all(method in IDEMPOTENT_METHODS and "pending" not in params for method, params in calls)
+
+    def read(self, calls, flight_key, send):
+        if any(method in UNCOALESCED_METHODS for method, _ in calls):
+            return self.hedged(send)
+        return self.single_flight.do(flight_key, lambda: self.hedged(send))
+
+    def make_request(self, method, params):
+        send = lambda provider: provider.make_request(method, params)
+        if self.shared_read([(method, params)]):
+            return self.read([(method, params)], self.flight_key([method, params]), send)
+        return self.pinned(send)
+
+    def make_batch_request(self, calls):
+        send = lambda provider: provider.make_batch_request(calls)
+        if self.shared_read(calls):
+            return self.read(calls, self.flight_key(calls), send)
+        return self.pinned(send)
+
+    def is_connected(self, show_traceback=False):
+        try:
+            response = self.make_request("web3_clientVersion", [])
+        except Exception:
+            if show_traceback:
+                raise
+            return False
+        return "error" not in response
+
+    def status(self):
+        return {
+            "endpoints": [health.summary() for _, health in self.endpoints],
+            "write_endpoint": self.sticky[1].uri if self.sticky else None,
+            "hedged_requests": self.hedged_requests,
+            "single_flight": self.single_flight.metrics(),
+        }
@@ -0,0 +1,161 @@
+"""
+RPC Transport for Escrow Bot
+One shared keep-alive connection pool for every thread, with bounded timeouts
+and jittered retries on read-only calls
+"""
+
+import json
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import EmptyPoolError
+from web3 import HTTPProvider
+
+# Calls that can be repeated safely; everything else (sendRawTransaction,
+# filter polling) is sent exactly once
+IDEMPOTENT_METHODS = {
+    "web3_clientVersion", "net_version", "net_listening",
+    "eth_chainId", "eth_syncing", "eth_blockNumber", "eth_gasPrice",
+    "eth_maxPriorityFeePerGas", "eth_feeHistory", "eth_estimateGas",
+    "eth_getBlockByNumber", "eth_getBlockByHash", "eth_getBalance",
+    "eth_getTransactionCount", "eth_getCode", "eth_call", "eth_getLogs",
+    "eth_getTransactionByHash", "eth_getTransactionReceipt",
+}
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class BoundedWaitPool:
+    """Blocking connection pool that waits at most pool_timeout seconds for a free connection"""
+
+    pool_timeout = None
+
+    def _get_conn(self, timeout=None):
+        return super()._get_conn(timeout=self.pool_timeout if timeout is None else timeout)
+
+
+class BoundedWaitHTTPPool(BoundedWaitPool, HTTPConnectionPool):
+    pass
+
+
+class BoundedWaitHTTPSPool(BoundedWaitPool, HTTPSConnectionPool):
+    pass
+
+
+class BoundedWaitAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with pool_block=True whose threads give up on a busy pool after pool_timeout.
+
+    requests never passes a pool timeout to urllib3, so without this a thread
+    waits forever when every connection is held by a hung request.
+    """
+
+    def __init__(self, pool_timeout, **kwargs):
+        self.pool_timeout = pool_timeout
+        super().__init__(pool_block=True, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": BoundedWaitHTTPPool, "https": BoundedWaitHTTPSPool}
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        pool.pool_timeout = self.pool_timeout
+        return pool
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider backed by a single requests.Session.
+
+    web3's default provider keeps a session per thread in a small cache and
+    closes evicted ones, so worker threads keep paying for new TLS handshakes.
+    """
+
+    def __init__(self, endpoint_uri, pool_size=10, connect_timeout=5, read_timeout=20,
+                 max_retries=3, backoff_base=0.25, backoff_max=4.0, pool_timeout=10):
+        super().__init__(endpoint_uri)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Retries are handled here for idempotent methods only
+        self._middlewares = ()
+
+        self.session = requests.Session()
+        # Extra threads wait for a free connection instead of opening throwaway ones, up to pool_timeout
+        adapter = BoundedWaitAdapter(pool_timeout, pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(self.get_request_headers())
+
+    def backoff(self, attempt):
+        """Full jitter: spread retries from many threads instead of hitting the node in lockstep"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, payload):
+        """Send one HTTP POST on the shared pool and return the raw body"""
+        try:
+            response = self.session.post(
+                self.endpoint_uri,
+                data=payload,
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+        except EmptyPoolError as e:
+            # Every connection stayed busy: nothing was sent, same as failing to connect
+            raise requests.ConnectTimeout(f"No free RPC connection: {e}") from e
+        response.raise_for_status()
+        return response.content
+
+    def post_with_retries(self, payload, retryable):
+        attempt = 0
+        while True:
+            try:
+                return self.post(payload)
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                transient = not isinstance(e, requests.HTTPError) or e.response.status_code in RETRY_STATUS_CODES
+                if not (retryable and transient) or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                attempt += 1
+                self.logger.debug(f"Retrying RPC call in {delay:.2f}s after: {e}")
+                time.sleep(delay)
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        raw_response = self.post_with_retries(request_data, method in IDEMPOTENT_METHODS)
+        return self.decode_rpc_response(raw_response)
+
+    def make_batch_request(self, calls):
+        """
+        Send [(method, params), ...] as one JSON-RPC batch.
+        Returns the raw responses in call order; per-call errors are left in place.
+        """
+        requests_by_id = {}
+        payload = []
+        for method, params in calls:
+            request_id = next(self.request_counter)
+            requests_by_id[request_id] = len(payload)
+            payload.append({"jsonrpc": "2.0", "method": method, "params": params, "id": request_id})
+
+        retryable = all(method in IDEMPOTENT_METHODS for method, _ in calls)
+        raw_response = self.post_with_retries(json.dumps(payload).encode(), retryable)
+        decoded = json.loads(raw_response)
+        if not isinstance(decoded, list):
+            # Nodes without batch support answer with a single error object
+            raise ValueError(f"RPC node rejected batch request: {decoded.get('error', decoded)}")
+
+        # Batch responses may come back in any order
+        responses = [None] * len(payload)
+        for response in decoded:
+            position = requests_by_id.get(response.get("id"))
+            if position is not None:
+                responses[position] = response
+        return responses
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,65 @@
+"""
+Single-Flight Coalescing for Escrow Bot
+Concurrent identical reads share one in-flight call and its result
+"""
+
+import threading
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run fn once per key at a time; callers arriving meanwhile wait for that call"""
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            self.calls += 1
+            flight = self.flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self.flights[key] = _Flight()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            # Later callers start a fresh call instead of reusing this result
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self.flights),
+            }
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Balance Cache Testing Script
+Tests block-keyed balance caching, expiry and invalidation after our own transfers
+"""
+
+import time
+
+from balance_cache import BalanceCache
+
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+USDT = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+
+def test_block_keyed_lookup():
+    """Exact-block reads only hit values cached at that block"""
+    print("💾 BALANCE CACHE: Block-Keyed Lookup")
+    print("=" * 60)
+
+    cache = BalanceCache(ttl_seconds=30)
+    cache.put(ESCROW, USDT, 100, 5_000_000)
+    cache.put(ESCROW, None, 100, 10 ** 18)
+
+    assert cache.get(ESCROW.lower(), USDT.lower(), 100) == 5_000_000
+    assert cache.get(ESCROW, USDT, 101) is None
+    assert cache.get(ESCROW, None, 100) == 10 ** 18
+    print("✅ PASS: Token and native balances cached per block")
+
+def test_recent_returns_newest_block():
+    """Read-only callers get the value from the newest cached block"""
+    cache = BalanceCache(ttl_seconds=30)
+    cache.put(ESCROW, USDT, 100, 1)
+    cache.put(ESCROW, USDT, 102, 3)
+    cache.put(ESCROW, USDT, 101, 2)
+    assert cache.recent(ESCROW, USDT) == 3
+    print("✅ PASS: Newest block wins")
+
+def test_ttl_and_invalidation():
+    """Entries expire, and an outgoing transfer drops the sender's balances"""
+    cache = BalanceCache(ttl_seconds=30)
+    cache.put(ESCROW, USDT, 100, 1)
+    cache.entries[BalanceCache.key(ESCROW, USDT, 100)] = (1, time.time() - 60)
+    assert cache.recent(ESCROW, USDT) is None
+
+    cache.put(ESCROW, USDT, 101, 2)
+    cache.put(USDT, USDT, 101, 7)
+    cache.invalidate(ESCROW)
+    assert cache.recent(ESCROW, USDT) is None
+    assert cache.recent(USDT, USDT) == 7
+    print("✅ PASS: Expired and invalidated balances are not served")
+
+def main():
+    """Run all balance cache tests"""
+    test_block_keyed_lookup()
+    test_recent_returns_newest_block()
+    test_ttl_and_invalidation()
+    print("\n🎯 BALANCE CACHE TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Batched Payout Testing Script
+Tests release batching windows and Disperse multi-transfer calldata
+"""
+
+from eth_abi import decode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from batch_payouts import Disperse, PayoutBatcher, DISPERSE_ADDRESS
+
+USDT = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+BUYERS = [Web3.to_checksum_address(f"0x{i:040x}") for i in range(1, 4)]
+
+class NoChain(BaseProvider):
+    """Calldata is built offline; any request is a test failure"""
+
+    def make_request(self, method, params):
+        raise AssertionError(f"unexpected RPC call {method}")
+
+def test_releases_wait_for_window():
+    """Releases are held until the oldest one has waited the full window"""
+    print("📦 BATCHED PAYOUTS: Windows and Calldata")
+    print("=" * 60)
+
+    batcher = PayoutBatcher(window_seconds=30, max_batch=10)
+    batcher.add("1", BUYERS[0], 100, queued_at=1000)
+    batcher.add("2", BUYERS[1], 200, queued_at=1010)
+
+    assert batcher.take_due(now=1020) == []
+    assert batcher.take_due(now=1030) == [("1", BUYERS[0], 100), ("2", BUYERS[1], 200)]
+    assert batcher.pending_count() == 0
+    print("✅ PASS: Two releases sent together after the window")
+
+def test_full_batch_sent_immediately():
+    """A full batch does not wait, and leftovers stay queued"""
+    batcher = PayoutBatcher(window_seconds=30, max_batch=2)
+    for i, buyer in enumerate(BUYERS):
+        batcher.add(str(i), buyer, 100, queued_at=1000)
+
+    assert [deal_id for deal_id, _, _ in batcher.take_due(now=1001)] == ["0", "1"]
+    assert batcher.take_due(now=1001) == []
+    assert batcher.pending_count() == 1
+    print("✅ PASS: Batches capped at max_batch")
+
+def test_deal_queued_once():
+    """Re-queueing the same deal (e.g. on restore) is ignored"""
+    batcher = PayoutBatcher()
+    assert batcher.add("1", BUYERS[0], 100)
+    assert not batcher.add("1", BUYERS[0], 100)
+    assert batcher.pending_count() == 1
+    print("✅ PASS: No double payout from the queue")
+
+def test_disperse_calldata():
+    """disperseToken calldata carries the token, recipients and per-deal amounts"""
+    disperse = Disperse(Web3(NoChain()), USDT)
+    data = disperse.disperse_data(BUYERS, [9900000, 19800000, 49500000])
+
+    assert data[:10] == "0xc73a2d60"
+    token, recipients, values = decode(["address", "address[]", "uint256[]"], bytes.fromhex(data[10:]))
+    assert Web3.to_checksum_address(token) == USDT
+    assert [Web3.to_checksum_address(r) for r in recipients] == BUYERS
+    assert list(values) == [9900000, 19800000, 49500000]
+    assert disperse.gas_limit(3) == 80000 + 3 * 60000
+    print("✅ PASS: Disperse calldata encoded")
+
+def test_approve_calldata():
+    """The approval targets the Disperse contract for the given amount only"""
+    disperse = Disperse(Web3(NoChain()), USDT)
+    data = disperse.approve_data(1000000000)
+
+    assert data[:10] == "0x095ea7b3"
+    spender, amount = decode(["address", "uint256"], bytes.fromhex(data[10:]))
+    assert Web3.to_checksum_address(spender) == DISPERSE_ADDRESS
+    assert amount == 1000000000
+    print("✅ PASS: Approval calldata encoded")
+
+def main():
+    """Run all batched payout tests"""
+    test_releases_wait_for_window()
+    test_full_batch_sent_immediately()
+    test_deal_queued_once()
+    test_disperse_calldata()
+    test_approve_calldata()
+    print("\n🎯 BATCHED PAYOUT TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Chain Head Testing Script
+Tests the shared head tracker and block-pinned, memoized read snapshots
+"""
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from chain_head import ChainHeadTracker
+
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+
+class CountingChain(BaseProvider):
+    """Answers head and balance reads, remembering every request it saw"""
+
+    def __init__(self):
+        self.head = 500
+        self.requests = []
+
+    def make_request(self, method, params):
+        self.requests.append((method, params))
+        if method == "eth_blockNumber":
+            return {"result": hex(self.head)}
+        if method == "eth_getBalance":
+            return {"result": hex(int(params[1], 16) * 10)}  # Balance depends on the block read
+        raise ValueError(f"unsupported method {method}")
+
+def test_head_shared_between_callers():
+    """Many callers within one poll interval share a single eth_blockNumber"""
+    print("⛓️ CHAIN HEAD: Shared Tracker")
+    print("=" * 60)
+
+    chain = CountingChain()
+    tracker = ChainHeadTracker(Web3(chain), poll_interval=60)
+    heads = {tracker.head() for _ in range(10)}
+
+    assert heads == {500}
+    assert [m for m, _ in chain.requests].count("eth_blockNumber") == 1
+
+    tracker.update(501)  # Head seen by the monitor's batch
+    assert tracker.head() == 501
+    assert [m for m, _ in chain.requests].count("eth_blockNumber") == 1
+    print("✅ PASS: One head lookup shared by every caller")
+
+def test_snapshot_pins_and_memoizes():
+    """Reads through a snapshot use its block and are never repeated"""
+    chain = CountingChain()
+    snapshot = ChainHeadTracker(Web3(chain)).snapshot()
+    chain.head = 900  # New block arrives mid-tick
+
+    first = snapshot.native_balance(ESCROW)
+    second = snapshot.native_balance(ESCROW.lower())
+
+    balance_calls = [params for method, params in chain.requests if method == "eth_getBalance"]
+    assert first == second == 5000
+    assert len(balance_calls) == 1
+    assert balance_calls[0][1] == hex(500)
+    print("✅ PASS: Snapshot reads pinned to one block and memoized")
+
+def main():
+    """Run all chain head tests"""
+    test_head_shared_between_callers()
+    test_snapshot_pins_and_memoizes()
+    print("\n🎯 CHAIN HEAD TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Deposit Deduplication Testing Script
+Tests that processed deposits survive restarts and stay bounded in size and age
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from dedup_store import DedupStore
+
+def temp_store_path():
+    directory = tempfile.mkdtemp()
+    return os.path.join(directory, "processed_deposits.json")
+
+def test_restart_is_idempotent():
+    """A deposit processed before a restart is still known after it"""
+    print("🔁 DEDUP STORE: Restart Idempotency")
+    print("=" * 60)
+
+    path = temp_store_path()
+    store = DedupStore(path)
+    key = DedupStore.key("0xABCDEF", 3)
+    assert store.add(key)
+    assert not store.add(key)
+    store.flush()
+
+    restarted = DedupStore(path)
+    assert key in restarted
+    assert DedupStore.key("0xabcdef", 3) in restarted
+    assert DedupStore.key("0xabcdef", 4) not in restarted
+    print("✅ PASS: Processed deposit remembered across restart")
+
+def test_size_bound():
+    """The oldest entries are evicted once the store is full"""
+    store = DedupStore(temp_store_path(), max_entries=3)
+    for log_index in range(5):
+        store.add(DedupStore.key("0x01", log_index))
+
+    assert len(store) == 3
+    assert DedupStore.key("0x01", 0) not in store
+    assert DedupStore.key("0x01", 4) in store
+    print("✅ PASS: Store bounded to max_entries")
+
+def test_ttl_expiry():
+    """Entries older than the TTL are forgotten, including on reload"""
+    path = temp_store_path()
+    store = DedupStore(path, ttl_seconds=60)
+    key = DedupStore.key("0x02", 0)
+    store.add(key)
+    store.entries[key] = time.time() - 120
+    store.dirty = True
+    store.flush()
+
+    assert key not in store
+    assert len(DedupStore(path, ttl_seconds=60)) == 0
+    print("✅ PASS: Expired entries dropped")
+
+def test_discard():
+    """Reorged deposits can be forgotten so they are processed again"""
+    store = DedupStore(temp_store_path())
+    key = DedupStore.key("0x03", 1)
+    store.add(key)
+    store.discard(key)
+    assert key not in store
+    assert store.add(key)
+    print("✅ PASS: Discarded deposit can be processed again")
+
+def test_concurrent_flushes():
+    """Threads flushing at once never leave a corrupt or stale file behind"""
+    path = temp_store_path()
+    store = DedupStore(path)
+
+    def add_and_flush(thread_index):
+        for log_index in range(50):
+            store.add(DedupStore.key(f"0x{thread_index:02x}", log_index))
+            store.flush()
+
+    threads = [threading.Thread(target=add_and_flush, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+
+    assert len(DedupStore(path)) == 400
+    assert os.listdir(os.path.dirname(path)) == ["processed_deposits.json"]  # No temp files left
+    print("✅ PASS: 8 threads flushing concurrently, every key on disk")
+
+def test_corrupt_file_kept():
+    """A corrupt store is moved aside with a warning instead of silently discarded"""
+    path = temp_store_path()
+    with open(path, "w") as f:
+        f.write('[["0xab:0", 17')
+
+    store = DedupStore(path)
+    assert len(store) == 0
+    with open(f"{path}.corrupt") as f:
+        assert f.read().startswith('[["0xab:0"')
+    print("✅ PASS: Corrupt store preserved for inspection")
+
+def main():
+    """Run all dedup store tests"""
+    test_restart_is_idempotent()
+    test_size_bound()
+    test_ttl_expiry()
+    test_discard()
+    test_concurrent_flushes()
+    test_corrupt_file_kept()
+    print("\n🎯 DEDUP STORE TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
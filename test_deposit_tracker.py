@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Deposit Tracker Testing Script
+Tests the seen -> confirmed -> final state machine and reorg rollback detection
+"""
+
+from deposit_tracker import DepositTracker, DEPOSIT_SEEN, DEPOSIT_CONFIRMED, DEPOSIT_FINAL, DEPOSIT_REORGED
+
+def make_chain(length, fork_at=None):
+    """Build a fake canonical chain: block number -> block hash"""
+    chain = {}
+    for number in range(length):
+        suffix = "b" if fork_at is not None and number >= fork_at else "a"
+        chain[number] = f"0x{number:04x}{suffix}"
+    return chain
+
+def test_confirmation_progression():
+    """Deposits move seen -> confirmed -> final as the head advances"""
+    print("⛓️ DEPOSIT TRACKER: Confirmation Progression")
+    print("=" * 60)
+
+    chain = make_chain(200)
+    tracker = DepositTracker(confirmations_required=3, finality_blocks=10)
+    tracker.track("1001", "0xabc", 100, chain[100], 0)
+
+    assert tracker.update(100, chain.get) == []
+    assert tracker.get("1001")["state"] == DEPOSIT_SEEN
+
+    events = tracker.update(102, chain.get)
+    assert [(deal_id, state) for deal_id, state, _ in events] == [("1001", DEPOSIT_CONFIRMED)]
+    assert events[0][2]["confirmations"] == 3
+
+    events = tracker.update(109, chain.get)
+    assert [(deal_id, state) for deal_id, state, _ in events] == [("1001", DEPOSIT_FINAL)]
+    assert tracker.get("1001") is None
+    print("✅ PASS: Deposit reached finality and stopped being tracked")
+
+def test_reorg_detection():
+    """A deposit whose block hash changes is reported as reorged"""
+    print("\n⛓️ DEPOSIT TRACKER: Reorg Detection")
+    print("=" * 60)
+
+    chain = make_chain(200)
+    tracker = DepositTracker(confirmations_required=3, finality_blocks=10)
+    tracker.track("1002", "0xdef", 100, chain[100], 1)
+    tracker.update(101, chain.get)
+
+    forked = make_chain(200, fork_at=99)
+    events = tracker.update(103, forked.get)
+    assert [(deal_id, state) for deal_id, state, _ in events] == [("1002", DEPOSIT_REORGED)]
+    assert tracker.pending_count() == 0
+    print("✅ PASS: Reorged deposit detected and dropped")
+
+def test_shorter_chain_is_reorg():
+    """A deposit above the new head can no longer be on the canonical chain"""
+    chain = make_chain(200)
+    tracker = DepositTracker(confirmations_required=3, finality_blocks=10)
+    tracker.track("1003", "0x123", 150, chain[150])
+
+    events = tracker.update(140, chain.get)
+    assert events[0][1] == DEPOSIT_REORGED
+    print("✅ PASS: Deposit above chain head treated as reorged")
+
+def test_restore_round_trip():
+    """Tracked deposits survive a to_dict/load round trip"""
+    chain = make_chain(200)
+    tracker = DepositTracker(confirmations_required=3, finality_blocks=10)
+    tracker.track("1004", "0x456", 120, chain[120], 2)
+
+    restored = DepositTracker(confirmations_required=3, finality_blocks=10)
+    restored.load(tracker.to_dict())
+    assert restored.get("1004") == tracker.get("1004")
+    print("✅ PASS: Pending deposits restored")
+
+def main():
+    """Run all deposit tracker tests"""
+    test_confirmation_progression()
+    test_reorg_detection()
+    test_shorter_chain_is_reorg()
+    test_restore_round_trip()
+    print("\n🎯 DEPOSIT TRACKER TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
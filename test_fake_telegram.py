@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Fake Telegram Testing Script
+Tests the local Bot API stand-in and a small load run through the real bot handlers
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import telebot
+from telebot import apihelper
+
+from fake_telegram import FakeBotAPI
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def test_bot_replies_through_fake_api():
+    """A polling TeleBot receives a queued command and its reply is recorded"""
+    print("📨 FAKE TELEGRAM: Local Bot API Stand-In")
+    print("=" * 60)
+
+    api = FakeBotAPI().start()
+    previous_url = api.install()
+    try:
+        echo_bot = telebot.TeleBot("123456:test", threaded=False)
+
+        @echo_bot.message_handler(commands=["ping"])
+        def ping(message):
+            echo_bot.reply_to(message, f"pong {message.from_user.username}")
+
+        poller = threading.Thread(target=echo_bot.polling,
+                                  kwargs={"interval": 0, "long_polling_timeout": 1}, daemon=True)
+        poller.start()
+        message = api.send_command(42, "alice", "/ping")
+        reply = api.wait_for_reply(message, timeout=10)
+        echo_bot.stop_polling()
+        poller.join(timeout=5)
+    finally:
+        api.stop()
+        apihelper.API_URL = previous_url
+
+    assert reply is not None and reply["method"] == "sendMessage"
+    assert reply["params"]["text"] == "pong alice" and reply["params"]["chat_id"] == 42
+    assert reply["at"] > 0 and api.sent_messages(42) == [reply]
+    print("✅ PASS: Command delivered, reply recorded with its timestamp")
+
+def test_offset_confirms_updates():
+    """getUpdates returns queued updates until an offset past them is sent"""
+    api = FakeBotAPI(max_poll_seconds=0)
+    first = api.send_command(1, "alice", "/start")
+    api.send_command(2, "bob", "/help")
+
+    updates = api.handle("getUpdates", {"offset": 0, "limit": 1})
+    assert [u["message"]["text"] for u in updates] == ["/start"]
+    assert updates[0]["message"]["entities"][0]["length"] == len("/start")
+    assert len(api.handle("getUpdates", {"offset": 0})) == 2
+    updates = api.handle("getUpdates", {"offset": updates[0]["update_id"] + 1})
+    assert [u["message"]["text"] for u in updates] == ["/help"]
+    assert api.handle("getUpdates", {"offset": updates[0]["update_id"] + 1, "timeout": 5}) == []
+
+    assert api.wait_for_reply(first, timeout=0) is None
+    api.handle("sendMessage", {"chat_id": 1, "text": "hi", "reply_parameters": {"message_id": first["message_id"]}})
+    assert api.wait_for_reply(first, timeout=0)["params"]["text"] == "hi"
+    api.server.server_close()
+    print("✅ PASS: Offsets confirm updates, replies matched to commands")
+
+def test_concurrent_traders_all_answered():
+    """Virtual traders hitting main's handlers concurrently all get answers"""
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "load_telegram.py"), "--users", "10", "--commands", "5",
+         "--timeout", "20"],
+        capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "answered 50/50 commands, 0 timed out" in result.stdout
+    assert "Traceback" not in result.stderr, result.stderr
+    print("✅ PASS: 50 commands from 10 traders answered")
+
+def main():
+    """Run all fake Telegram tests"""
+    test_bot_replies_through_fake_api()
+    test_offset_confirms_updates()
+    test_concurrent_traders_all_answered()
+    print("\n🎯 FAKE TELEGRAM TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Fee Oracle Testing Script
+Tests EIP-1559 fee suggestions from fee history and cached gas estimates
+"""
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from fee_oracle import FeeOracle, GasEstimator
+
+GWEI = 10 ** 9
+USDT = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+
+class FeeChain(BaseProvider):
+    """Serves eth_feeHistory and eth_estimateGas, counting calls"""
+
+    def __init__(self):
+        self.base_fee = 100 * GWEI
+        self.fee_history_calls = 0
+        self.estimate_calls = 0
+
+    def make_request(self, method, params):
+        if method == "eth_feeHistory":
+            self.fee_history_calls += 1
+            block_count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+            rewards = [[hex(20 * GWEI), hex((40 + i) * GWEI), hex(90 * GWEI)] for i in range(block_count)]
+            return {"result": {
+                "oldestBlock": "0x1",
+                "baseFeePerGas": [hex(self.base_fee)] * (block_count + 1),
+                "gasUsedRatio": [0.5] * block_count,
+                "reward": rewards,
+            }}
+        if method == "eth_chainId":
+            return {"result": "0x89"}
+        if method == "eth_estimateGas":
+            self.estimate_calls += 1
+            return {"result": hex(40000)}
+        raise ValueError(f"unsupported method {method}")
+
+def test_fees_follow_fee_history():
+    """Priority fee is the sampled median, max fee covers a doubled base fee"""
+    print("⛽ FEE ORACLE: EIP-1559 Suggestions")
+    print("=" * 60)
+
+    chain = FeeChain()
+    oracle = FeeOracle(Web3(chain), get_head=lambda: 1000, block_count=5)
+    fees = oracle.fees("standard")
+
+    assert fees["maxPriorityFeePerGas"] == 42 * GWEI  # Median of 40..44
+    assert fees["maxFeePerGas"] == 2 * 100 * GWEI + 42 * GWEI
+    assert oracle.fees("fast")["maxPriorityFeePerGas"] == 90 * GWEI
+    assert oracle.fees("slow")["maxPriorityFeePerGas"] == 30 * GWEI  # Clamped to Polygon minimum
+    assert chain.fee_history_calls == 1
+    print("✅ PASS: Fees derived from one cached fee history sample")
+
+def test_refresh_once_per_block():
+    """A new head triggers exactly one new fee history lookup"""
+    chain = FeeChain()
+    head = [1000]
+    oracle = FeeOracle(Web3(chain), get_head=lambda: head[0])
+    oracle.fees()
+    oracle.fees()
+    head[0] = 1001
+    chain.base_fee = 300 * GWEI
+    fees = oracle.fees()
+    oracle.fees()
+
+    assert chain.fee_history_calls == 2
+    assert fees["maxFeePerGas"] >= 600 * GWEI
+    print("✅ PASS: Refreshed per block")
+
+def test_max_fee_cap():
+    """The configured cap bounds both fee fields"""
+    oracle = FeeOracle(Web3(FeeChain()), get_head=lambda: 1, max_fee_wei=150 * GWEI)
+    fees = oracle.fees("fast")
+    assert fees["maxFeePerGas"] == 150 * GWEI
+    assert fees["maxPriorityFeePerGas"] <= fees["maxFeePerGas"]
+    print("✅ PASS: Max fee capped")
+
+def test_cached_fees_skip_head_check():
+    """cached_fees reuses the last sample without asking for the head"""
+    chain = FeeChain()
+    head_lookups = []
+    oracle = FeeOracle(Web3(chain), get_head=lambda: head_lookups.append(1) or 1000)
+    first = oracle.cached_fees()  # No sample yet: one refresh
+    for _ in range(5):
+        assert oracle.cached_fees() == first
+    assert len(head_lookups) == 1 and chain.fee_history_calls == 1
+    print("✅ PASS: Cached fees served offline")
+
+def test_update_from_batched_history():
+    """A raw fee history fetched in another batch becomes the sample for its block"""
+    chain = FeeChain()
+    oracle = FeeOracle(Web3(chain), get_head=lambda: 1000, block_count=5)
+    raw = chain.make_request("eth_feeHistory", [hex(5), "latest", [10, 50, 90]])["result"]
+    chain.fee_history_calls = 0
+
+    oracle.update(raw, 1000)
+    assert oracle.fees()["maxPriorityFeePerGas"] == 42 * GWEI
+    assert oracle.fees()["maxFeePerGas"] == 2 * 100 * GWEI + 42 * GWEI
+    assert chain.fee_history_calls == 0
+    print("✅ PASS: Batched fee history used without another lookup")
+
+def test_gas_estimates_cached_per_shape():
+    """Transfers of any amount to any recipient share one estimate"""
+    chain = FeeChain()
+    estimator = GasEstimator(Web3(chain))
+    first = estimator.estimate({"to": USDT, "data": "0xa9059cbb" + "00" * 64})
+    second = estimator.estimate({"to": USDT, "data": "0xa9059cbb" + "11" * 64})
+
+    assert first == second == 60000  # 40000 * 1.5 margin
+    assert chain.estimate_calls == 1
+    print("✅ PASS: One estimate per call shape")
+
+def main():
+    """Run all fee oracle tests"""
+    test_fees_follow_fee_history()
+    test_refresh_once_per_block()
+    test_max_fee_cap()
+    test_cached_fees_skip_head_check()
+    test_update_from_batched_history()
+    test_gas_estimates_cached_per_shape()
+    print("\n🎯 FEE ORACLE TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
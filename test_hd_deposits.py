@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+HD Deposit Address Testing Script
+Tests that deal deposit addresses are deterministic and unique per deal
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from hd_deposits import DepositAddressDeriver
+
+# Public test mnemonic (hardhat/anvil default) - never fund these addresses
+TEST_MNEMONIC = "test test test test test test test test test test test junk"
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SELLER = "0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A"
+
+# Scenarios run in a fresh interpreter: main reads DEPOSIT_SEED_MNEMONIC at import
+SETUP = f"""
+import json
+import time
+from web3 import Web3
+from web3.middleware.geth_poa import geth_poa_middleware
+from bench_deal_flow import FakeBot
+from sim_chain import SimulatedChain
+import main
+
+class RecordingBot(FakeBot):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def send_message(self, chat_id=None, text="", **kwargs):
+        self.texts.append(text)
+
+chain = SimulatedChain(auto_mine=True)
+client = Web3(chain)
+client.middleware_onion.inject(geth_poa_middleware, layer=0)
+bot = RecordingBot()
+main.configure(web3=client, bot=bot)
+main.ESCROW_WALLET = main.payout_builder.account.address
+main.watch_set.add(main.ESCROW_WALLET)
+chain.set_native_balance(main.ESCROW_WALLET, 10 ** 18)
+SELLER = "{SELLER}"
+"""
+
+EXPIRED_DEAL_SCRIPT = """
+deal_id = str(int(time.time()) - main.DEAL_EXPIRY_MINUTES * 60 - 60)
+main.create_deal("buyer", "seller", 5.0, "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB71", deal_id,
+                 seller_wallet=SELLER)
+main.check_deal_expiry()
+deal = main.load_db()[deal_id]
+
+chain.deposit(SELLER, deal["deposit_address"], 5 * 10 ** 6)
+chain.mine()
+swept = main.sweep_deposit_addresses()
+
+db = main.load_db()
+db[deal_id]["expired_at"] -= main.HD_EXPIRED_SWEEP_DAYS * 86400 + 1
+main.save_db(db)
+main.check_deal_expiry()
+print(json.dumps({"status": deal["status"], "swept": swept, "escrow": chain.token_balance(main.ESCROW_WALLET),
+                  "alerted": any("LATE DEPOSIT" in text for text in bot.texts),
+                  "kept": deal_id in main.load_db()}))
+"""
+
+SWEEP_NOT_A_DEPOSIT_SCRIPT = """
+deal_ids = [str(int(time.time())), str(int(time.time()) + 1)]
+for deal_id in deal_ids:
+    main.create_deal("buyer", "seller", 5.0, "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB71", deal_id,
+                     seller_wallet=SELLER)
+state = main.start_payment_monitor()
+main.monitor_tick(state)
+chain.deposit(SELLER, main.load_db()[deal_ids[0]]["deposit_address"], 5 * 10 ** 6)
+chain.mine()
+main.monitor_tick(state)
+main.monitor_tick(state)  # Transfers are scanned up to the head the previous tick saw
+chain.mine(main.DEPOSIT_FINALITY_BLOCKS)
+main.monitor_tick(state)
+
+swept = main.sweep_deposit_addresses()
+chain.mine()
+for _ in range(3):
+    main.monitor_tick(state)
+db = main.load_db()
+print(json.dumps({"swept": swept, "statuses": [db[deal_id]["status"] for deal_id in deal_ids],
+                  "escrow": chain.token_balance(main.ESCROW_WALLET)}))
+"""
+
+def run_scenario(script):
+    """Run SETUP + script with HD deposit addresses enabled; returns the JSON it prints last"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="1", BOT_TOKEN="123456:simulated",
+               PRIVATE_KEY="0x" + "11" * 32, DEPOSIT_SEED_MNEMONIC=TEST_MNEMONIC)
+    result = subprocess.run([sys.executable, "-c", SETUP + script], cwd=tempfile.mkdtemp(), env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_deterministic_addresses():
+    """The same seed and deal always derive the same address, also after a restart"""
+    print("🔑 HD DEPOSITS: Deterministic Derivation")
+    print("=" * 60)
+
+    deal_id = "1700000000"
+    first = DepositAddressDeriver(TEST_MNEMONIC).address_for_deal(deal_id)
+    restarted = DepositAddressDeriver(TEST_MNEMONIC).address_for_deal(deal_id)
+    assert first == restarted
+    assert first[1] == 1700000000
+    print("✅ PASS: Deal address stable across restarts")
+
+def test_unique_per_deal():
+    """Different deals and different seeds never share an address"""
+    deriver = DepositAddressDeriver(TEST_MNEMONIC)
+    addresses = {deriver.address_for_deal(str(1700000000 + i))[0] for i in range(5)}
+    assert len(addresses) == 5
+
+    other = DepositAddressDeriver(TEST_MNEMONIC, passphrase="other")
+    assert other.address_for_deal("1700000000")[0] not in addresses
+    print("✅ PASS: Every deal gets its own address")
+
+def test_key_matches_address():
+    """The derived key signs for the derived address, so the sweeper can move the funds"""
+    from eth_account import Account
+
+    address, private_key = DepositAddressDeriver(TEST_MNEMONIC).derive(7)
+    assert Account.from_key(private_key).address == address
+    print("✅ PASS: Derived key controls the deposit address")
+
+def test_expired_deal_still_swept():
+    """A deposit that lands after its deal expired is swept into escrow and flagged for a refund"""
+    outcome = run_scenario(EXPIRED_DEAL_SCRIPT)
+
+    assert outcome["status"] == "expired"
+    assert outcome["swept"] == 1 and outcome["escrow"] == 5 * 10 ** 6
+    assert outcome["alerted"]
+    assert not outcome["kept"]  # Dropped once the sweep window is over
+    print("✅ PASS: Late deposit to an expired deal swept and flagged")
+
+def test_sweep_is_not_a_deposit():
+    """Sweeping a deal address into escrow never pays or cancels another deal of the same amount"""
+    outcome = run_scenario(SWEEP_NOT_A_DEPOSIT_SCRIPT)
+    assert outcome["swept"] == 1 and outcome["escrow"] == 5 * 10 ** 6
+    assert outcome["statuses"] == ["usdt_deposited", "waiting_usdt_deposit"]
+    print("✅ PASS: Sweep into escrow left the other waiting deal alone")
+
+def main():
+    """Run all HD deposit tests"""
+    test_deterministic_addresses()
+    test_unique_per_deal()
+    test_key_matches_address()
+    test_expired_deal_still_swept()
+    test_sweep_is_not_a_deposit()
+    print("\n🎯 HD DEPOSIT TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
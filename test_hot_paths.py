@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Hot Path Benchmark Testing Script
+Tests the synthetic stores, scaling detection and stored results of the micro-benchmarks
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_hot_paths import (synthetic_escrows, synthetic_orders, synthetic_security,
+                             scaling_exponent, load_previous)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def test_synthetic_stores_match_main():
+    """Generated escrows, orders and security data have the shapes main reads"""
+    print("⏱️ HOT PATH BENCHMARKS: Synthetic Stores and Stored Results")
+    print("=" * 60)
+
+    now = time.time()
+    escrows = synthetic_escrows(500, now)
+    assert len(escrows) == 500
+    assert all(now - int(deal_id) > 86400 for deal_id in escrows)  # Ids parse as timestamps, none expire
+    assert {deal["status"] for deal in escrows.values()} <= {"completed", "payout_pending", "emergency_refunded"}
+
+    orders = synthetic_orders(500, now)
+    assert len(orders["sell_orders"]) == 500 and orders["buy_orders"] == {}
+    assert all(1 <= order["amount"] <= 49 for order in orders["sell_orders"].values())
+
+    security = synthetic_security(500, now)
+    assert len(security["command_history"]) == 500 and security["last_cleanup"] == now
+    print("✅ PASS: Synthetic stores are well formed")
+
+def test_scaling_exponent():
+    """Linear and quadratic growth in time per op are told apart"""
+    linear = scaling_exponent({"records": 100, "seconds_per_op": 0.001}, {"records": 1000, "seconds_per_op": 0.01})
+    quadratic = scaling_exponent({"records": 100, "seconds_per_op": 0.001}, {"records": 1000, "seconds_per_op": 0.1})
+    assert abs(linear - 1.0) < 1e-9 and abs(quadratic - 2.0) < 1e-9
+    print("✅ PASS: Scaling exponent computed")
+
+def test_runs_stored_and_compared():
+    """Each run is appended to the results file and the next run compares with it"""
+    results_path = os.path.join(tempfile.mkdtemp(), "results.jsonl")
+    command = [sys.executable, os.path.join(REPO_DIR, "bench_hot_paths.py"), "--sizes", "10,100",
+               "--only", "load_db,check_rate_limit,calculate_transaction_fee", "--results", results_path]
+
+    first = subprocess.run(command, capture_output=True, text=True, timeout=300)
+    assert first.returncode == 0, first.stdout + first.stderr
+    second = subprocess.run(command, capture_output=True, text=True, timeout=300)
+    assert second.returncode == 0, second.stdout + second.stderr
+    assert "Compared with" not in first.stdout and "Compared with" in second.stdout
+
+    with open(results_path) as f:
+        runs = [json.loads(line) for line in f]
+    assert len(runs) == 2 and load_previous(results_path) == runs[1]
+    rows = runs[1]["results"]["check_rate_limit"]
+    assert [row["records"] for row in rows] == [10, 100]
+    assert all(row["ops_per_second"] > 0 and row["peak_bytes"] > 0 for row in rows)
+    assert runs[1]["results"]["calculate_transaction_fee"][1]["ops"] >= 100
+    print("✅ PASS: Runs appended and compared")
+
+def main():
+    """Run all hot path benchmark tests"""
+    test_synthetic_stores_match_main()
+    test_scaling_exponent()
+    test_runs_stored_and_compared()
+    print("\n🎯 HOT PATH BENCHMARK TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
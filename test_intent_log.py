@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Intent Log Testing Script
+Tests the write-ahead payout log: replay of open intents, torn writes and compaction
+"""
+
+import os
+import tempfile
+
+from intent_log import IntentLog
+
+def log_path():
+    return os.path.join(tempfile.mkdtemp(), "payout_intents.jsonl")
+
+def payout_txn(nonce):
+    return {"to": "0xc2132D05D31c914a87C6611C10748AEb04B58e8F", "nonce": nonce, "maxFeePerGas": 100}
+
+def count_lines(path):
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+def test_open_intents_survive_restart():
+    """Open intents, with every attempt, are replayed; closed ones are not"""
+    print("📝 INTENT LOG: Write-Ahead Payout Records")
+    print("=" * 60)
+
+    path = log_path()
+    log = IntentLog(path)
+    log.open("1", "release", ["1"], payout_txn(5), "0xaa", "0x02aa")
+    log.open("2", "release", ["2"], payout_txn(6), "0xbb", "0x02bb")
+    log.add_attempt("1", dict(payout_txn(5), maxFeePerGas=115), "0xcc", "0x02cc")
+    log.close("2", "confirmed")
+
+    intents = IntentLog(path).open_intents()
+    assert list(intents) == ["1"]
+    assert [a["tx_hash"] for a in intents["1"]["attempts"]] == ["0xaa", "0xcc"]
+    assert intents["1"]["txn"]["maxFeePerGas"] == 115 and intents["1"]["nonce"] == 5
+    print("✅ PASS: Only the in-flight payout is replayed")
+
+def test_torn_write_ignored():
+    """A half-written last line from a crash does not break replay"""
+    path = log_path()
+    log = IntentLog(path)
+    log.open("1", "release", ["1"], payout_txn(5), "0xaa", "0x02aa")
+    with open(path, "a") as f:
+        f.write('{"op": "open", "payout_id": "2", "ki')
+
+    restarted = IntentLog(path)
+    assert list(restarted.open_intents()) == ["1"]
+    restarted.open("3", "release", ["3"], payout_txn(6), "0xdd", "0x02dd")
+    assert sorted(IntentLog(path).open_intents()) == ["1", "3"]
+    print("✅ PASS: Torn write skipped, later appends intact")
+
+def test_log_size_tracks_in_flight_payouts():
+    """Compaction keeps the file proportional to open intents, not history"""
+    path = log_path()
+    log = IntentLog(path, compact_after=10)
+    for nonce in range(1000):
+        log.open(str(nonce), "release", [str(nonce)], payout_txn(nonce), f"0x{nonce:x}", "0x02")
+        if nonce % 100:
+            log.close(str(nonce), "confirmed")
+
+    assert count_lines(path) <= 10 + 3 * 10
+    restarted = IntentLog(path)
+    assert sorted(restarted.open_intents(), key=int) == [str(n) for n in range(0, 1000, 100)]
+    assert count_lines(path) == 10
+    print("✅ PASS: 1000 payouts, log holds only the 10 in flight")
+
+def test_batch_intent_covers_all_deals():
+    """A batched payout's intent lists every deal it pays"""
+    path = log_path()
+    IntentLog(path).open("batch-1", "batch_release", ["1", "2", "3"], payout_txn(7), "0xee", "0x02ee")
+    assert IntentLog(path).open_intents()["batch-1"]["deal_ids"] == ["1", "2", "3"]
+    print("✅ PASS: Batch intent keeps its deals")
+
+def main():
+    """Run all intent log tests"""
+    test_open_intents_survive_restart()
+    test_torn_write_ignored()
+    test_log_size_tracks_in_flight_payouts()
+    test_batch_intent_covers_all_deals()
+    print("\n🎯 INTENT LOG TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Lazy Resource Testing Script
+Tests on-demand building, injected fakes and that importing main has no side effects
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from lazy_resource import LazyResource, resolve, override, reset, is_built
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+
+    def increment(self):
+        self.value += 1
+        return self.value
+
+def test_built_on_first_use():
+    """Nothing is built until an attribute is used, and then only once"""
+    print("💤 LAZY RESOURCES: On-Demand Clients and Stores")
+    print("=" * 60)
+
+    builds = []
+    counter = LazyResource(lambda: builds.append(1) or Counter(), "counter")
+    assert not is_built(counter) and builds == []
+
+    counter.increment()
+    counter.increment()
+    assert counter.value == 2
+    assert builds == [1]
+    print("✅ PASS: Built once, on first use")
+
+def test_concurrent_first_use_builds_once():
+    """Threads racing on first use share one built object"""
+    builds = []
+
+    def slow_factory():
+        builds.append(1)
+        time.sleep(0.05)
+        return Counter()
+
+    counter = LazyResource(slow_factory)
+    threads = [threading.Thread(target=counter.increment) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert builds == [1] and counter.value == 8
+    print("✅ PASS: One build under concurrent first use")
+
+def test_override_and_reset():
+    """An injected fake is used as is; reset() goes back to the factory"""
+    counter = LazyResource(Counter)
+    fake = Counter()
+    fake.value = 41
+    override(counter, fake)
+    assert counter.increment() == 42 and resolve(counter) is fake
+
+    counter.patched = True  # Attribute writes reach the object, as monkeypatching expects
+    assert fake.patched
+
+    reset(counter)
+    assert not is_built(counter)
+    assert counter.increment() == 1
+    print("✅ PASS: Fakes injected and reset")
+
+def test_container_protocol_forwarded():
+    """Membership, len and truth tests reach the built object"""
+    store = LazyResource(lambda: {"0xaa:0"})
+    assert "0xaa:0" in store and "0xbb:0" not in store
+    assert len(store) == 1 and list(store) == ["0xaa:0"]
+    assert not LazyResource(set)
+    assert LazyResource(Counter)  # No __len__: still truthy
+    print("✅ PASS: Container protocol forwarded")
+
+def test_import_main_has_no_side_effects():
+    """main imports without credentials, network, threads or files"""
+    workdir = tempfile.mkdtemp()
+    env = {k: v for k, v in os.environ.items() if k not in ("BOT_TOKEN", "PRIVATE_KEY")}
+    env["PYTHONPATH"] = REPO_DIR
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    script = (
+        "import threading, main\n"
+        "from lazy_resource import is_built\n"
+        "built = [n for n in ('web3', 'usdt', 'bot', 'processed_deposits', 'payout_queue', 'intent_log') "
+        "if is_built(getattr(main, n))]\n"
+        "assert built == [], built\n"
+        "assert threading.active_count() == 1\n"
+        "assert main.load_db() == {} and main.load_wallets() == {}\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
+    assert os.listdir(workdir) == []
+    print("✅ PASS: Import is silent and builds nothing")
+
+def main():
+    """Run all lazy resource tests"""
+    test_built_on_first_use()
+    test_concurrent_first_use_builds_once()
+    test_override_and_reset()
+    test_container_protocol_forwarded()
+    test_import_main_has_no_side_effects()
+    print("\n🎯 LAZY RESOURCE TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
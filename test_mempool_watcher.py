@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Mempool Watcher Testing Script
+Tests pending-filter polling, early deposit notices and the fallback for RPCs without pending filters
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from web3 import Web3
+
+from mempool_watcher import MempoolWatcher
+from sim_chain import SimulatedChain, USDT_ADDRESS
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+SELLER = "0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A"
+STRANGER = "0xabcdefabcdefabcdefabcdefabcdefabcdefabcd"
+
+class PendingFilterChain(SimulatedChain):
+    """SimulatedChain whose node supports eth_newPendingTransactionFilter"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.filters = {}  # filter id -> pending hashes already returned
+
+    def rpc_eth_newPendingTransactionFilter(self):
+        filter_id = hex(len(self.filters) + 1)
+        self.filters[filter_id] = set(self.pending.values())
+        return filter_id
+
+    def rpc_eth_getFilterChanges(self, filter_id):
+        seen = self.filters[filter_id]
+        new = [tx_hash for tx_hash in self.pending.values() if tx_hash not in seen]
+        seen.update(new)
+        return new
+
+def watcher_for(chain, watched):
+    reported = []
+    watcher = MempoolWatcher(Web3(chain), USDT_ADDRESS, lambda: watched,
+                             lambda *transfer: reported.append(transfer), poll_interval=0.01)
+    return watcher, reported
+
+def test_polls_pending_filter():
+    """Each poll reports new pending transfers to watched addresses, once"""
+    print("📡 MEMPOOL WATCHER: Pending Transaction Polling")
+    print("=" * 60)
+
+    chain = PendingFilterChain()
+    watcher, reported = watcher_for(chain, [ESCROW.lower()])
+    watcher.pending_filter = watcher.web3.eth.filter("pending")
+
+    tx_hash = chain.deposit(SELLER, ESCROW, 25 * 10 ** 6)
+    chain.deposit(SELLER, STRANGER, 10 ** 6)  # Not watched
+    assert watcher.poll_once() == 1
+    assert reported == [(tx_hash, Web3.to_checksum_address(SELLER), ESCROW.lower(), 25 * 10 ** 6)]
+
+    assert watcher.poll_once() == 0  # Nothing new in the filter
+    assert chain.requests["eth_getTransactionByHash"] == 2
+    print("✅ PASS: Watched transfer reported from the mempool, unwatched one ignored")
+
+def test_no_lookups_without_watched_addresses():
+    """With nothing to watch, the filter is drained without fetching transactions"""
+    chain = PendingFilterChain()
+    watcher, reported = watcher_for(chain, [])
+    watcher.pending_filter = watcher.web3.eth.filter("pending")
+    chain.deposit(SELLER, ESCROW, 10 ** 6)
+
+    assert watcher.poll_once() == 0
+    assert chain.requests["eth_getFilterChanges"] == 1
+    assert chain.requests["eth_getTransactionByHash"] == 0 and reported == []
+    print("✅ PASS: Idle watcher skips transaction lookups")
+
+def test_fallback_without_pending_filters():
+    """An RPC without pending filters leaves the watcher off; mined-log monitoring still runs"""
+    watcher, _ = watcher_for(SimulatedChain(), [ESCROW.lower()])
+    assert watcher.start() is False
+    assert watcher.thread is None and not watcher.running
+    print("✅ PASS: Watcher disabled cleanly when pending filters are missing")
+
+def test_early_deposit_notice():
+    """A seller deposit seen in the mempool marks its deal and warns the group before it is mined"""
+    script = f"""
+import json
+import time
+from web3 import Web3
+from web3.middleware.geth_poa import geth_poa_middleware
+from bench_deal_flow import FakeBot
+from test_mempool_watcher import PendingFilterChain
+import main
+
+class RecordingBot(FakeBot):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def send_message(self, chat_id=None, text="", **kwargs):
+        self.texts.append(text)
+
+chain = PendingFilterChain()
+client = Web3(chain)
+client.middleware_onion.inject(geth_poa_middleware, layer=0)
+bot = RecordingBot()
+main.configure(web3=client, bot=bot)
+main.MEMPOOL_POLL_INTERVAL = 0.01
+main.create_deal("buyer", "seller", 25.0, "{ESCROW}", "1", seller_wallet="{SELLER}")
+
+watcher = main.start_mempool_watcher()
+tx_hash = chain.deposit("{SELLER}", main.ESCROW_WALLET, 25 * 10 ** 6)
+deadline = time.time() + 10
+# The group message is the last thing the watcher does for a pending deposit
+while not any("DEPOSIT BROADCAST" in text for text in bot.texts) and time.time() < deadline:
+    time.sleep(0.01)
+watcher.stop()
+deal = main.load_db()["1"]
+print("RESULT " + json.dumps({{"tx": tx_hash, "pending_tx": deal.get("pending_deposit_tx"), "status": deal["status"],
+                   "mined": chain.head, "noticed": any("DEPOSIT BROADCAST" in text for text in bot.texts)}}))
+"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="1",
+               BOT_TOKEN="123456:simulated", PRIVATE_KEY="0x" + "11" * 32)
+    result = subprocess.run([sys.executable, "-c", script], cwd=tempfile.mkdtemp(), env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    outcome = json.loads(next(line[len("RESULT "):] for line in result.stdout.splitlines()
+                              if line.startswith("RESULT ")))
+
+    assert outcome["pending_tx"] == outcome["tx"]
+    assert outcome["status"] == "waiting_usdt_deposit"  # Only a mined deposit moves the deal on
+    assert outcome["mined"] == 0 and outcome["noticed"]
+    print("✅ PASS: Group warned about the deposit while it was still pending")
+
+def main():
+    """Run all mempool watcher tests"""
+    test_polls_pending_filter()
+    test_no_lookups_without_watched_addresses()
+    test_fallback_without_pending_filters()
+    test_early_deposit_notice()
+    print("\n🎯 MEMPOOL WATCHER TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
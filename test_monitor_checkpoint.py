@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Monitor Checkpoint Testing Script
+Tests that the payment monitor's progress and state survive a restart
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from monitor_checkpoint import MonitorCheckpoint
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def checkpoint_path():
+    return os.path.join(tempfile.mkdtemp(), "monitor_state.json")
+
+def test_round_trip():
+    """Last block and state snapshots come back after a restart"""
+    print("💾 MONITOR CHECKPOINT: Warm Restart")
+    print("=" * 60)
+
+    path = checkpoint_path()
+    checkpoint = MonitorCheckpoint(path)
+    checkpoint.advance(1000)
+    state = {"deposits": {"7": {"block_number": 990}}, "watched": {"0xabc": "7"}}
+    assert checkpoint.save(state)
+
+    restarted = MonitorCheckpoint(path)
+    loaded = restarted.load()
+    assert restarted.last_block == 1000
+    assert loaded["deposits"] == state["deposits"] and loaded["watched"] == state["watched"]
+    print("✅ PASS: Block and snapshots restored")
+
+def test_nothing_saved_before_first_block():
+    """A monitor that never finished a tick has no checkpoint to write"""
+    path = checkpoint_path()
+    checkpoint = MonitorCheckpoint(path)
+    assert not checkpoint.save({"watched": {}})
+    assert not os.path.exists(path)
+    assert MonitorCheckpoint(path).load() == {}
+    print("✅ PASS: Cold start without a checkpoint")
+
+def test_advance_is_monotonic():
+    """An older block never moves the checkpoint backwards"""
+    checkpoint = MonitorCheckpoint(checkpoint_path())
+    checkpoint.advance(1000)
+    checkpoint.advance(990)
+    assert checkpoint.last_block == 1000
+    checkpoint.advance(1001)
+    assert checkpoint.last_block == 1001
+    print("✅ PASS: Checkpoint only moves forward")
+
+def test_save_is_throttled():
+    """due() limits periodic writes to one per interval"""
+    checkpoint = MonitorCheckpoint(checkpoint_path(), interval_seconds=30)
+    checkpoint.advance(1000)
+    assert checkpoint.due()
+    checkpoint.save()
+    assert not checkpoint.due()
+    checkpoint.saved_at -= 30
+    assert checkpoint.due()
+    print("✅ PASS: Periodic saves throttled")
+
+def test_corrupt_file_is_cold_start():
+    """An unreadable checkpoint falls back to scanning from the head"""
+    path = checkpoint_path()
+    with open(path, "w") as f:
+        f.write('{"last_block": 10')
+    checkpoint = MonitorCheckpoint(path)
+    assert checkpoint.load() == {} and checkpoint.last_block is None
+    print("✅ PASS: Corrupt checkpoint ignored")
+
+def test_catch_up_keeps_finished_ranges():
+    """A failed range query during catch-up keeps the ranges processed before it"""
+    script = (
+        "import json\n"
+        "from web3 import Web3\n"
+        "from sim_chain import SimulatedChain\n"
+        "import main\n"
+        "class FlakyLogs(SimulatedChain):\n"
+        "    def rpc_eth_getLogs(self, log_filter):\n"
+        "        if self.requests['eth_getLogs'] == 3:\n"
+        "            raise ConnectionError('getLogs timed out')\n"
+        "        return super().rpc_eth_getLogs(log_filter)\n"
+        "chain = FlakyLogs()\n"
+        "main.configure(web3=Web3(chain))\n"
+        "main.PAYMENT_MONITOR_MAX_BLOCKS = 10\n"
+        "chain.mine(4)\n"
+        "deposit = chain.deposit('0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A', main.ESCROW_WALLET, 10 ** 6)\n"
+        "chain.mine(46)\n"
+        "state = {'last_block': 0, 'caught_up': False, 'head': None}\n"
+        "main.monitor_tick(state)\n"
+        "try:\n"
+        "    main.monitor_tick(state)\n"
+        "except ConnectionError:\n"
+        "    pass\n"
+        "after_failure = state['last_block']\n"
+        "seen = len(main.processed_deposits)\n"
+        "main.monitor_tick(state)\n"
+        "print(json.dumps([after_failure, seen, main.monitor_checkpoint.last_block, state['last_block']]))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="1",
+               BOT_TOKEN="123456:simulated", PRIVATE_KEY="0x" + "11" * 32)
+    result = subprocess.run([sys.executable, "-c", script], cwd=tempfile.mkdtemp(), env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    after_failure, seen, checkpointed, last_block = json.loads(result.stdout.strip().splitlines()[-1])
+    assert after_failure == 20 and seen == 1  # Blocks 1-20 kept, including the deposit in block 5
+    assert checkpointed == last_block == 50
+    print("✅ PASS: Catch-up resumed after the failed range")
+
+def test_idle_tick_is_one_round_trip():
+    """With no payout in flight, a tick is a single batched request, fee history included"""
+    script = (
+        "import json\n"
+        "from web3 import Web3\n"
+        "from sim_chain import SimulatedChain\n"
+        "import main\n"
+        "chain = SimulatedChain()\n"
+        "main.configure(web3=Web3(chain))\n"
+        "state = main.start_payment_monitor()\n"
+        "main.monitor_tick(state)\n"
+        "rounds = []\n"
+        "for _ in range(3):\n"
+        "    chain.mine()\n"
+        "    before = chain.round_trips\n"
+        "    main.monitor_tick(state)\n"
+        "    rounds.append(chain.round_trips - before)\n"
+        "print(json.dumps([rounds, main.fee_oracle.sample_block, chain.head]))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="1",
+               BOT_TOKEN="123456:simulated", PRIVATE_KEY="0x" + "11" * 32)
+    result = subprocess.run([sys.executable, "-c", script], cwd=tempfile.mkdtemp(), env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    rounds, fee_block, head = json.loads(result.stdout.strip().splitlines()[-1])
+    assert rounds == [1, 1, 1]
+    assert fee_block == head  # Fee sample still refreshed every block
+    print("✅ PASS: Idle tick is one round trip")
+
+def main():
+    """Run all monitor checkpoint tests"""
+    test_round_trip()
+    test_nothing_saved_before_first_block()
+    test_advance_is_monotonic()
+    test_save_is_throttled()
+    test_corrupt_file_is_cold_start()
+    test_catch_up_keeps_finished_ranges()
+    test_idle_tick_is_one_round_trip()
+    print("\n🎯 MONITOR CHECKPOINT TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
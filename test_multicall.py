@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Multicall Aggregation Testing Script
+Tests that many balance reads cost one eth_call and fail independently
+"""
+
+from eth_abi import decode, encode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from multicall import Multicall, MULTICALL3_ADDRESS
+
+TOKEN = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+BROKEN_TOKEN = "0x000000000000000000000000000000000000dEaD"
+HOLDERS = [Web3.to_checksum_address("0x" + f"{i:040x}") for i in range(1, 41)]
+
+class InProcessChain(BaseProvider):
+    """Tiny chain: Multicall3 plus one ERC-20, answering eth_call from dictionaries"""
+
+    def __init__(self):
+        self.head = 1234
+        self.token_balances = {h.lower(): i * 10 ** 6 for i, h in enumerate(HOLDERS)}
+        self.native_balances = {h.lower(): i * 10 ** 15 for i, h in enumerate(HOLDERS)}
+        self.requests = []
+
+    def execute(self, target, data):
+        """Return (success, return bytes) for one inner call"""
+        selector, args = data[:4].hex(), data[4:]
+        if target.lower() == TOKEN.lower() and selector == "70a08231":
+            holder = "0x" + args[12:32].hex()
+            return True, encode(["uint256"], [self.token_balances.get(holder, 0)])
+        if target.lower() == MULTICALL3_ADDRESS.lower() and selector == "4d2301cc":
+            holder = "0x" + args[12:32].hex()
+            return True, encode(["uint256"], [self.native_balances.get(holder, 0)])
+        if target.lower() == MULTICALL3_ADDRESS.lower() and selector == "42cbb15c":
+            return True, encode(["uint256"], [self.head])
+        return False, b""
+
+    def make_request(self, method, params):
+        self.requests.append(method)
+        if method == "eth_chainId":
+            return {"result": "0x89"}
+        if method == "eth_blockNumber":
+            return {"result": hex(self.head)}
+        if method == "eth_call":
+            call = params[0]
+            data = bytes.fromhex(call["data"][2:])
+            if call["to"].lower() != MULTICALL3_ADDRESS.lower():
+                # No contract code: empty return data
+                return {"result": "0x"}
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [self.execute(target, inner) for target, _, inner in calls]
+            return {"result": "0x" + encode(["(bool,bytes)[]"], [results]).hex()}
+        raise ValueError(f"unsupported method {method}")
+
+def test_one_call_for_many_wallets():
+    """Escrow plus dozens of wallets: token and native balances in one eth_call"""
+    print("🧮 MULTICALL: Aggregated Balance Reads")
+    print("=" * 60)
+
+    chain = InProcessChain()
+    multicall = Multicall(Web3(chain))
+    block, balances = multicall.balances(TOKEN, HOLDERS)
+
+    assert chain.requests.count("eth_call") == 1
+    assert block == 1234
+    assert balances[HOLDERS[5]] == {"token": 5 * 10 ** 6, "native": 5 * 10 ** 15}
+    assert len(balances) == len(HOLDERS)
+    print(f"✅ PASS: {len(HOLDERS) * 2} balance reads in one RPC call")
+
+def test_failed_reads_are_isolated():
+    """A reverting inner call yields None without hiding the other results"""
+    multicall = Multicall(Web3(InProcessChain()))
+    _, broken = multicall.balances(BROKEN_TOKEN, HOLDERS[:3])
+
+    assert all(entry["token"] is None for entry in broken.values())
+    assert broken[HOLDERS[2]]["native"] == 2 * 10 ** 15
+    print("✅ PASS: Failed reads reported per call")
+
+def test_chunking_pins_block():
+    """Large lookups are split into several aggregate calls against one block"""
+    chain = InProcessChain()
+    multicall = Multicall(Web3(chain), max_calls=10)
+    block, balances = multicall.balances(TOKEN, HOLDERS)
+
+    assert block == 1234
+    assert chain.requests.count("eth_call") == 9  # 81 inner calls / 10 per chunk
+    assert chain.requests.count("eth_blockNumber") == 1
+    assert balances[HOLDERS[-1]]["token"] == 39 * 10 ** 6
+    print("✅ PASS: Chunked calls pinned to one block")
+
+def main():
+    """Run all multicall tests"""
+    test_one_call_for_many_wallets()
+    test_failed_reads_are_isolated()
+    test_chunking_pins_block()
+    print("\n🎯 MULTICALL TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
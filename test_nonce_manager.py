@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Nonce Manager Testing Script
+Tests local nonce allocation, gap reuse and resync for escrow payouts
+"""
+
+import threading
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from nonce_manager import NonceManager
+
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+
+class NonceChain(BaseProvider):
+    """Reports a pending nonce and counts how often it was asked"""
+
+    def __init__(self, pending_nonce=7):
+        self.pending_nonce = pending_nonce
+        self.lookups = 0
+
+    def make_request(self, method, params):
+        if method == "eth_getTransactionCount":
+            self.lookups += 1
+            return {"result": hex(self.pending_nonce)}
+        raise ValueError(f"unsupported method {method}")
+
+def test_concurrent_payouts_get_unique_nonces():
+    """Back-to-back releases never share a nonce and cost one sync"""
+    print("🔢 NONCE MANAGER: Concurrent Allocation")
+    print("=" * 60)
+
+    chain = NonceChain()
+    manager = NonceManager(Web3(chain), ESCROW)
+    nonces = []
+    lock = threading.Lock()
+
+    def payout():
+        with manager.reserve() as nonce:
+            with lock:
+                nonces.append(nonce)
+
+    threads = [threading.Thread(target=payout) for _ in range(25)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(nonces) == list(range(7, 32))
+    assert chain.lookups == 1
+    print("✅ PASS: 25 payouts, 25 distinct nonces, 1 RPC call")
+
+def test_failed_send_nonce_is_reused():
+    """A nonce the node rejected is handed out again before new ones"""
+    manager = NonceManager(Web3(NonceChain()), ESCROW)
+    try:
+        with manager.reserve():
+            raise ValueError("insufficient funds for gas * price + value")
+    except ValueError:
+        pass
+
+    with manager.reserve() as nonce:
+        assert nonce == 7
+    with manager.reserve() as nonce:
+        assert nonce == 8
+    print("✅ PASS: Gap from failed send filled first")
+
+def test_nonce_too_low_resyncs():
+    """If the chain already used our nonce, the next allocation resyncs"""
+    chain = NonceChain()
+    manager = NonceManager(Web3(chain), ESCROW)
+    try:
+        with manager.reserve():
+            raise ValueError("nonce too low")
+    except ValueError:
+        pass
+
+    chain.pending_nonce = 10  # Sent from elsewhere meanwhile
+    with manager.reserve() as nonce:
+        assert nonce == 10
+    assert chain.lookups == 2
+    print("✅ PASS: Resynced after nonce too low")
+
+def test_timeout_resyncs_instead_of_reusing():
+    """A send that timed out may have been broadcast, so its nonce is not reused blindly"""
+    chain = NonceChain()
+    manager = NonceManager(Web3(chain), ESCROW)
+    try:
+        with manager.reserve():
+            raise TimeoutError("read timed out")
+    except TimeoutError:
+        pass
+    assert not manager.gaps
+    assert manager.fill_gaps(lambda nonce: None) == 0
+
+    chain.pending_nonce = 8  # The timed-out transaction did reach the mempool
+    with manager.reserve() as nonce:
+        assert nonce == 8
+    assert chain.lookups == 2
+    chain.pending_nonce = 9
+
+    try:
+        with manager.reserve():
+            raise ConnectionError("connection reset")
+    except ConnectionError:
+        pass
+    with manager.reserve() as nonce:
+        assert nonce == 9  # Never broadcast: the pending nonce hands it out again
+    assert chain.lookups == 3
+    print("✅ PASS: Resynced after an unclear send instead of reusing the nonce")
+
+def test_fill_gaps():
+    """Unused gaps are filled with harmless transactions"""
+    manager = NonceManager(Web3(NonceChain()), ESCROW)
+    for _ in range(3):
+        with manager.reserve():
+            pass
+    manager.release(8)
+    filled = []
+    assert manager.fill_gaps(filled.append) == 1
+    assert filled == [8] and not manager.gaps
+    print("✅ PASS: Gap filled")
+
+def main():
+    """Run all nonce manager tests"""
+    test_concurrent_payouts_get_unique_nonces()
+    test_failed_send_nonce_is_reused()
+    test_nonce_too_low_resyncs()
+    test_timeout_resyncs_instead_of_reusing()
+    test_fill_gaps()
+    print("\n🎯 NONCE MANAGER TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
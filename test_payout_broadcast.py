@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Payout Broadcast Testing Script
+Tests that a payout whose broadcast timed out is tracked as sent, never paid a second time
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BUYER = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB71"
+
+# Each scenario runs in a fresh interpreter: main's services are module-level and built once
+SETUP = f"""
+import json
+import requests
+from web3 import Web3
+from web3.middleware.geth_poa import geth_poa_middleware
+from bench_deal_flow import FakeBot
+from sim_chain import SimulatedChain
+import main
+
+class TimeoutChain(SimulatedChain):
+    '''Serves every request, but the answers to the (method, nth call) pairs in timeouts never arrive'''
+    timeouts = set()
+
+    def make_request(self, method, params):
+        response = super().make_request(method, params)
+        if (method, self.requests[method]) in self.timeouts:
+            raise requests.exceptions.ReadTimeout("read timed out")
+        return response
+
+chain = TimeoutChain()
+client = Web3(chain)
+client.middleware_onion.inject(geth_poa_middleware, layer=0)
+main.configure(web3=client, bot=FakeBot())
+main.ESCROW_WALLET = main.payout_builder.account.address
+chain.mint(main.ESCROW_WALLET, 100 * 10 ** 6)
+chain.set_native_balance(main.ESCROW_WALLET, 10 ** 18)
+BUYER = "{BUYER}"
+"""
+
+def run_scenario(script):
+    """Run SETUP + script against the simulated chain; returns the JSON it prints last"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="1",
+               BOT_TOKEN="123456:simulated", PRIVATE_KEY="0x" + "11" * 32)
+    result = subprocess.run([sys.executable, "-c", SETUP + script], cwd=tempfile.mkdtemp(), env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_timed_out_transfer_is_tracked():
+    """A single payout that timed out keeps its nonce, stays tracked and settles once mined"""
+    print("📡 PAYOUT BROADCAST: Unclear Send Outcomes")
+    print("=" * 60)
+
+    outcome = run_scenario("""
+chain.timeouts = {("eth_sendRawTransaction", 1)}
+main.send_escrow_transfer(BUYER, 10 ** 6, deal_id="1", kind="release")
+tracked = main.payout_tracker.get("1") is not None
+open_after_send = "1" in main.intent_log.open_intents()
+main.send_escrow_transfer(BUYER, 10 ** 6, deal_id="2", kind="release")
+nonces = sorted(txn["nonce"] for txn in chain.transactions.values())
+chain.mine()
+main.update_payouts(chain.head)
+print(json.dumps({"tracked": tracked, "open_after_send": open_after_send, "nonces": nonces,
+                  "gaps": list(main.escrow_nonces.gaps), "buyer": chain.token_balance(BUYER),
+                  "open_after_mined": sorted(main.intent_log.open_intents())}))
+""")
+    assert outcome["tracked"] and outcome["open_after_send"]
+    assert outcome["nonces"] == [0, 1] and outcome["gaps"] == []
+    assert outcome["buyer"] == 2 * 10 ** 6
+    assert outcome["open_after_mined"] == []
+    print("✅ PASS: Timed-out payout tracked to its receipt, nonce not reused")
+
+def test_timed_out_disperse_is_not_paid_twice():
+    """A batch whose Disperse send timed out is tracked, not resent as single transfers"""
+    outcome = run_scenario("""
+main.payout_batcher.window_seconds = 0
+for deal_id in ["1", "2"]:
+    main.create_deal("buyer", "seller", 1.0, BUYER, deal_id)
+    db = main.load_db()
+    db[deal_id]["status"] = "payout_pending"
+    main.save_db(db)
+    main.payout_batcher.add(deal_id, BUYER, 10 ** 6)
+
+chain.timeouts = {("eth_sendRawTransaction", 2)}  # The approval goes through, the Disperse times out
+main.flush_payout_batch()
+sent = len(chain.transactions)
+payout_ids = [main.load_db()[deal_id].get("payout_id") for deal_id in ["1", "2"]]
+chain.mine()
+main.update_payouts(chain.head)
+print(json.dumps({"sent": sent, "payout_ids": payout_ids, "buyer": chain.token_balance(BUYER),
+                  "statuses": [main.load_db()[deal_id]["status"] for deal_id in ["1", "2"]]}))
+""")
+    assert outcome["sent"] == 2  # Approval and Disperse, no single transfers
+    assert outcome["payout_ids"] == ["batch-1", "batch-1"]
+    assert outcome["buyer"] == 2 * 10 ** 6
+    assert outcome["statuses"] == ["completed", "completed"]
+    print("✅ PASS: Timed-out Disperse settled by its receipt, deals paid once")
+
+def test_disperse_not_signed_is_retried():
+    """A batch that failed before its Disperse was signed is queued again, not sent singly"""
+    outcome = run_scenario("""
+main.payout_batcher.window_seconds = 0
+main.payout_batcher.add("1", BUYER, 10 ** 6)
+main.payout_batcher.add("2", BUYER, 10 ** 6)
+chain.timeouts = {("eth_call", 1)}  # Reading the Disperse allowance
+main.flush_payout_batch()
+print(json.dumps({"sent": len(chain.transactions), "queued": main.payout_batcher.pending_count()}))
+""")
+    assert outcome == {"sent": 0, "queued": 2}
+    print("✅ PASS: Unsent batch queued again")
+
+def main():
+    """Run all payout broadcast tests"""
+    test_timed_out_transfer_is_tracked()
+    test_timed_out_disperse_is_not_paid_twice()
+    test_disperse_not_signed_is_retried()
+    print("\n🎯 PAYOUT BROADCAST TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Payout Queue Testing Script
+Tests idempotent payout jobs, persistence and crash handling of the payout worker queue
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from payout_queue import PayoutQueue, JOB_QUEUED, JOB_DONE, JOB_INTERRUPTED
+
+def queue_path():
+    return os.path.join(tempfile.mkdtemp(), "payout_jobs.json")
+
+def test_enqueue_is_idempotent_per_deal():
+    """A second request for the same deal while one is active is a duplicate"""
+    print("📥 PAYOUT QUEUE: Durable Idempotent Jobs")
+    print("=" * 60)
+
+    queue = PayoutQueue(queue_path())
+    job, created = queue.enqueue("1", "release", reply_to=(-100, 7))
+    assert created and job["state"] == JOB_QUEUED
+    assert queue.enqueue("1", "release") == (job, False)
+
+    running = queue.next_job(timeout=0)
+    assert running["deal_id"] == "1" and running["reply_to"] == [-100, 7]
+    assert not queue.enqueue("1", "release")[1]  # Still running
+    print("✅ PASS: One active job per deal")
+
+def test_fifo_and_retry_after_failure():
+    """Jobs run in order; a failed deal can be queued again"""
+    queue = PayoutQueue(queue_path())
+    for deal_id in ["1", "2", "3"]:
+        queue.enqueue(deal_id, "release")
+
+    assert [queue.next_job(timeout=0)["deal_id"] for _ in range(3)] == ["1", "2", "3"]
+    assert queue.next_job(timeout=0) is None
+
+    queue.fail("2", "Insufficient MATIC")
+    queue.complete("1")
+    assert queue.enqueue("2", "release")[1]
+    assert queue.get("1")["state"] == JOB_DONE
+    print("✅ PASS: FIFO order, retry allowed after failure")
+
+def test_restart_resumes_queued_and_interrupts_running():
+    """Queued jobs survive a restart; a running one is never re-run automatically"""
+    path = queue_path()
+    queue = PayoutQueue(path)
+    queue.enqueue("1", "release")
+    queue.enqueue("2", "confirm", {"recipient": "0xabc", "amount_wei": 5})
+    queue.next_job(timeout=0)  # Deal 1 was being sent when the bot died
+
+    restarted = PayoutQueue(path)
+    assert restarted.get("1")["state"] == JOB_INTERRUPTED
+    assert [job["deal_id"] for job in restarted.interrupted()] == ["1"]
+    assert not restarted.enqueue("1", "release")[1]  # Interrupted jobs need settling first
+
+    job = restarted.next_job(timeout=0)
+    assert job["deal_id"] == "2" and job["args"]["amount_wei"] == 5
+    assert restarted.next_job(timeout=0) is None
+
+    restarted.resolve("1", JOB_DONE, "payout recorded before restart")
+    assert PayoutQueue(path).get("1")["state"] == JOB_DONE
+    print("✅ PASS: Queued jobs resumed, interrupted job held back")
+
+def test_worker_wakes_on_enqueue():
+    """A waiting worker picks up a job as soon as it is queued"""
+    queue = PayoutQueue(queue_path())
+    picked = []
+    worker = threading.Thread(target=lambda: picked.append(queue.next_job(timeout=5)))
+    worker.start()
+    time.sleep(0.05)
+    start = time.time()
+    queue.enqueue("9", "release")
+    worker.join()
+
+    assert picked[0]["deal_id"] == "9"
+    assert time.time() - start < 1
+    print("✅ PASS: Worker woken immediately")
+
+def test_finished_jobs_pruned():
+    """Finished jobs are forgotten after keep_seconds"""
+    queue = PayoutQueue(queue_path(), keep_seconds=0)
+    queue.enqueue("1", "release")
+    queue.next_job(timeout=0)
+    queue.fail("1", "boom")
+    queue.enqueue("2", "release")
+
+    assert queue.get("1") is None
+    print("✅ PASS: Old jobs pruned")
+
+def main():
+    """Run all payout queue tests"""
+    test_enqueue_is_idempotent_per_deal()
+    test_fifo_and_retry_after_failure()
+    test_restart_resumes_queued_and_interrupts_running()
+    test_worker_wakes_on_enqueue()
+    test_finished_jobs_pruned()
+    print("\n🎯 PAYOUT QUEUE TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
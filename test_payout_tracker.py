@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Payout Tracker Testing Script
+Tests receipt polling, fee bumps on stuck payouts and dropped/reverted detection
+"""
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from payout_tracker import (
+    PayoutTracker, PAYOUT_CONFIRMED, PAYOUT_REVERTED, PAYOUT_DROPPED, PAYOUT_REPLACED, PAYOUT_STUCK
+)
+
+GWEI = 10 ** 9
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+USDT = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+
+class ReceiptChain(BaseProvider):
+    """Serves receipts for mined hashes and the escrow's mined nonce"""
+
+    def __init__(self):
+        self.receipts = {}
+        self.mined_nonce = 5
+        self.requests = 0
+
+    def make_request(self, method, params):
+        self.requests += 1
+        if method == "eth_getTransactionReceipt":
+            return {"result": self.receipts.get(params[0])}
+        if method == "eth_getTransactionCount":
+            return {"result": hex(self.mined_nonce)}
+        if method == "eth_chainId":
+            return {"result": "0x89"}
+        raise ValueError(f"unsupported method {method}")
+
+    def mine(self, tx_hash, status=1):
+        self.receipts[tx_hash] = {"transactionHash": tx_hash, "status": hex(status), "blockNumber": "0x64"}
+        self.mined_nonce += 1
+
+class Broadcaster:
+    """Stands in for sign-and-send, recording every transaction broadcast"""
+
+    def __init__(self):
+        self.sent = []
+
+    def __call__(self, txn, deal_id=None):
+        self.sent.append(txn)
+        return "0x" + f"{len(self.sent) + 100:064x}"
+
+def payout_txn(nonce=5):
+    return {"from": ESCROW, "to": USDT, "value": 0, "data": "0xa9059cbb", "nonce": nonce, "gas": 60000,
+            "chainId": 137, "maxFeePerGas": 100 * GWEI, "maxPriorityFeePerGas": 30 * GWEI}
+
+def test_confirmed_payout():
+    """A mined receipt with status 1 confirms the payout and stops tracking it"""
+    print("🧾 PAYOUT TRACKER: Receipts and Fee Bumps")
+    print("=" * 60)
+
+    chain = ReceiptChain()
+    tracker = PayoutTracker(Web3(chain), Broadcaster())
+    tracker.track("1", payout_txn(), "0xaa", 100, "release")
+
+    assert tracker.poll(101) == []
+    chain.mine("0xaa")
+    events = tracker.poll(102)
+
+    assert [(deal_id, event) for deal_id, event, _, _ in events] == [("1", PAYOUT_CONFIRMED)]
+    assert events[0][2]["kind"] == "release"
+    assert tracker.pending_count() == 0
+    print("✅ PASS: Confirmed on receipt")
+
+def test_reverted_payout():
+    """A receipt with status 0 is reported as reverted"""
+    chain = ReceiptChain()
+    tracker = PayoutTracker(Web3(chain), Broadcaster())
+    tracker.track("1", payout_txn(), "0xaa", 100, "release")
+    chain.mine("0xaa", status=0)
+
+    assert tracker.poll(101)[0][1] == PAYOUT_REVERTED
+    print("✅ PASS: Revert detected")
+
+def test_stuck_payout_is_bumped_on_same_nonce():
+    """After bump_after_blocks the payout is rebroadcast with the same nonce and higher fees"""
+    chain = ReceiptChain()
+    send = Broadcaster()
+    tracker = PayoutTracker(Web3(chain), send, bump_after_blocks=10, bump_percent=15)
+    tracker.track("1", payout_txn(), "0xaa", 100, "release")
+
+    assert tracker.poll(109) == []
+    events = tracker.poll(110)
+    assert events[0][1] == PAYOUT_REPLACED
+    assert len(send.sent) == 1
+    bumped = send.sent[0]
+    assert bumped["nonce"] == 5
+    assert bumped["maxFeePerGas"] == 115 * GWEI
+    assert bumped["maxPriorityFeePerGas"] == 34500000000
+
+    # The replacement is mined: the deal settles under its hash
+    replacement = tracker.get("1")["tx_hashes"][-1]
+    chain.mine(replacement)
+    events = tracker.poll(111)
+    assert events[0][1] == PAYOUT_CONFIRMED
+    assert events[0][3]["transactionHash"] == replacement
+    print("✅ PASS: Bumped on the same nonce, replacement confirmed")
+
+def test_original_mined_after_bump():
+    """If the original version wins the race, it still confirms the payout"""
+    chain = ReceiptChain()
+    tracker = PayoutTracker(Web3(chain), Broadcaster(), bump_after_blocks=1)
+    tracker.track("1", payout_txn(), "0xaa", 100, "release")
+    tracker.poll(101)
+    chain.mine("0xaa")
+
+    assert tracker.poll(102)[0][1] == PAYOUT_CONFIRMED
+    print("✅ PASS: Any broadcast version settles the deal")
+
+def test_dropped_payout():
+    """A nonce used by someone else's transaction is reported after two polls"""
+    chain = ReceiptChain()
+    tracker = PayoutTracker(Web3(chain), Broadcaster())
+    tracker.track("1", payout_txn(), "0xaa", 100, "release")
+    chain.mined_nonce = 6
+
+    assert tracker.poll(101) == []
+    assert tracker.poll(102)[0][1] == PAYOUT_DROPPED
+    print("✅ PASS: Dropped payout detected")
+
+def test_stuck_alert_after_max_bumps():
+    """Once out of bumps the payout is reported stuck exactly once"""
+    chain = ReceiptChain()
+    send = Broadcaster()
+    tracker = PayoutTracker(Web3(chain), send, bump_after_blocks=1, max_bumps=2)
+    tracker.track("1", payout_txn(), "0xaa", 100, "release")
+
+    events = [event for head in range(101, 106) for _, event, _, _ in tracker.poll(head)]
+    assert events == [PAYOUT_REPLACED, PAYOUT_REPLACED, PAYOUT_STUCK]
+    assert len(send.sent) == 2
+    print("✅ PASS: Stuck payout reported once")
+
+def test_one_batch_per_poll():
+    """Many pending payouts are polled in one batch of requests"""
+    chain = ReceiptChain()
+    tracker = PayoutTracker(Web3(chain), Broadcaster())
+    for nonce in range(5, 15):
+        tracker.track(str(nonce), payout_txn(nonce), f"0x{nonce:02x}", 100, "release")
+
+    restored = PayoutTracker(Web3(chain), Broadcaster())
+    restored.load(tracker.to_dict())
+    chain.requests = 0
+    assert restored.poll(101) == []
+    assert chain.requests == 11  # 10 receipts + 1 nonce, sent as one batch on batching providers
+    print("✅ PASS: Restored payouts polled together")
+
+def main():
+    """Run all payout tracker tests"""
+    test_confirmed_payout()
+    test_reverted_payout()
+    test_stuck_payout_is_bumped_on_same_nonce()
+    test_original_mined_after_bump()
+    test_dropped_payout()
+    test_stuck_alert_after_max_bumps()
+    test_one_batch_per_poll()
+    print("\n🎯 PAYOUT TRACKER TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+RPC Batching Testing Script
+Tests that independent chain reads share one HTTP round trip
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from web3 import Web3
+
+from rpc_batch import RPCBatch
+from rpc_transport import PooledHTTPProvider
+
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+TOKEN = "0xc2132D05D31c914a87C6611C10748AEb04B58e8F"
+
+class FakeNode(BaseHTTPRequestHandler):
+    """Minimal JSON-RPC node that answers batches in reverse order"""
+    protocol_version = "HTTP/1.1"
+    posts = []
+
+    def answer(self, request):
+        method = request["method"]
+        if method == "eth_blockNumber":
+            return {"result": "0x64"}
+        if method == "eth_getBalance":
+            return {"result": hex(10 ** 18)}
+        if method == "eth_call":
+            return {"result": "0x" + format(25 * 10 ** 6, "064x")}
+        return {"error": {"code": -32601, "message": "method not found"}}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        FakeNode.posts.append(body)
+        if isinstance(body, list):
+            out = [dict(self.answer(r), jsonrpc="2.0", id=r["id"]) for r in reversed(body)]
+        else:
+            out = dict(self.answer(body), jsonrpc="2.0", id=body["id"])
+        data = json.dumps(out).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def start_node():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNode)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, Web3(PooledHTTPProvider(f"http://127.0.0.1:{server.server_port}"))
+
+def test_one_round_trip():
+    """Head, MATIC and USDT balance come back from a single POST"""
+    print("📦 RPC BATCH: Single Round Trip")
+    print("=" * 60)
+
+    server, web3 = start_node()
+    FakeNode.posts = []
+    batch = RPCBatch(web3)
+    head = batch.block_number()
+    matic = batch.get_balance(ESCROW)
+    usdt = batch.token_balance(TOKEN, ESCROW)
+    batch.execute()
+
+    assert len(FakeNode.posts) == 1
+    assert head.result() == 100
+    assert matic.result() == 10 ** 18
+    assert usdt.result() == 25 * 10 ** 6
+    server.shutdown()
+    print("✅ PASS: Three reads, one HTTP request, results matched by id")
+
+def test_per_call_errors():
+    """One failing call does not hide the results of the others"""
+    server, web3 = start_node()
+    batch = RPCBatch(web3)
+    head = batch.block_number()
+    bad = batch.add("eth_unknownMethod", [])
+    batch.execute()
+
+    assert head.result() == 100
+    try:
+        bad.result()
+        assert False, "error result should raise"
+    except ValueError:
+        pass
+    server.shutdown()
+    print("✅ PASS: Errors stay with their own call")
+
+def main():
+    """Run all RPC batch tests"""
+    test_one_round_trip()
+    test_per_call_errors()
+    print("\n🎯 RPC BATCH TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+RPC Failover Testing Script
+Tests hedged reads, circuit breakers and sticky writes across several endpoints
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rpc_failover import CIRCUIT_OPEN, EndpointHealth, FailoverProvider
+
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+
+def start_node(name, delay=0.0, status=200):
+    """Local JSON-RPC node that answers every call with its own name"""
+    calls = []
+
+    class Node(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            calls.append(body["method"])
+            time.sleep(delay)
+            data = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": name}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Node)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", calls
+
+def test_hedged_read_bounds_latency():
+    """A slow primary is raced by the next endpoint instead of waited on"""
+    print("🛰️ RPC FAILOVER: Hedged Reads")
+    print("=" * 60)
+
+    slow, slow_uri, _ = start_node("slow", delay=1.5)
+    fast, fast_uri, _ = start_node("fast")
+    provider = FailoverProvider([slow_uri, fast_uri], hedge_min_delay=0.1)
+
+    started = time.time()
+    response = provider.make_request("eth_blockNumber", [])
+    elapsed = time.time() - started
+
+    assert response["result"] == "fast"
+    assert elapsed < 1.0
+    assert provider.hedged_requests >= 1
+    slow.shutdown()
+    fast.shutdown()
+    print(f"✅ PASS: Answer in {elapsed:.2f}s despite a 1.5s endpoint")
+
+def test_failing_endpoint_is_demoted():
+    """After a failure, traffic moves to healthy endpoints without waiting on the broken one"""
+    broken, broken_uri, broken_calls = start_node("broken", status=503)
+    healthy, healthy_uri, _ = start_node("healthy")
+    provider = FailoverProvider([broken_uri, healthy_uri])
+
+    for _ in range(4):
+        assert provider.make_request("eth_chainId", [])["result"] == "healthy"
+
+    assert len(broken_calls) == 1
+    broken.shutdown()
+    healthy.shutdown()
+    print("✅ PASS: Failing endpoint demoted after its first error")
+
+def test_circuit_breaker():
+    """Consecutive failures open the circuit; after the reset timeout one trial is allowed"""
+    health = EndpointHealth("http://node", failure_threshold=2, reset_timeout=60)
+    health.record_failure()
+    assert health.available()
+    health.record_failure()
+    assert health.state == CIRCUIT_OPEN
+    assert not health.available()
+
+    assert health.available(now=time.time() + 61)
+    health.record_start()
+    assert not health.available(now=time.time() + 61)  # One trial at a time
+    health.record_success(0.05)
+    assert health.available()
+    print("✅ PASS: Circuit opens, half-opens and closes")
+
+def test_writes_are_sticky_and_never_duplicated():
+    """Sends go to one endpoint, exactly once"""
+    first, first_uri, first_calls = start_node("first")
+    second, second_uri, second_calls = start_node("second")
+    provider = FailoverProvider([first_uri, second_uri])
+
+    answers = {provider.make_request("eth_sendRawTransaction", ["0x00"])["result"] for _ in range(3)}
+    sends = first_calls.count("eth_sendRawTransaction") + second_calls.count("eth_sendRawTransaction")
+
+    assert len(answers) == 1
+    assert sends == 3
+    first.shutdown()
+    second.shutdown()
+    print("✅ PASS: Writes pinned to a single endpoint")
+
+def test_pending_nonce_reads_are_never_shared():
+    """Each pending nonce read is its own request to the node that took our sends"""
+    first, first_uri, first_calls = start_node("first", delay=0.2)
+    second, second_uri, second_calls = start_node("second", delay=0.2)
+    provider = FailoverProvider([first_uri, second_uri])
+    write_node = provider.make_request("eth_sendRawTransaction", ["0x00"])["result"]
+
+    def burst(method, params):
+        threads = [threading.Thread(target=provider.make_request, args=(method, params)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    burst("eth_getTransactionCount", [ESCROW, "pending"])
+    nonce_reads = {"first": first_calls.count("eth_getTransactionCount"),
+                   "second": second_calls.count("eth_getTransactionCount")}
+    assert nonce_reads[write_node] == 5 and sum(nonce_reads.values()) == 5
+
+    burst("eth_blockNumber", [])
+    assert provider.single_flight.metrics()["executions"] < 5  # Plain reads still coalesce
+    first.shutdown()
+    second.shutdown()
+    print("✅ PASS: Pending nonce reads sent one by one to the write endpoint")
+
+def main():
+    """Run all RPC failover tests"""
+    test_hedged_read_bounds_latency()
+    test_failing_endpoint_is_demoted()
+    test_circuit_breaker()
+    test_writes_are_sticky_and_never_duplicated()
+    test_pending_nonce_reads_are_never_shared()
+    print("\n🎯 RPC FAILOVER TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
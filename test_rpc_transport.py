@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+RPC Transport Testing Script
+Tests that read-only calls are retried, sends never are, and a busy pool fails instead of hanging
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from rpc_transport import PooledHTTPProvider
+
+class FlakyNode(BaseHTTPRequestHandler):
+    """JSON-RPC node that answers 503 to the first `failures` posts and stalls on `slow_method`"""
+    protocol_version = "HTTP/1.1"
+    failures = 0
+    slow_method = None
+    release = threading.Event()
+    posts = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        method = "batch" if isinstance(body, list) else body["method"]
+        FlakyNode.posts.append(method)
+        if method == FlakyNode.slow_method:
+            FlakyNode.release.wait(5)
+        if FlakyNode.failures > 0:
+            FlakyNode.failures -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if method == "batch":
+            data = json.dumps([{"jsonrpc": "2.0", "id": call["id"], "result": "0x64"} for call in body]).encode()
+        else:
+            data = json.dumps({"jsonrpc": "2.0", "id": body["id"], "result": "0x64"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+def start_node(failures=0, slow_method=None, **provider_options):
+    FlakyNode.failures = failures
+    FlakyNode.slow_method = slow_method
+    FlakyNode.release = threading.Event()
+    FlakyNode.posts = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyNode)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    provider = PooledHTTPProvider(f"http://127.0.0.1:{server.server_port}", backoff_base=0.01, **provider_options)
+    return server, provider
+
+def test_reads_are_retried():
+    """A read that hits transient 503s is retried until the node answers"""
+    print("🔌 RPC TRANSPORT: Retries and Pool Limits")
+    print("=" * 60)
+
+    server, provider = start_node(failures=2)
+    response = provider.make_request("eth_blockNumber", [])
+    assert response["result"] == "0x64"
+    assert FlakyNode.posts == ["eth_blockNumber"] * 3
+    server.shutdown()
+    print("✅ PASS: Read retried past two 503s")
+
+def test_send_is_never_retried():
+    """A raw transaction is posted once, even when the node answers with a retryable status"""
+    server, provider = start_node(failures=1)
+    try:
+        provider.make_request("eth_sendRawTransaction", ["0x00"])
+        assert False, "503 on a send must surface"
+    except requests.HTTPError:
+        pass
+    assert FlakyNode.posts == ["eth_sendRawTransaction"]
+
+    batch_calls = [("eth_blockNumber", []), ("eth_sendRawTransaction", ["0x00"])]
+    FlakyNode.failures = 1
+    try:
+        provider.make_batch_request(batch_calls)
+        assert False, "a batch holding a send is not retryable"
+    except requests.HTTPError:
+        pass
+    assert FlakyNode.posts == ["eth_sendRawTransaction", "batch"]
+    server.shutdown()
+    print("✅ PASS: Send posted exactly once")
+
+def test_busy_pool_times_out():
+    """With every connection held by a hung call, the next caller gives up after pool_timeout"""
+    server, provider = start_node(slow_method="eth_getLogs", pool_size=1, pool_timeout=0.2, max_retries=0)
+    hung = threading.Thread(target=provider.make_request, args=("eth_getLogs", [{}]), daemon=True)
+    hung.start()
+    while not FlakyNode.posts:
+        time.sleep(0.01)
+
+    started = time.time()
+    try:
+        provider.make_request("eth_blockNumber", [])
+        assert False, "the pool is exhausted"
+    except requests.ConnectTimeout:
+        pass
+    waited = time.time() - started
+    assert waited < 2, f"waited {waited:.2f}s for a connection"
+    assert FlakyNode.posts == ["eth_getLogs"]
+
+    FlakyNode.release.set()
+    hung.join(5)
+    assert provider.make_request("eth_blockNumber", [])["result"] == "0x64"
+    server.shutdown()
+    print(f"✅ PASS: Caller gave up on the busy pool after {waited:.2f}s")
+
+def main():
+    """Run all RPC transport tests"""
+    test_reads_are_retried()
+    test_send_is_never_retried()
+    test_busy_pool_times_out()
+    print("\n🎯 RPC TRANSPORT TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,17 @@ Tests the new sender verification system and fraud prevention features
 
 import json
 import time
+from web3 import Web3
 from main import verify_payment_sender, create_deal, load_db, save_db, load_wallets, save_wallets
+from main import configure, ESCROW_WALLET
+from sim_chain import SimulatedChain
+
+# The payments these tests look for, on a simulated chain rather than the live RPC
+chain = SimulatedChain()
+chain.deposit("0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A", ESCROW_WALLET, 10 * 10 ** 6)
+chain.deposit("0xabcdefabcdefabcdefabcdefabcdefabcdefabcd", ESCROW_WALLET, 25 * 10 ** 6)
+chain.mine()
+configure(web3=Web3(chain))
 
 def test_payment_verification():
     """Test the payment sender verification system"""
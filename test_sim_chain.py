@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Simulated Chain Testing Script
+Tests the in-process Polygon simulator through web3: deposits, payouts, fee rules, reorgs and latency
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from web3.middleware.geth_poa import geth_poa_middleware
+
+from multicall import Multicall
+from payout_builder import PayoutBuilder
+from rpc_batch import RPCBatch
+from sim_chain import SimulatedChain, USDT_ADDRESS, GWEI
+from watch_set import WatchSet
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ESCROW_KEY = "0x" + "11" * 32
+SELLER = "0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A"
+BUYER = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+
+def connect(chain):
+    client = Web3(chain)
+    client.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return client
+
+def is_unknown(client, tx_hash):
+    try:
+        client.eth.get_transaction_receipt(tx_hash)
+        return False
+    except TransactionNotFound:
+        return True
+
+def payout(builder, nonce, amount=1000000, max_fee=100 * GWEI, tip=30 * GWEI):
+    txn = builder.build(BUYER, amount, nonce, {"maxFeePerGas": max_fee, "maxPriorityFeePerGas": tip})
+    return builder.sign(txn).rawTransaction
+
+def test_deposit_seen_by_watch_set():
+    """A deposit shows up in getLogs, balanceOf and Multicall, at the right block only"""
+    print("⛓️ SIMULATED CHAIN: Offline Polygon Node")
+    print("=" * 60)
+
+    chain = SimulatedChain()
+    client = connect(chain)
+    escrow = PayoutBuilder(ESCROW_KEY, USDT_ADDRESS, 137, 60000).account.address
+    tx_hash = chain.deposit(SELLER, escrow, 10000000)
+    assert client.eth.get_transaction(tx_hash)["blockNumber"] is None
+    chain.mine()
+
+    watch_set = WatchSet(USDT_ADDRESS)
+    watch_set.add(escrow)
+    transfers = watch_set.fetch_transfers(client, 1, chain.head)
+    assert [(t["from"], t["value"], t["block_number"]) for t in transfers] == [(SELLER.lower(), 10000000, 1)]
+
+    block_number, balances = Multicall(client).balances(USDT_ADDRESS, [escrow], native=False, block=1)
+    assert block_number == 1 and balances[escrow]["token"] == 10000000
+    assert chain.token_balance(escrow, block=0) == 0
+    print("✅ PASS: Deposit visible to logs, balanceOf and Multicall")
+
+def test_signed_payout_is_mined():
+    """A signed payout waits in the mempool, then moves USDT and gets a receipt"""
+    chain = SimulatedChain()
+    client = connect(chain)
+    builder = PayoutBuilder(ESCROW_KEY, USDT_ADDRESS, 137, 60000)
+    chain.mint(builder.account.address, 5000000)
+
+    tx_hash = client.eth.send_raw_transaction(payout(builder, 0))
+    assert client.eth.get_transaction_count(builder.account.address, "pending") == 1
+    assert client.eth.get_transaction_count(builder.account.address) == 0
+    chain.mine()
+
+    receipt = client.eth.get_transaction_receipt(tx_hash)
+    assert receipt["status"] == 1 and len(receipt["logs"]) == 1
+    assert chain.token_balance(BUYER) == 1000000 and chain.token_balance(builder.account.address) == 4000000
+
+    for raw, error in [(payout(builder, 0), "already known"), (payout(builder, 0, amount=7), "nonce too low")]:
+        try:
+            client.eth.send_raw_transaction(raw)
+            assert False, "send should have been rejected"
+        except ValueError as e:
+            assert error in str(e)
+    print("✅ PASS: Payout mined, duplicates and stale nonces rejected")
+
+def test_overdrawn_payout_reverts():
+    """A transfer beyond the sender's balance is mined with status 0 and no log"""
+    chain = SimulatedChain(auto_mine=True)
+    client = connect(chain)
+    builder = PayoutBuilder(ESCROW_KEY, USDT_ADDRESS, 137, 60000)
+    receipt = client.eth.get_transaction_receipt(client.eth.send_raw_transaction(payout(builder, 0)))
+    assert receipt["status"] == 0 and receipt["logs"] == []
+    assert client.eth.get_transaction_count(builder.account.address) == 1
+    print("✅ PASS: Overdrawn transfer reverts")
+
+def test_stuck_payout_needs_fee_bump():
+    """Under a fee spike the payout waits; a replacement must raise fees by 10%"""
+    chain = SimulatedChain(base_fee_wei=150 * GWEI)
+    client = connect(chain)
+    builder = PayoutBuilder(ESCROW_KEY, USDT_ADDRESS, 137, 60000)
+    chain.mint(builder.account.address, 5000000)
+
+    original = client.eth.send_raw_transaction(payout(builder, 0))
+    chain.mine(3)
+    assert client.eth.get_transaction(original)["blockNumber"] is None  # Fee cap below the base fee
+
+    try:
+        client.eth.send_raw_transaction(payout(builder, 0, max_fee=105 * GWEI, tip=33 * GWEI))
+        assert False, "underpriced replacement should have been rejected"
+    except ValueError as e:
+        assert "underpriced" in str(e)
+
+    replacement = client.eth.send_raw_transaction(payout(builder, 0, max_fee=200 * GWEI, tip=35 * GWEI))
+    chain.mine()
+    assert client.eth.get_transaction_receipt(replacement)["status"] == 1
+    assert is_unknown(client, original)
+    print("✅ PASS: Stuck payout replaced on the same nonce")
+
+def test_reorg_moves_or_drops_deposit():
+    """A reorg re-includes a deposit in a new block, or drops it and its balance"""
+    chain = SimulatedChain()
+    client = connect(chain)
+    tx_hash = chain.deposit(SELLER, BUYER, 10000000)
+    chain.mine(2)
+    first_block = client.eth.get_transaction_receipt(tx_hash)["blockHash"]
+
+    chain.reorg(2)
+    receipt = client.eth.get_transaction_receipt(tx_hash)
+    assert receipt["blockHash"] != first_block and receipt["blockNumber"] == 1
+    assert chain.token_balance(BUYER) == 10000000
+
+    chain.reorg(2, new_blocks=3, drop=[tx_hash])
+    assert chain.head == 3
+    assert is_unknown(client, tx_hash)
+    assert chain.token_balance(BUYER) == 0
+    assert client.eth.get_logs({"fromBlock": 0, "toBlock": "latest"}) == []
+    print("✅ PASS: Reorg re-includes or drops the deposit")
+
+def test_batch_costs_one_round_trip():
+    """Injected latency is paid once per request, and once per batch"""
+    chain = SimulatedChain(latency=0.05, max_log_range=100)
+    client = connect(chain)
+    chain.mine(5)
+
+    batch = RPCBatch(client)
+    head = batch.block_number()
+    hashes = [batch.block_hash(number) for number in range(5)]
+    started = time.perf_counter()
+    batch.execute()
+    elapsed = time.perf_counter() - started
+
+    assert head.result() == 5 and all(call.result() for call in hashes)
+    assert chain.round_trips == 1 and 0.05 <= elapsed < 0.5
+
+    try:
+        client.eth.get_logs({"fromBlock": 0, "toBlock": 500})
+        assert False, "wide getLogs should be refused"
+    except ValueError as e:
+        assert "range" in str(e)
+    print("✅ PASS: One round trip per batch, bounded getLogs")
+
+def test_deal_flow_end_to_end():
+    """Deposit -> confirm -> batched release runs through the bot against the simulator"""
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "bench_deal_flow.py"), "--deals", "5", "--batch"],
+        capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "completed 5/5 deals, 7 transactions" in result.stdout
+    print("✅ PASS: 5 deals completed with one Disperse payout")
+
+def main():
+    """Run all simulated chain tests"""
+    test_deposit_seen_by_watch_set()
+    test_signed_payout_is_mined()
+    test_overdrawn_payout_reverts()
+    test_stuck_payout_needs_fee_bump()
+    test_reorg_moves_or_drops_deposit()
+    test_batch_costs_one_round_trip()
+    test_deal_flow_end_to_end()
+    print("\n🎯 SIMULATED CHAIN TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
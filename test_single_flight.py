@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Single-Flight Testing Script
+Tests that a burst of identical reads costs one call
+"""
+
+import threading
+import time
+
+from single_flight import SingleFlight
+
+def run_burst(flight, key, fn, callers=20):
+    results = []
+    errors = []
+    barrier = threading.Barrier(callers)
+
+    def caller():
+        barrier.wait()
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def test_burst_shares_one_call():
+    """Twenty concurrent /balance lookups hit the node once"""
+    print("🛬 SINGLE FLIGHT: Burst Coalescing")
+    print("=" * 60)
+
+    flight = SingleFlight()
+    executions = []
+
+    def slow_read():
+        executions.append(1)
+        time.sleep(0.2)
+        return 42
+
+    results, errors = run_burst(flight, "eth_call:balanceOf", slow_read)
+    metrics = flight.metrics()
+
+    assert results == [42] * 20 and not errors
+    assert len(executions) == 1
+    assert metrics["executions"] == 1 and metrics["coalesced"] == 19
+    assert metrics["in_flight"] == 0
+    print("✅ PASS: 20 callers, 1 RPC call")
+
+def test_errors_reach_every_waiter():
+    """A failed call fails all callers that were waiting on it, then the key is free again"""
+    flight = SingleFlight()
+
+    def failing_read():
+        time.sleep(0.1)
+        raise ValueError("node timeout")
+
+    results, errors = run_burst(flight, "eth_blockNumber", failing_read, callers=5)
+    assert not results and len(errors) == 5
+    assert flight.do("eth_blockNumber", lambda: 7) == 7
+    print("✅ PASS: Errors shared, next call starts fresh")
+
+def main():
+    """Run all single-flight tests"""
+    test_burst_shares_one_call()
+    test_errors_reach_every_waiter()
+    print("\n🎯 SINGLE FLIGHT TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
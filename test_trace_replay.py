@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Trace Replay Testing Script
+Tests scrubbed trace recording, main's recording hooks and replaying a trace through the handlers
+"""
+
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+from types import SimpleNamespace
+
+from trace_recorder import TraceRecorder, read_trace, pseudonym_user_id, state_summary
+from replay_trace import load_trace, state_divergence
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+GROUP_ID = -4986666475
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+SELLER_WALLET = "0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A"
+BUYER_WALLET = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB71"
+
+def message(user_id, username, text, chat_id=None):
+    return SimpleNamespace(from_user=SimpleNamespace(id=user_id, username=username),
+                           chat=SimpleNamespace(id=chat_id or user_id), text=text)
+
+def trace_path():
+    return os.path.join(tempfile.mkdtemp(), "trace.jsonl.gz")
+
+def test_trace_is_scrubbed():
+    """Users, addresses, deal ids and free text never reach the trace; amounts do"""
+    print("🔁 TRACE REPLAY: Recorded Traffic Through Local Stand-Ins")
+    print("=" * 60)
+
+    path = trace_path()
+    recorder = TraceRecorder(path, escrow_wallet=ESCROW, group_id=GROUP_ID, admins=["t1start1"])
+    recorder.record_message(message(11, "alice", f"/mywallet {SELLER_WALLET}"), now=100)
+    recorder.record_message(message(11, "alice", "/sell 12.5", GROUP_ID), now=101)
+    recorder.record_message(message(12, "t1start1", "/forcerelease 1760000000 @alice pays now", GROUP_ID), now=102)
+    recorder.record_message(message(11, "alice", "my phone is 555 0100"), now=103)
+    recorder.record_deposit({"from": SELLER_WALLET.lower(), "to": ESCROW.lower(), "value": 12500000,
+                             "block_number": 7}, now=110)
+    recorder.close()
+
+    with gzip.open(path, "rt") as f:
+        raw = f.read()
+    for secret in ["alice", SELLER_WALLET.lower()[2:], "t1start1", "1760000000", "pays", "555"]:
+        assert secret not in raw.lower(), secret
+
+    header, *events = read_trace(path)
+    assert header == {"k": "h", "v": 1}  # No wall-clock start time
+    wallet_event, sell_event, admin_event, text_event, deposit_event = events
+    alice = wallet_event["u"]
+    assert sell_event == {"k": "m", "u": alice, "c": "g", "x": "/sell 12.5", "t": 1.0}
+    assert admin_event["u"] == "a0" and admin_event["x"] == f"/forcerelease {{deal}} @{alice} x x"
+    assert text_event["n"] == len("my phone is 555 0100") and "x" not in text_event
+    assert deposit_event["f"] == wallet_event["x"].split()[1] and deposit_event["e"] is True
+    assert deposit_event == {"k": "d", "f": deposit_event["f"], "e": True, "v": 12500000, "t": 10.0}  # No block number
+    assert pseudonym_user_id(alice) == pseudonym_user_id(alice) > 100
+    print("✅ PASS: Trace scrubbed, pseudonyms consistent within it")
+
+def test_sessions_and_divergence():
+    """Sessions appended after restarts are laid end to end; summaries are diffed"""
+    path = trace_path()
+    first = TraceRecorder(path)
+    first.record_message(message(1, "bob", "/help"), now=50)
+    first.record_message(message(1, "bob", "/fees"), now=80)
+    first.close()
+    second = TraceRecorder(path)
+    second.record_message(message(1, "bob", "/orders"), now=5000)
+    second.close({"deals": {"completed": 2}, "wallets": 1}, now=5004)
+
+    events, recorded_state = load_trace(path)
+    assert [event["t"] for event in events] == [0.0, 30.0, 30.0]
+    assert recorded_state == {"deals": {"completed": 2}, "wallets": 1}
+
+    replayed = state_summary({"1": {"status": "completed", "amount": 5}}, {"buy_orders": {}, "sell_orders": {}}, {"@b": "0x"})
+    assert state_divergence(recorded_state, replayed) == [
+        ("deal_volume.completed", 0, 5.0),
+        ("deals.completed", 2, 1),
+    ]
+    assert state_divergence(replayed, replayed) == []
+    print("✅ PASS: Sessions joined, divergence reported")
+
+def test_main_records_when_configured():
+    """With TRACE_FILE set, the bot's update listener and close_trace() write the trace"""
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, TRACE_FILE="trace.jsonl.gz", PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="1")
+    script = (
+        "from types import SimpleNamespace as NS\n"
+        "import main\n"
+        "bot = main.build_bot()\n"
+        "assert main.record_trace_messages in bot.update_listener\n"
+        "user = NS(id=7, username='carol')\n"
+        "main.record_trace_messages([NS(from_user=user, chat=NS(id=main.GROUP_ID), text='/buy 10')])\n"
+        "main.close_trace()\n"
+        "bot.stop_bot()\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=workdir, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    events = list(read_trace(os.path.join(workdir, "trace.jsonl.gz")))
+    assert [event["k"] for event in events] == ["h", "m", "s"]
+    assert events[1]["x"] == "/buy 10" and events[1]["c"] == "g"
+    assert events[2]["state"]["wallets"] == 0
+    print("✅ PASS: main records updates and its final state")
+
+def test_replay_matches_recording():
+    """A recorded deal replays through the handlers to the recorded final state"""
+    path = trace_path()
+    recorder = TraceRecorder(path, escrow_wallet=ESCROW, group_id=GROUP_ID)
+    script = [
+        (0, message(1, "alice", "/start")),
+        (2, message(1, "alice", f"/mywallet {SELLER_WALLET}")),
+        (4, message(2, "bob", f"/mywallet {BUYER_WALLET}")),
+        (10, message(1, "alice", "/sell 10", GROUP_ID)),
+        (15, message(2, "bob", "/buy 10", GROUP_ID)),
+        (55, message(2, "bob", "/paid", GROUP_ID)),
+        (85, message(1, "alice", "/received", GROUP_ID)),
+        (90, message(1, "alice", "/mystatus")),
+    ]
+    for at, update in script:
+        recorder.record_message(update, now=1000 + at)
+        if at == 15:
+            recorder.record_deposit({"from": SELLER_WALLET.lower(), "to": ESCROW.lower(), "value": 10000000,
+                                     "block_number": 20}, now=1035)
+    recorder.close({"deals": {"completed": 1}, "deal_volume": {"completed": 10.0},
+                    "buy_orders": 0, "sell_orders": 0, "wallets": 2}, now=1300)
+
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "replay_trace.py"), path, "--speed", "0", "--strict"],
+        capture_output=True, text=True, timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "8 messages, 1 deposits" in result.stdout
+    assert "answered 8/8 commands, 0 unanswered" in result.stdout
+    assert "Final state matches the recording" in result.stdout
+    print("✅ PASS: Replay answered every command and reached the recorded state")
+
+def main():
+    """Run all trace replay tests"""
+    test_trace_is_scrubbed()
+    test_sessions_and_divergence()
+    test_main_records_when_configured()
+    test_replay_matches_recording()
+    print("\n🎯 TRACE REPLAY TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
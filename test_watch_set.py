@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Watch Set Testing Script
+Tests the single getLogs filter for every deposit address, log decoding and escrow deposit matching
+"""
+
+from web3 import Web3
+
+from main import match_escrow_transfer
+from sim_chain import SimulatedChain, USDT_ADDRESS
+from watch_set import WatchSet, TRANSFER_TOPIC, address_to_topic
+
+ESCROW = "0x5a2dD9bFe9cB39F6A1AD806747ce29718b1BfB70"
+DEAL_ADDRESS = "0x00000000000000000000000000000000000d1e01"
+SELLER = "0x742d35Cc6634C0532925a3b8D9C1bae3a8c4b22A"
+OTHER_SELLER = "0xabcdefabcdefabcdefabcdefabcdefabcdefabcd"
+
+def transfer_log(block_number, log_index, recipient, value):
+    return {
+        "transactionHash": "0x" + f"{block_number:02x}{log_index:02x}" * 16,
+        "logIndex": hex(log_index),
+        "blockNumber": hex(block_number),
+        "blockHash": "0x" + "ab" * 32,
+        "topics": [TRANSFER_TOPIC, address_to_topic(SELLER), address_to_topic(recipient)],
+        "data": hex(value),
+    }
+
+def waiting_deal(seller_wallet, amount):
+    return {"status": "waiting_usdt_deposit", "seller_wallet": seller_wallet, "amount": amount}
+
+def test_filter_covers_every_address():
+    """One filter asks for Transfer events to any watched address, by block number"""
+    print("👀 WATCH SET: One Log Query for All Deposit Addresses")
+    print("=" * 60)
+
+    watch_set = WatchSet(USDT_ADDRESS)
+    watch_set.add(ESCROW)
+    watch_set.add(DEAL_ADDRESS, "1760000000")
+    log_filter = watch_set.build_filter(100, 150)
+
+    assert log_filter["address"] == USDT_ADDRESS
+    assert log_filter["fromBlock"] == "0x64" and log_filter["toBlock"] == "0x96"
+    event, sender, recipients = log_filter["topics"]
+    assert event == TRANSFER_TOPIC and sender is None
+    assert sorted(recipients) == sorted([address_to_topic(ESCROW), address_to_topic(DEAL_ADDRESS)])
+    assert watch_set.owner(DEAL_ADDRESS.upper().replace("0X", "0x")) == "1760000000"
+    print("✅ PASS: Recipient topic is an OR-list of watched addresses")
+
+def test_decode_orders_and_bounds_logs():
+    """Logs come back oldest first; logs past max_block are left for the next tick"""
+    watch_set = WatchSet(USDT_ADDRESS)
+    logs = [transfer_log(12, 0, ESCROW, 5), transfer_log(10, 3, DEAL_ADDRESS, 7), transfer_log(10, 1, ESCROW, 10 ** 7)]
+
+    transfers = watch_set.decode_logs(logs)
+    assert [(t["block_number"], t["log_index"]) for t in transfers] == [(10, 1), (10, 3), (12, 0)]
+    assert transfers[0]["from"] == SELLER.lower() and transfers[0]["to"] == ESCROW.lower()
+    assert transfers[0]["value"] == 10 ** 7
+
+    assert [t["block_number"] for t in watch_set.decode_logs(logs, max_block=11)] == [10, 10]
+    print("✅ PASS: Logs decoded in order, bounded by max_block")
+
+def test_chunked_fetch_sees_each_transfer_once():
+    """Consecutive bounded ranges return every watched transfer exactly once"""
+    chain = SimulatedChain(max_log_range=10)
+    client = Web3(chain)
+    watch_set = WatchSet(USDT_ADDRESS)
+    assert watch_set.fetch_transfers(client, 1, 5) == [] and not chain.requests["eth_getLogs"]
+
+    watch_set.add(ESCROW)
+    for index in range(5):
+        chain.deposit(SELLER, ESCROW, 10 ** 6 + index)
+        chain.deposit(SELLER, OTHER_SELLER, 1)  # Not watched
+        chain.mine(7)
+
+    transfers = []
+    to_block = 0
+    while to_block < chain.head:
+        chunk_end = min(chain.head, to_block + 10)
+        transfers.extend(watch_set.fetch_transfers(client, to_block + 1, chunk_end))
+        to_block = chunk_end
+    assert [t["value"] for t in transfers] == [10 ** 6 + index for index in range(5)]
+    assert chain.requests["eth_getLogs"] == 4
+    print("✅ PASS: 35 blocks in 4 range queries, 5 transfers")
+
+def test_escrow_deposit_matching():
+    """Seller wallet and amount together pick the deal; wallet alone only when unambiguous"""
+    db = {
+        "1": waiting_deal(SELLER, 10.0),
+        "2": waiting_deal(SELLER, 25.0),
+        "3": waiting_deal(OTHER_SELLER, 40.0),
+        "4": dict(waiting_deal(SELLER, 25.0), status="completed"),
+    }
+    assert match_escrow_transfer(db, SELLER.lower(), 25.0) == ("2", True)
+    assert match_escrow_transfer(db, SELLER, 10.0) == ("1", True)
+    # Wrong amount from a seller with two waiting deals: neither is cancelled
+    assert match_escrow_transfer(db, SELLER, 12.0) == (None, False)
+    # Wrong amount from a seller with one waiting deal: that deal handles it
+    assert match_escrow_transfer(db, OTHER_SELLER, 12.0) == ("3", True)
+    # Right amount from an unknown wallet cannot be verified as the seller
+    assert match_escrow_transfer(db, ESCROW, 40.0) == ("3", False)
+    assert match_escrow_transfer(db, ESCROW, 99.0) == (None, False)
+    print("✅ PASS: Deposits matched to the right deal")
+
+def main():
+    """Run all watch set tests"""
+    test_filter_covers_every_address()
+    test_decode_orders_and_bounds_logs()
+    test_chunked_fetch_sees_each_transfer_once()
+    test_escrow_deposit_matching()
+    print("\n🎯 WATCH SET TESTING COMPLETE")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Traffic Trace Recorder for Escrow Bot
+Captures incoming Telegram updates and escrow deposits, scrubbed of personal data, for replay
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+TRACE_VERSION = 1
+
+# Event kinds: one gzip JSON line each, with short keys to keep traces small
+EVENT_HEADER = "h"      # {"v"}
+EVENT_MESSAGE = "m"     # {"t", "u", "c", "x"} or {"t", "u", "c", "n"} for non-command text
+EVENT_DEPOSIT = "d"     # {"t", "f", "e", "v"}
+EVENT_STATE = "s"       # {"t", "state"}
+
+DEAL_PLACEHOLDER = "{deal}"
+
+ADDRESS_PATTERN = re.compile(r"^0x[0-9a-fA-F]{40}$")
+DEAL_ID_PATTERN = re.compile(r"^\d{9,}$")                 # Deal ids are creation timestamps
+AMOUNT_PATTERN = re.compile(r"^\d{1,8}(\.\d{1,8})?$")
+
+
+def state_summary(db, orders, wallets):
+    """Counts and totals of the stores, with nothing that identifies a user"""
+    deals = Counter(deal.get("status", "unknown") for deal in db.values())
+    volume = Counter()
+    for deal in db.values():
+        volume[deal.get("status", "unknown")] += float(deal.get("amount", 0))
+    return {
+        "deals": dict(sorted(deals.items())),
+        "deal_volume": {status: round(amount, 6) for status, amount in sorted(volume.items())},
+        "buy_orders": len(orders.get("buy_orders", {})),
+        "sell_orders": len(orders.get("sell_orders", {})),
+        "wallets": len(wallets),
+    }
+
+
+def read_trace(path):
+    """Events of a trace file in recorded order"""
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def pseudonym_user_id(pseudonym):
+    """A stable positive Telegram user id for a pseudonymous username"""
+    if pseudonym.startswith("a"):
+        return int(pseudonym[1:]) + 1
+    return int(pseudonym[1:], 16) % 10 ** 12 + 1000
+
+
+class TraceRecorder:
+    """
+    Append-only trace of what drives the bot: commands and escrow deposits.
+
+    Users, wallet addresses and free text are replaced as they are recorded.
+    Usernames and addresses map to keyed-hash pseudonyms, so the same trader
+    keeps the same pseudonym and wallet within a trace. With a random salt the
+    mapping cannot be reversed; a fixed salt keeps pseudonyms stable across
+    restarts. Command names and amounts are kept because they decide what the
+    handlers do, and admins are recorded by their position in the admin list
+    so a replay can give them back their rights. Deal ids become a
+    placeholder the replay fills in, and any other argument or non-command
+    text is dropped or reduced to its length. Times are seconds since the
+    trace started; no wall-clock time or block number is kept, so a trace
+    cannot be lined up with the public chain.
+
+    Calls come from the polling and monitor threads, so writes are serialized
+    and flushed at most once a second.
+    """
+
+    def __init__(self, path, salt=None, escrow_wallet=None, group_id=None, admins=(), flush_interval=1.0):
+        self.path = path
+        self.salt = (salt or os.urandom(16).hex()).encode()
+        self.admins = [admin.lower().lstrip("@") for admin in admins]
+        self.escrow_wallet = escrow_wallet.lower() if escrow_wallet else None
+        self.group_id = group_id
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.started = None
+        self.last_flush = 0.0
+        self.events = 0
+
+    def _digest(self, kind, value):
+        return hmac.new(self.salt, f"{kind}:{value}".encode(), hashlib.sha256).hexdigest()
+
+    def user(self, username_or_id):
+        """Admins by their position in the config (a0, a1, ...), everyone else by keyed hash"""
+        name = str(username_or_id).lower().lstrip("@")
+        if name in self.admins:
+            return f"a{self.admins.index(name)}"
+        return "u" + self._digest("user", name)[:12]
+
+    def address(self, address):
+        return "0x" + self._digest("address", address.lower())[:40]
+
+    def scrub_command(self, text):
+        """Keep the command and amounts; pseudonymize addresses and @users; drop the rest"""
+        words = text.split()
+        tokens = [words[0].split("@")[0]]  # /buy@escrow_bot -> /buy
+        for word in words[1:]:
+            if ADDRESS_PATTERN.match(word):
+                tokens.append(self.address(word))
+            elif word.startswith("@") and len(word) > 1:
+                tokens.append("@" + self.user(word))
+            elif DEAL_ID_PATTERN.match(word):
+                tokens.append(DEAL_PLACEHOLDER)
+            elif AMOUNT_PATTERN.match(word):
+                tokens.append(word)
+            else:
+                tokens.append("x")
+        return " ".join(tokens)
+
+    def _chat(self, chat_id, user_id):
+        if chat_id == self.group_id:
+            return "g"
+        if chat_id == user_id:
+            return "p"
+        return "o"  # Some other group; replayed into a stand-in chat
+
+    # === RECORDING ===
+
+    def record_message(self, message, now=None):
+        """An incoming message, as telebot passes it to update listeners"""
+        sender = message.from_user
+        if sender is None:
+            return
+        text = message.text or ""
+        event = {
+            "k": EVENT_MESSAGE,
+            "u": self.user(sender.username or sender.id),
+            "c": self._chat(message.chat.id, sender.id),
+        }
+        if text.startswith("/"):
+            event["x"] = self.scrub_command(text)
+        else:
+            event["n"] = len(text)
+        self._write(event, now)
+
+    def record_deposit(self, transfer, now=None):
+        """A USDT transfer the payment monitor picked up"""
+        self._write({
+            "k": EVENT_DEPOSIT,
+            "f": self.address(transfer["from"]),
+            "e": transfer.get("to", "").lower() == self.escrow_wallet,
+            "v": transfer["value"],
+        }, now)
+
+    def record_state(self, summary, now=None):
+        """Store summary at the end of the trace, for divergence checks on replay"""
+        self._write({"k": EVENT_STATE, "state": summary}, now)
+
+    def close(self, summary=None, now=None):
+        if summary is not None:
+            self.record_state(summary, now)
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _write(self, event, now=None):
+        with self.lock:
+            now = now if now is not None else time.time()
+            if self.file is None:
+                # Appending starts a new gzip member; each opened trace gets its own header
+                self.file = gzip.open(self.path, "at")
+                self.started = now
+                self.file.write(json.dumps({"k": EVENT_HEADER, "v": TRACE_VERSION}, separators=(",", ":")) + "\n")
+            event["t"] = round(now - self.started, 3)
+            self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+            self.events += 1
+            if now - self.last_flush >= self.flush_interval:
+                self.file.flush()
+                self.last_flush = now
@@ -0,0 +1,115 @@
+"""
+Deposit Address Watch Set for Escrow Bot
+Keeps every live deposit address and fetches their USDT transfers with one log query
+"""
+
+import threading
+
+# keccak("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def _hex(value):
+    if isinstance(value, str):
+        return value
+    return "0x" + bytes(value).hex()
+
+
+def _int(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+
+def _block(value):
+    return value if isinstance(value, str) else hex(value)
+
+
+def address_to_topic(address):
+    """Left-pad an address to a 32-byte indexed topic"""
+    return "0x" + "0" * 24 + address.lower()[2:]
+
+
+def topic_to_address(topic):
+    return "0x" + _hex(topic)[-40:]
+
+
+def decode_transfer_log(log):
+    """Flatten a Transfer log (web3 or raw JSON-RPC form) into the fields the bot works with"""
+    data = _hex(log["data"])
+    return {
+        "tx_hash": _hex(log["transactionHash"]),
+        "log_index": _int(log["logIndex"]),
+        "block_number": _int(log["blockNumber"]),
+        "block_hash": _hex(log["blockHash"]),
+        "from": topic_to_address(log["topics"][1]),
+        "to": topic_to_address(log["topics"][2]),
+        "value": int(data, 16) if data not in ("0x", "") else 0,
+    }
+
+
+class WatchSet:
+    """Deposit addresses mapped to the deal they belong to (None for the shared escrow)"""
+
+    def __init__(self, token_address):
+        self.token_address = token_address
+        self.owners = {}  # lowercase address -> deal_id or None
+        self.lock = threading.Lock()
+
+    def add(self, address, deal_id=None):
+        with self.lock:
+            self.owners[address.lower()] = deal_id
+
+    def remove(self, address):
+        with self.lock:
+            self.owners.pop(address.lower(), None)
+
+    def remove_deal(self, deal_id):
+        """Stop watching every address that belongs to a closed deal"""
+        with self.lock:
+            for address in [a for a, owner in self.owners.items() if owner == deal_id]:
+                del self.owners[address]
+
+    def owner(self, address):
+        """O(1) attribution of a deposit address to its deal"""
+        with self.lock:
+            return self.owners.get(address.lower())
+
+    def __contains__(self, address):
+        with self.lock:
+            return address.lower() in self.owners
+
+    def __len__(self):
+        with self.lock:
+            return len(self.owners)
+
+    def addresses(self):
+        with self.lock:
+            return list(self.owners)
+
+    def to_dict(self):
+        with self.lock:
+            return dict(self.owners)
+
+    def build_filter(self, from_block, to_block):
+        """One eth_getLogs filter: Transfer events whose recipient is any watched address"""
+        recipients = [address_to_topic(address) for address in self.addresses()]
+        return {
+            "address": self.token_address,
+            "fromBlock": _block(from_block),
+            "toBlock": _block(to_block),
+            # topics: [event, from (any), to (OR-list of watched addresses)]
+            "topics": [TRANSFER_TOPIC, None, recipients],
+        }
+
+    def fetch_transfers(self, web3, from_block, to_block):
+        """Fetch and decode transfers into watched addresses, oldest first"""
+        if not len(self) or from_block > to_block:
+            return []
+        return self.decode_logs(web3.eth.get_logs(self.build_filter(from_block, to_block)))
+
+    def decode_logs(self, logs, max_block=None):
+        """Decode logs oldest first, dropping any past max_block (left for the next tick)"""
+        transfers = [decode_transfer_log(log) for log in logs]
+        if max_block is not None:
+            transfers = [t for t in transfers if t["block_number"] <= max_block]
+        transfers.sort(key=lambda t: (t["block_number"], t["log_index"]))
+        return transfers